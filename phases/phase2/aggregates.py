@@ -0,0 +1,161 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from phases.phase2.columnar import ColumnarTranscript
+
+def _counts_in_first_seen_order(codes: np.ndarray) -> List[tuple]:
+    """(code, count) pairs ordered by each code's first occurrence"""
+    values, first, counts = np.unique(codes, return_index=True, return_counts=True)
+    order = np.argsort(first, kind='stable')
+    return [(int(values[i]), int(counts[i])) for i in order]
+
+class ConversationAggregate:
+    """
+    One-pass tallies over analyzed utterances: customer sentiment counts,
+    customer intent counts and keyword frequencies per category.
+
+    Aggregates built over consecutive chunks of a transcript can be merged,
+    so a long transcript can be analyzed by several workers and reduced to
+    exactly the result of a single pass. Ties are broken by first occurrence,
+    which is preserved as long as chunks are merged in transcript order.
+    """
+    SENTIMENTS = ('positive', 'negative', 'neutral')
+
+    def __init__(self):
+        self.utterance_count = 0
+        self.customer_count = 0
+        self.sentiment_counts: Counter = Counter()
+        self.intent_counts: Counter = Counter()
+        self.keyword_counts: Dict[str, Counter] = {}
+
+    def add(self, utterance: Dict) -> None:
+        """Fold a single analyzed utterance into the aggregate"""
+        self.utterance_count += 1
+        if utterance.get('speaker') == 'Customer':
+            self.customer_count += 1
+            sentiment = utterance.get('sentiment')
+            if sentiment in self.SENTIMENTS:
+                self.sentiment_counts[sentiment] += 1
+            intent = utterance.get('intent')
+            if intent and intent != 'no_intent_detected':
+                self.intent_counts[intent] += 1
+
+        for category, terms in (utterance.get('keywords') or {}).items():
+            if terms:
+                self.keyword_counts.setdefault(category, Counter()).update(terms)
+
+    def update(self, utterances: Iterable[Dict]) -> 'ConversationAggregate':
+        """Fold a sequence of analyzed utterances into the aggregate"""
+        for utterance in utterances:
+            self.add(utterance)
+        return self
+
+    def merge(self, other: 'ConversationAggregate') -> 'ConversationAggregate':
+        """Return a new aggregate covering this chunk followed by ``other``"""
+        merged = ConversationAggregate()
+        merged += self
+        merged += other
+        return merged
+
+    def __iadd__(self, other: 'ConversationAggregate') -> 'ConversationAggregate':
+        """Fold ``other`` into this aggregate in place"""
+        self.utterance_count += other.utterance_count
+        self.customer_count += other.customer_count
+        self.sentiment_counts.update(other.sentiment_counts)
+        self.intent_counts.update(other.intent_counts)
+        for category, counts in other.keyword_counts.items():
+            self.keyword_counts.setdefault(category, Counter()).update(counts)
+        return self
+
+    __add__ = merge
+
+    @classmethod
+    def combine(cls, parts: Iterable['ConversationAggregate']) -> 'ConversationAggregate':
+        """Reduce partial aggregates, given in transcript order, into one"""
+        combined = cls()
+        for part in parts:
+            combined += part
+        return combined
+
+    @classmethod
+    def from_utterances(cls, utterances: Iterable[Dict]) -> 'ConversationAggregate':
+        """Build an aggregate over analyzed utterances"""
+        return cls().update(utterances)
+
+    @classmethod
+    def from_columns(cls, columns: ColumnarTranscript, index: int = 0) -> 'ConversationAggregate':
+        """Build the aggregate for one conversation of a columnar transcript"""
+        aggregate = cls()
+        rows = columns.conversation_slice(index)
+        customer = columns.customer_mask()[rows]
+        aggregate.utterance_count = rows.stop - rows.start
+        aggregate.customer_count = int(customer.sum())
+
+        sentiments = columns.sentiment_codes[rows][customer]
+        for code, count in _counts_in_first_seen_order(sentiments[sentiments >= 0]):
+            label = columns.SENTIMENTS[code]
+            if label in cls.SENTIMENTS:
+                aggregate.sentiment_counts[label] = count
+
+        intents = columns.intent_codes[rows][customer]
+        for code, count in _counts_in_first_seen_order(intents[intents >= 0]):
+            label = columns.intent_labels[code]
+            if label != 'no_intent_detected':
+                aggregate.intent_counts[label] = count
+
+        if columns.keyword_offsets is not None:
+            entries = slice(int(columns.keyword_offsets[rows.start]), int(columns.keyword_offsets[rows.stop]))
+            categories = columns.keyword_categories[entries]
+            terms = columns.keyword_terms[entries]
+            for category, _ in _counts_in_first_seen_order(categories):
+                aggregate.keyword_counts[columns.KEYWORD_CATEGORIES[category]] = Counter({
+                    columns.keyword_vocab[term]: count
+                    for term, count in _counts_in_first_seen_order(terms[categories == category])
+                })
+        return aggregate
+
+    @property
+    def overall_sentiment(self) -> str:
+        """Most frequent customer sentiment, 'neutral' when none was analyzed"""
+        if not self.sentiment_counts:
+            return 'neutral'
+        return max(self.SENTIMENTS, key=lambda s: self.sentiment_counts[s])
+
+    @property
+    def primary_intent(self) -> str:
+        """Most frequent customer intent, 'no_intent_detected' when there is none"""
+        if not self.intent_counts:
+            return 'no_intent_detected'
+        return max(self.intent_counts, key=self.intent_counts.get)
+
+    def key_findings(self, top_n: Optional[int] = 5) -> Dict[str, List[str]]:
+        """Most frequent keywords per category, most common first"""
+        return {
+            category: [term for term, _ in counts.most_common(top_n)]
+            for category, counts in self.keyword_counts.items()
+        }
+
+    def to_dict(self) -> Dict:
+        """Serialize partial state so it can be shipped between workers"""
+        return {
+            'utterance_count': self.utterance_count,
+            'customer_count': self.customer_count,
+            'sentiment_counts': dict(self.sentiment_counts),
+            'intent_counts': dict(self.intent_counts),
+            'keyword_counts': {k: dict(v) for k, v in self.keyword_counts.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ConversationAggregate':
+        """Restore partial state produced by ``to_dict``"""
+        aggregate = cls()
+        aggregate.utterance_count = data.get('utterance_count', 0)
+        aggregate.customer_count = data.get('customer_count', 0)
+        aggregate.sentiment_counts = Counter(data.get('sentiment_counts', {}))
+        aggregate.intent_counts = Counter(data.get('intent_counts', {}))
+        aggregate.keyword_counts = {
+            k: Counter(v) for k, v in data.get('keyword_counts', {}).items()
+        }
+        return aggregate
@@ -0,0 +1,107 @@
+"""Content negotiation for compressed and binary API responses."""
+import gzip
+import json
+from typing import Any, Dict, List, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import msgpack
+except ImportError:  # Optional: enables application/msgpack responses
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # Optional: enables zstd content encoding
+    zstandard = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+COMPRESSION_MIN_SIZE = 1024  # Bodies below this many bytes are sent uncompressed
+OFFLOAD_MIN_SIZE = 256 * 1024  # Bodies above this many bytes are encoded in a worker thread
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+def _parse_quality(header: str) -> Dict[str, float]:
+    """Parse an Accept-style header into {token: q} pairs"""
+    preferences = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        preferences[token] = q
+    return preferences
+
+def available_encodings() -> List[str]:
+    """Content encodings this server can produce, most preferred first"""
+    return (["zstd"] if zstandard is not None else []) + ["gzip"]
+
+def select_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best content encoding allowed by the client, or None for identity"""
+    if not accept_encoding:
+        return None
+    preferences = _parse_quality(accept_encoding)
+    wildcard = preferences.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in available_encodings():
+        q = preferences.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def select_media_type(accept: Optional[str]) -> str:
+    """Pick msgpack only when the client prefers it and msgpack is installed"""
+    if not accept or msgpack is None:
+        return JSON_MEDIA_TYPE
+    preferences = _parse_quality(accept)
+    msgpack_q = preferences.get(MSGPACK_MEDIA_TYPE, preferences.get("application/x-msgpack", 0.0))
+    json_q = max(
+        preferences.get(JSON_MEDIA_TYPE, 0.0),
+        preferences.get("application/*", 0.0),
+        preferences.get("*/*", 0.0)
+    )
+    return MSGPACK_MEDIA_TYPE if msgpack_q > 0 and msgpack_q >= json_q else JSON_MEDIA_TYPE
+
+def serialize(content: Any, media_type: str) -> bytes:
+    """Serialize a response payload for the negotiated media type"""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(content, use_bin_type=True)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a serialized body with the negotiated content encoding"""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+async def render_response(request: Request, content: Any, status_code: int = 200) -> Response:
+    """Build a response honouring the request's Accept and Accept-Encoding headers"""
+    media_type = select_media_type(request.headers.get("accept"))
+    encoding = select_encoding(request.headers.get("accept-encoding"))
+
+    body = serialize(content, media_type)
+    applied = None
+    if encoding is not None and len(body) >= COMPRESSION_MIN_SIZE:
+        if len(body) >= OFFLOAD_MIN_SIZE:
+            # Keep the event loop free while large bodies are compressed
+            body = await run_in_threadpool(compress, body, encoding)
+        else:
+            body = compress(body, encoding)
+        applied = encoding
+
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if applied:
+        headers["Content-Encoding"] = applied
+    return Response(content=body, status_code=status_code, media_type=media_type, headers=headers)
@@ -1,18 +1,46 @@
+import asyncio
+import copy
+import os
+import time
+import uuid
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
+import anyio.to_thread
+import httpx
+import numpy as np
 from fastapi import FastAPI, HTTPException, status, Request, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 
-from .models import ConversationRequest, ConversationResponse
+from .encoding import render_response
+from .rpc import RPCServer
+from .models import (
+    ConversationRequest, ConversationResponse, BatchRequest, BatchResponse, ResponseOptions
+)
+from phases.phase2.call_dynamics import CallDynamicsAnalyzer
+from phases.phase2.columnar import ColumnarTranscript
 from phases.phase2.ingestion import InputValidator
 from phases.phase2.intent_classifier import IntentClassifier
 from phases.phase2.sentiment_analyzer import SentimentAnalyzer
 from phases.phase2.keyword_extractor import KeywordExtractor
 from phases.phase2.response_formatter import ResponseFormatter
 from phases.phase2.logger import CallChemyLogger
+from phases.phase2.results_store import ResultsStore
+from phases.phase2.rollups import RollupStore
+from phases.phase2.search_index import KeywordSearchIndex
+from phases.phase2.embeddings import HashedNgramEmbedder
+from phases.phase2.vector_index import IVFIndex
+from phases.phase2.near_duplicates import NearDuplicateDetector
+from phases.phase2.metrics import MetricsRegistry, RequestTrace, Stage, current_trace
+from phases.phase2.profiler import SamplingProfiler
+from phases.phase2.health import ReadinessMonitor
+from phases.phase2.allocations import allocation_profiler
+from phases.phase2.tracing import (
+    KIND_SERVER, FileSpanExporter, OtlpHttpExporter, parse_traceparent, tracer
+)
 
 # API Key Settings
 API_KEY = "callchemy-test-key"  # In production, use environment variables
@@ -26,22 +54,119 @@ def get_api_key(api_key: str = Query(..., description="Your API key")):
         )
     return api_key
 
+# Admin endpoints (profiling) are disabled unless an admin key is configured
+ADMIN_API_KEY = os.getenv("CALLCHEMY_ADMIN_KEY")
+
+def get_admin_key(admin_key: str = Query(..., description="Admin API key")):
+    if not ADMIN_API_KEY or admin_key != ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin key"
+        )
+    return admin_key
+
+# Internal RPC listener: set a Unix socket path or a TCP port to enable it.
+# A socket serves one worker; with several workers put {pid} in the path (e.g. /tmp/callchemy-{pid}.sock)
+RPC_SOCKET = os.getenv("CALLCHEMY_RPC_SOCKET")
+RPC_HOST = os.getenv("CALLCHEMY_RPC_HOST", "127.0.0.1")
+RPC_PORT = os.getenv("CALLCHEMY_RPC_PORT")
+
+# Optional SQLite results store: set a database path to keep analysis results
+RESULTS_DB = os.getenv("CALLCHEMY_RESULTS_DB")
+# Analytics rollups are kept in memory unless a database path is set; with one, workers sharing it query it
+ROLLUPS_DB = os.getenv("CALLCHEMY_ROLLUPS_DB")
+# Days of hourly buckets held in memory (all of them without a database, a read cache with one)
+ROLLUPS_MEMORY_DAYS = int(os.getenv("CALLCHEMY_ROLLUPS_MEMORY_DAYS", 31))
+# Similar-conversation search embeds every completed analysis, so it is "off" unless set to "on".
+# Its vectors are kept in memory; set a .npz path to load them on startup and save on shutdown.
+# Each worker saves its own file next to it (vectors.<pid>.npz); startup merges them all
+VECTOR_SEARCH_MODE = os.getenv("CALLCHEMY_VECTOR_SEARCH", "off")
+VECTOR_INDEX_PATH = os.getenv("CALLCHEMY_VECTOR_INDEX")
+# Near-duplicate transcripts: "off", "flag" (mark the match in the analysis) or "reuse" (serve the earlier analysis)
+NEAR_DUPLICATE_MODE = os.getenv("CALLCHEMY_NEAR_DUPLICATES", "off")
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("CALLCHEMY_NEAR_DUPLICATE_THRESHOLD", 0.9))
+# Metrics are per process; with several workers set a directory they share so /metrics reports all of them
+METRICS_DIR = os.getenv("CALLCHEMY_METRICS_DIR")
+# Readiness is refreshed in the background every few seconds; optionally probe the LLM provider's endpoint too
+READINESS_INTERVAL = float(os.getenv("CALLCHEMY_READINESS_INTERVAL", 5))
+LLM_HEALTH_URL = os.getenv("CALLCHEMY_LLM_HEALTH_URL")
+# Trace spans are exported to an OTLP/JSON file or an OTLP/HTTP collector when either is set
+TRACE_FILE = os.getenv("CALLCHEMY_TRACE_FILE")
+TRACE_OTLP_ENDPOINT = os.getenv("CALLCHEMY_TRACE_OTLP_ENDPOINT")
+TRACE_SAMPLE_RATE = float(os.getenv("CALLCHEMY_TRACE_SAMPLE_RATE", 0.1))
+# Request-log upkeep (rolling, compressing and expiring segments) runs this often, in seconds
+LOG_MAINTENANCE_INTERVAL = float(os.getenv("CALLCHEMY_LOG_MAINTENANCE_INTERVAL", 300))
+# With a results store, the search index is rebuilt from it at startup and then picks up
+# results saved by other workers this often, in seconds
+SEARCH_SYNC_INTERVAL = float(os.getenv("CALLCHEMY_SEARCH_SYNC_INTERVAL", 10))
+
+def create_rpc_server() -> RPCServer:
+    """RPC server exposing the same pipeline, and engine instances, as the HTTP endpoints"""
+    return RPCServer(
+        handlers={
+            "analyze": lambda params: run_analysis(ConversationRequest(**params)),
+            "analyze_batch": lambda params: run_batch(BatchRequest(**params))
+        },
+        api_key=API_KEY
+    )
+
+async def _run_periodically(interval: float, function, failure_event: str) -> None:
+    """Run a blocking function in the thread pool every ``interval`` seconds, logging failures"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(function)
+        except Exception as e:
+            logger.log_event(failure_event, error=e)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler for startup/shutdown events"""
     # Startup: Initialize resources
-    logger.log_request(
-        conversation_id="system",
-        request_data={"event": "startup"},
-        response_data={"status": "API initialized"}
-    )
+    rpc_server = None
+    if RPC_SOCKET or RPC_PORT:
+        rpc_server = create_rpc_server()
+        await rpc_server.start(
+            host=RPC_HOST,
+            port=int(RPC_PORT) if RPC_PORT else None,
+            path=RPC_SOCKET.format(pid=os.getpid()) if RPC_SOCKET else None
+        )
+    loop = asyncio.get_running_loop()
+    background = [
+        loop.create_task(_run_periodically(
+            LOG_MAINTENANCE_INTERVAL, logger.run_maintenance, "log_maintenance_failed"
+        ))
+    ]
+    if results_store is not None:
+        await run_in_threadpool(search_index.sync_from, results_store)
+        background.append(loop.create_task(_run_periodically(
+            SEARCH_SYNC_INTERVAL, lambda: search_index.sync_from(results_store), "search_sync_failed"
+        )))
+    readiness.start()
+    logger.log_event("startup", {"status": "API initialized"})
     yield
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    await readiness.stop()
     # Shutdown: Cleanup resources
-    logger.log_request(
-        conversation_id="system",
-        request_data={"event": "shutdown"},
-        response_data={"status": "API shutdown"}
-    )
+    if rpc_server is not None:
+        await rpc_server.close()
+    logger.log_event("shutdown", {"status": "API shutdown"})
+    # Write out everything still queued for the request log and results store
+    if results_store is not None:
+        results_store.close()
+    rollup_store.close()
+    if vector_index is not None and VECTOR_INDEX_PATH:
+        saved = IVFIndex.worker_path(VECTOR_INDEX_PATH)
+        vector_index.save(str(saved))
+        # Their vectors are in this worker's file now
+        for path in vector_index_files:
+            if path != saved:
+                path.unlink(missing_ok=True)
+    metrics.close()
+    tracer.close()
+    logger.close()
 
 app = FastAPI(
     title="CallChemy API",
@@ -50,13 +175,135 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+def _parse_sample_rates(value: str) -> Dict[str, float]:
+    """Parse 'status=rate' pairs, e.g. 'success=0.01,error=1'"""
+    rates = {}
+    for pair in filter(None, (part.strip() for part in value.split(","))):
+        status_name, _, rate = pair.partition("=")
+        rates[status_name.strip()] = float(rate)
+    return rates
+
 # Initialize components
 input_validator = InputValidator()
 intent_classifier = IntentClassifier()
 sentiment_analyzer = SentimentAnalyzer()
 keyword_extractor = KeywordExtractor()
 response_formatter = ResponseFormatter()
-logger = CallChemyLogger()
+call_dynamics_analyzer = CallDynamicsAnalyzer()
+logger = CallChemyLogger(
+    log_dir=os.getenv("CALLCHEMY_LOG_DIR", "logs"),
+    background=True,
+    overflow=os.getenv("CALLCHEMY_LOG_OVERFLOW", "block"),
+    fsync=os.getenv("CALLCHEMY_LOG_FSYNC", "never"),
+    segment_period=os.getenv("CALLCHEMY_LOG_SEGMENT_PERIOD", "hourly"),
+    segment_max_bytes=int(os.getenv("CALLCHEMY_LOG_SEGMENT_MAX_BYTES", 256 * 1024 * 1024)),
+    payload_mode=os.getenv("CALLCHEMY_LOG_PAYLOADS", "full"),
+    sample_rates=_parse_sample_rates(os.getenv("CALLCHEMY_LOG_SAMPLE_RATES", "")),
+    max_payload_bytes=int(os.getenv("CALLCHEMY_LOG_MAX_PAYLOAD_BYTES", 0)) or None
+)
+results_store = ResultsStore(RESULTS_DB) if RESULTS_DB else None
+rollup_store = RollupStore(ROLLUPS_DB, memory_days=ROLLUPS_MEMORY_DAYS)
+search_index = KeywordSearchIndex()
+embedder = HashedNgramEmbedder()
+if VECTOR_SEARCH_MODE not in ("off", "on"):
+    raise ValueError("CALLCHEMY_VECTOR_SEARCH must be 'off' or 'on'")
+if VECTOR_SEARCH_MODE == "off":
+    vector_index, vector_index_files = None, []
+elif VECTOR_INDEX_PATH:
+    vector_index, vector_index_files = IVFIndex.load_merged(VECTOR_INDEX_PATH, embedder.dim)
+else:
+    vector_index, vector_index_files = IVFIndex(embedder.dim), []
+if NEAR_DUPLICATE_MODE not in ("off", "flag", "reuse"):
+    raise ValueError("CALLCHEMY_NEAR_DUPLICATES must be 'off', 'flag' or 'reuse'")
+near_duplicates = (
+    NearDuplicateDetector(
+        threshold=NEAR_DUPLICATE_THRESHOLD,
+        max_entries=int(os.getenv("CALLCHEMY_NEAR_DUPLICATE_HISTORY", 100000))
+    )
+    if NEAR_DUPLICATE_MODE != "off" else None
+)
+
+profiler = SamplingProfiler()
+if TRACE_OTLP_ENDPOINT:
+    tracer.configure(OtlpHttpExporter(TRACE_OTLP_ENDPOINT), TRACE_SAMPLE_RATE)
+elif TRACE_FILE:
+    tracer.configure(FileSpanExporter(TRACE_FILE), TRACE_SAMPLE_RATE)
+metrics = MetricsRegistry(METRICS_DIR)
+conversations_total = metrics.counter(
+    "callchemy_conversations_total", "Conversations analyzed, by operation and outcome", ("operation", "outcome")
+)
+errors_total = metrics.counter(
+    "callchemy_errors_total", "Failed conversation analyses, by operation and error type", ("operation", "error_type")
+)
+request_seconds = metrics.histogram(
+    "callchemy_request_duration_seconds", "Analysis call latency, by operation", ("operation",)
+)
+stage_seconds = metrics.histogram(
+    "callchemy_stage_duration_seconds", "Pipeline stage latency, by stage", ("stage",)
+)
+def _write_errors() -> Dict[tuple, int]:
+    errors = {
+        ("request_log",): logger.write_errors,
+        ("rollups",): rollup_store.write_errors,
+        ("spans",): tracer.write_errors
+    }
+    if results_store is not None:
+        errors[("results",)] = results_store.write_errors
+    return errors
+
+metrics.counter_function(
+    "callchemy_background_write_errors_total",
+    "Batches the background writers failed to write, by writer",
+    ("writer",),
+    _write_errors
+)
+transcript_utterances = metrics.histogram(
+    "callchemy_transcript_utterances", "Utterances per analyzed transcript",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+)
+transcript_characters = metrics.histogram(
+    "callchemy_transcript_characters", "Text characters per analyzed transcript",
+    buckets=(100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 1000000)
+)
+
+_SELF_TEST_TRANSCRIPT = [
+    {"speaker": "Customer", "text": "My debit card payment was declined."},
+    {"speaker": "Agent", "text": "I can help you with that."}
+]
+
+def _check_pipeline() -> Tuple[bool, Dict]:
+    """Run the analysis components on a fixed two-utterance transcript"""
+    utterances = keyword_extractor.analyze_transcript(
+        sentiment_analyzer.analyze_transcript(intent_classifier.analyze_transcript(_SELF_TEST_TRANSCRIPT))
+    )
+    ok = len(utterances) == len(_SELF_TEST_TRANSCRIPT) and all("intent" in u and "sentiment" in u for u in utterances)
+    return ok, {}
+
+def _check_request_log() -> Tuple[bool, Dict]:
+    """The request-log writer is keeping up (its queue is under 90% full) and its last batch was written"""
+    backlog, capacity = logger.backlog, logger.capacity
+    ok = (not capacity or backlog < capacity * 0.9) and not logger.write_failing
+    return ok, {"backlog": backlog, "capacity": capacity, "write_errors": logger.write_errors}
+
+async def _check_executor() -> Tuple[bool, Dict]:
+    """Worker threads for blocking calls are not all busy"""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    busy, total = limiter.borrowed_tokens, limiter.total_tokens
+    return busy < total, {"busy_threads": busy, "max_threads": total}
+
+async def _check_llm_provider() -> Tuple[bool, Dict]:
+    """The LLM provider's endpoint answers (any non-5xx status)"""
+    async with httpx.AsyncClient(timeout=readiness.timeout) as http:
+        response = await http.get(LLM_HEALTH_URL)
+    return response.status_code < 500, {"status_code": response.status_code}
+
+readiness = ReadinessMonitor(interval=READINESS_INTERVAL)
+readiness.register("pipeline", _check_pipeline)
+readiness.register("request_log", _check_request_log)
+readiness.register("executor", _check_executor)
+if LLM_HEALTH_URL:
+    # Summarization is optional, so an unreachable provider is reported without failing readiness
+    readiness.register("llm_provider", _check_llm_provider, critical=False)
 
 # Add CORS middleware
 app.add_middleware(
@@ -92,7 +339,9 @@ async def root():
             "docs": "/docs",
             "redoc": "/redoc",
             "health": "/health",
-            "analyze": "/analyze"
+            "metrics": "/metrics",
+            "analyze": "/analyze",
+            "analyze_batch": "/analyze/batch"
         },
         "status": "operational"
     }
@@ -104,13 +353,230 @@ async def health_check():
     """
     return {"status": "healthy"}
 
+@app.get("/health/live", tags=["System"])
+async def liveness():
+    """Liveness probe: the process is up and its event loop is responding"""
+    return {"status": "alive"}
+
+@app.get("/health/ready", tags=["System"])
+async def readiness_probe():
+    """Readiness probe served from the latest background snapshot; 503 while not ready"""
+    snapshot = readiness.status()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if snapshot["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=snapshot
+    )
+
+@app.get("/metrics", tags=["System"], response_class=PlainTextResponse)
+async def get_metrics():
+    """Request, error, stage latency and transcript size metrics in the Prometheus text format"""
+    body = await run_in_threadpool(metrics.render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def _apply_options(response: Dict, options: Optional[ResponseOptions]) -> Dict:
+    """Apply the request's response shaping options, if any"""
+    if options is None:
+        return response
+    return response_formatter.compact_response(
+        response,
+        fields=options.fields,
+        utterance_fields=options.utterance_fields,
+        omit_empty=options.omit_empty,
+        encode_labels=options.encode_labels
+    )
+
+def _stage(name: str, conversation_id: Optional[str] = None):
+    """
+    Time a pipeline stage for /metrics and the current request's timings,
+    record it as a span of a sampled trace and account its memory while profiling
+    """
+    attributes = {"conversation.id": conversation_id} if conversation_id is not None else None
+    stage = tracer.span(name, Stage(stage_seconds, name), attributes=attributes)
+    if allocation_profiler.running:
+        return allocation_profiler.stage(name, stage)
+    return stage
+
+def _server_span(name: str, http_request: Request, conversation_id: Optional[str] = None):
+    """Root span of an API request, continuing the caller's trace when it sends a traceparent header"""
+    inherited = {"request.id": http_request.headers.get("x-request-id") or uuid.uuid4().hex}
+    if conversation_id is not None:
+        inherited["conversation.id"] = conversation_id
+    return tracer.start_span(
+        name,
+        kind=KIND_SERVER,
+        inherited=inherited,
+        remote_parent=parse_traceparent(http_request.headers.get("traceparent"))
+    )
+
+def _observe_transcript(transcript: List[Dict]) -> None:
+    transcript_utterances.observe(len(transcript))
+    transcript_characters.observe(sum(len(str(u.get("text", ""))) for u in transcript))
+
+def _record_result(response: Dict, tenant_id: Optional[str]) -> None:
+    """Update analytics rollups, the search indexes and the results store with a completed analysis"""
+    rollup_store.record(response, tenant_id)
+    search_index.add(response)
+    if vector_index is not None:
+        vector_index.add(response["conversation_id"], embedder.embed_response(response))
+    if results_store is not None:
+        results_store.save(response, tenant_id)
+
+def _find_near_duplicate(conversation: ConversationRequest) -> Tuple[Optional[np.ndarray], Optional[Dict]]:
+    """MinHash signature of the transcript and the earlier conversation it nearly duplicates, if any"""
+    if near_duplicates is None:
+        return None, None
+    with _stage("near_duplicates"):
+        signature = near_duplicates.signature(conversation.transcript)
+        if signature is None:
+            return None, None
+        match = near_duplicates.query(signature, exclude=conversation.conversation_id)
+    if match is None:
+        return signature, None
+    return signature, {"conversation_id": match[0], "similarity": round(match[1], 4)}
+
+def _reuse_analysis(conversation: ConversationRequest, duplicate_of: Dict) -> Optional[Dict]:
+    """Earlier analysis relabelled for this conversation, or None if it is no longer held"""
+    earlier = near_duplicates.payload(duplicate_of["conversation_id"])
+    if earlier is None:
+        return None
+    response = copy.deepcopy(earlier)
+    response["conversation_id"] = conversation.conversation_id
+    response["timestamp"] = datetime.now(timezone.utc).isoformat()
+    return response
+
+def _remember_transcript(
+    conversation: ConversationRequest,
+    signature: Optional[np.ndarray],
+    response: Dict,
+    duplicate_of: Optional[Dict]
+) -> None:
+    """Mark a near-duplicate in its analysis and add the transcript to the detector's history"""
+    if signature is None:
+        return
+    if duplicate_of is not None:
+        response["analysis"]["near_duplicate_of"] = duplicate_of
+    near_duplicates.add(
+        conversation.conversation_id,
+        signature,
+        payload=response if NEAR_DUPLICATE_MODE == "reuse" else None
+    )
+
+def _full_analysis(request: ConversationRequest) -> Dict:
+    """Pipeline output before the request's response options are applied"""
+    # Validate request
+    if not request.transcript:
+        raise ValueError("Transcript cannot be empty")
+        
+    # Validate input structure
+    with _stage("validation"):
+        validated_data = input_validator.validate(request.model_dump())
+    
+    # Run analysis pipeline
+    with _stage("intent"):
+        with_intents = intent_classifier.analyze_transcript(validated_data["transcript"])
+    with _stage("sentiment"):
+        with_sentiment = sentiment_analyzer.analyze_transcript(with_intents)
+    with _stage("keywords"):
+        with_keywords = keyword_extractor.analyze_transcript(with_sentiment)
+    
+    # Format response
+    with _stage("formatting"):
+        response = response_formatter.format_response(
+            conversation_id=request.conversation_id,
+            utterances=with_keywords
+        )
+    with _stage("call_dynamics"):
+        dynamics = call_dynamics_analyzer.analyze_transcript(validated_data["transcript"])
+    if dynamics is not None:
+        response["analysis"]["call_dynamics"] = dynamics
+    return response
+
+def analyze(request: ConversationRequest) -> Dict:
+    """
+    Run the analysis pipeline for one conversation, without logging.
+
+    Raises:
+        ValueError: If the transcript fails validation
+    """
+    return _apply_options(_full_analysis(request), request.options)
+
+def run_analysis(request: ConversationRequest, trace: Optional[RequestTrace] = None) -> Dict:
+    """
+    Run the analysis pipeline for one conversation, log the outcome and store
+    the full result when the results store is enabled.
+
+    Stage times are recorded into ``trace`` when one is given, or into a new
+    one when the request asks for ``options.timings``.
+
+    Raises:
+        ValueError: If the transcript fails validation
+    """
+    started = time.perf_counter()
+    include_timings = request.options is not None and request.options.timings
+    if trace is None and include_timings:
+        trace = RequestTrace()
+    trace_token = current_trace.set(trace)
+    _observe_transcript(request.transcript)
+    span = tracer.start_span(
+        "analyze",
+        inherited={"conversation.id": request.conversation_id},
+        attributes={"transcript.utterances": len(request.transcript)}
+    )
+    try:
+        with span, profiler.tracking(request):
+            signature, duplicate_of = _find_near_duplicate(request)
+            full_response = None
+            if duplicate_of is not None and NEAR_DUPLICATE_MODE == "reuse":
+                with _stage("validation"):
+                    input_validator.validate(request.model_dump())
+                full_response = _reuse_analysis(request, duplicate_of)
+                if full_response is not None:
+                    span.set_attribute("near_duplicate.reused", True)
+                    if trace is not None:
+                        trace.hit("near_duplicate")
+            if full_response is None:
+                full_response = _full_analysis(request)
+            _remember_transcript(request, signature, full_response, duplicate_of)
+            with _stage("recording"):
+                _record_result(full_response, request.tenant_id)
+            response = _apply_options(full_response, request.options)
+        
+            # Log successful request
+            with _stage("logging"):
+                logger.log_request(
+                    conversation_id=request.conversation_id,
+                    request_data=request.model_dump(),
+                    response_data=response
+                )
+            conversations_total.inc("analyze", "success")
+            if include_timings:
+                response = {**response, "timings": {**trace.to_dict(), "utterance_count": len(request.transcript)}}
+            return response
+    except Exception as e:
+        conversations_total.inc("analyze", "error")
+        errors_total.inc("analyze", type(e).__name__)
+        logger.log_request(
+            conversation_id=request.conversation_id,
+            request_data=request.model_dump(),
+            error=e
+        )
+        raise
+    finally:
+        current_trace.reset(trace_token)
+        request_seconds.observe(time.perf_counter() - started, "analyze")
+
 @app.post("/analyze", response_model=ConversationResponse)
 async def analyze_conversation(
     request: ConversationRequest,
+    http_request: Request,
     api_key: str = Depends(get_api_key)
 ) -> ConversationResponse:
     """
     Analyze a conversation transcript and return structured insights.
+
+    The response is JSON by default, or msgpack when requested through the
+    Accept header, and is compressed according to Accept-Encoding. A
+    Server-Timing header reports the wall time of each pipeline stage.
     
     Args:
         request (ConversationRequest): The conversation request containing transcript
@@ -121,62 +587,347 @@ async def analyze_conversation(
     Raises:
         HTTPException: 422 for validation errors, 500 for internal errors
     """
+    trace = RequestTrace()
+    with _server_span("POST /analyze", http_request, request.conversation_id) as span:
+        try:
+            response = run_analysis(request, trace)
+            with tracer.span("encoding"):
+                encoding_started = time.perf_counter()
+                rendered = await render_response(http_request, response)
+                trace.add("encoding", time.perf_counter() - encoding_started)
+            rendered.headers["Server-Timing"] = trace.server_timing()
+        except ValueError as e:
+            rendered = JSONResponse(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                content={"detail": str(e)},
+                headers={"Server-Timing": trace.server_timing()}
+            )
+        except Exception as e:
+            rendered = JSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={"detail": "Internal server error", "error_type": type(e).__name__},
+                headers={"Server-Timing": trace.server_timing()}
+            )
+        span.set_attribute("http.response.status_code", rendered.status_code)
+        return rendered
+
+def _batch_error(conversation_id: str, error: Exception) -> Dict:
+    """Per-item error entry for batch results"""
+    if isinstance(error, ValueError):
+        return {
+            "conversation_id": conversation_id,
+            "error": {"status": status.HTTP_422_UNPROCESSABLE_ENTITY, "detail": str(error)}
+        }
+    return {
+        "conversation_id": conversation_id,
+        "error": {
+            "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+            "detail": "Internal server error",
+            "error_type": type(error).__name__
+        }
+    }
+
+def run_batch(request: BatchRequest) -> Dict:
+    """
+    Analyze each conversation in a batch, reporting failures per item.
+
+    Valid conversations are packed into one ColumnarTranscript so the
+    analysis stages run over flat arrays; results are converted back to
+    the per-utterance dict shape only when the response is formatted.
+    """
+    with tracer.start_span("analyze_batch", attributes={"batch.size": len(request.conversations)}):
+        with profiler.tracking(request):
+            return _run_batch(request)
+
+def _run_batch(request: BatchRequest) -> Dict:
+    started = time.perf_counter()
+    results: List[Optional[Dict]] = [None] * len(request.conversations)
+    accepted = []
+    reused = []
+    near_duplicate_checks = {}
+    for position, conversation in enumerate(request.conversations):
+        _observe_transcript(conversation.transcript)
+        try:
+            with _stage("validation", conversation.conversation_id):
+                validated = input_validator.validate(conversation.model_dump())
+            near_duplicate_checks[position] = _find_near_duplicate(conversation)
+            duplicate_of = near_duplicate_checks[position][1]
+            response = None
+            if duplicate_of is not None and NEAR_DUPLICATE_MODE == "reuse":
+                response = _reuse_analysis(conversation, duplicate_of)
+            if response is not None:
+                reused.append((position, conversation, response))
+            else:
+                accepted.append((position, conversation, validated["transcript"]))
+        except Exception as e:
+            conversations_total.inc("analyze_batch", "error")
+            errors_total.inc("analyze_batch", type(e).__name__)
+            logger.log_request(
+                conversation_id=conversation.conversation_id,
+                request_data=conversation.model_dump(),
+                error=e
+            )
+            results[position] = _batch_error(conversation.conversation_id, e)
+
+    completed = list(reused)
+    if accepted:
+        try:
+            columns = ColumnarTranscript.from_conversations(
+                (conversation.conversation_id, transcript) for _, conversation, transcript in accepted
+            )
+            with _stage("intent"):
+                intent_classifier.analyze_columns(columns)
+            with _stage("sentiment"):
+                sentiment_analyzer.analyze_columns(columns)
+            with _stage("keywords"):
+                keyword_extractor.analyze_columns(columns)
+            with _stage("formatting"):
+                responses = response_formatter.format_columns(columns)
+            with _stage("call_dynamics"):
+                for index, response in enumerate(responses):
+                    dynamics = call_dynamics_analyzer.analyze_columns(columns, index)
+                    if dynamics is not None:
+                        response["analysis"]["call_dynamics"] = dynamics
+            completed.extend(
+                (position, conversation, response)
+                for (position, conversation, _), response in zip(accepted, responses)
+            )
+        except Exception as e:
+            for position, conversation, _ in accepted:
+                conversations_total.inc("analyze_batch", "error")
+                errors_total.inc("analyze_batch", type(e).__name__)
+                logger.log_request(
+                    conversation_id=conversation.conversation_id,
+                    request_data=conversation.model_dump(),
+                    error=e
+                )
+                results[position] = _batch_error(conversation.conversation_id, e)
+
+    for position, conversation, response in sorted(completed, key=lambda item: item[0]):
+        signature, duplicate_of = near_duplicate_checks[position]
+        _remember_transcript(conversation, signature, response, duplicate_of)
+        with _stage("recording", conversation.conversation_id):
+            _record_result(response, conversation.tenant_id)
+        response = _apply_options(response, conversation.options)
+        with _stage("logging", conversation.conversation_id):
+            logger.log_request(
+                conversation_id=conversation.conversation_id,
+                request_data=conversation.model_dump(),
+                response_data=response
+            )
+        conversations_total.inc("analyze_batch", "success")
+        results[position] = response
+    request_seconds.observe(time.perf_counter() - started, "analyze_batch")
+    return {"results": results}
+
+@app.post("/analyze/batch", response_model=BatchResponse)
+async def analyze_batch(
+    request: BatchRequest,
+    http_request: Request,
+    api_key: str = Depends(get_api_key)
+) -> BatchResponse:
+    """
+    Analyze several conversations in one call.
+
+    Results keep the order of the request; a conversation that fails carries
+    an ``error`` object instead of analysis so the rest of the batch still succeeds.
+    """
+    with _server_span("POST /analyze/batch", http_request):
+        # A large batch would otherwise block the event loop, and every other request, until it is done
+        results = await run_in_threadpool(run_batch, request)
+        return await render_response(http_request, results)
+
+def _utterance_count(subject) -> int:
+    """Utterances in a conversation request, or in the longest conversation of a batch"""
+    if isinstance(subject, BatchRequest):
+        return max((len(conversation.transcript) for conversation in subject.conversations), default=0)
+    return len(subject.transcript)
+
+@app.post("/admin/profile", tags=["Admin"], response_class=PlainTextResponse)
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0, le=120, description="How long to sample"),
+    interval_ms: float = Query(10.0, ge=1, le=1000, description="Time between stack samples"),
+    min_utterances: Optional[int] = Query(
+        None, ge=1, description="Sample only analyses of transcripts with at least this many utterances"
+    ),
+    admin_key: str = Depends(get_admin_key)
+) -> PlainTextResponse:
+    """
+    Sample the stacks of this worker process for a while and return them as
+    collapsed stacks (one ``frame;frame;... count`` line per distinct stack),
+    ready for flamegraph.pl or speedscope. Only one profile runs at a time.
+    """
+    request_filter = None
+    if min_utterances is not None:
+        request_filter = lambda subject: _utterance_count(subject) >= min_utterances
     try:
-        # Validate request
-        if not request.transcript:
-            raise ValueError("Transcript cannot be empty")
-            
-        # Validate input structure
-        validated_data = input_validator.validate(request.model_dump())
-        
-        # Run analysis pipeline
-        with_intents = intent_classifier.analyze_transcript(validated_data["transcript"])
-        with_sentiment = sentiment_analyzer.analyze_transcript(with_intents)
-        with_keywords = keyword_extractor.analyze_transcript(with_sentiment)
-        
-        # Format response
-        response = response_formatter.format_response(
-            conversation_id=request.conversation_id,
-            utterances=with_keywords
-        )
-        
-        # Log successful request
-        logger.log_request(
-            conversation_id=request.conversation_id,
-            request_data=request.model_dump(),
-            response_data=response
+        stacks = await run_in_threadpool(profiler.profile, seconds, interval_ms / 1000, request_filter)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return PlainTextResponse(
+        stacks, headers={"Content-Disposition": f'attachment; filename="profile-{os.getpid()}.collapsed"'}
+    )
+
+@app.post("/admin/memory-profile", tags=["Admin"])
+async def memory_profile_worker(
+    seconds: float = Query(10.0, gt=0, le=120, description="How long to trace allocations"),
+    top: int = Query(20, ge=1, le=200, description="Allocation sites to list"),
+    admin_key: str = Depends(get_admin_key)
+) -> Dict:
+    """
+    Trace allocations in this worker process for a while and report peak and
+    retained memory per pipeline stage and summarization provider call, with
+    the allocation sites that grew the most. Tracing slows the worker down
+    while it runs; only one memory profile runs at a time.
+    """
+    try:
+        allocation_profiler.start()
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    try:
+        await anyio.sleep(seconds)
+    finally:
+        # Snapshotting and comparing traced allocations takes a while; keep it off the event loop
+        report = await run_in_threadpool(allocation_profiler.stop, top)
+    return {"pid": os.getpid(), "seconds": seconds, **report}
+
+def _as_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Treat naive query times as UTC"""
+    if moment is not None and moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
+def _require_results_store() -> ResultsStore:
+    if results_store is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Results store is not enabled (set CALLCHEMY_RESULTS_DB)"
         )
-        
-        return response
-    except ValueError as e:
-        logger.log_request(
-            conversation_id=request.conversation_id,
-            request_data=request.model_dump(),
-            error=e
+    return results_store
+
+@app.get("/conversations/{conversation_id}", response_model=ConversationResponse, tags=["Results"])
+async def get_conversation(
+    conversation_id: str,
+    http_request: Request,
+    api_key: str = Depends(get_api_key)
+) -> ConversationResponse:
+    """Stored analysis result for a conversation, served without recomputation"""
+    store = _require_results_store()
+    result = await run_in_threadpool(store.get, conversation_id)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No stored result for conversation {conversation_id}"
         )
-        return JSONResponse(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            content={"detail": str(e)}
+    return await render_response(http_request, result)
+
+@app.get("/conversations/{conversation_id}/similar", tags=["Results"])
+async def get_similar_conversations(
+    conversation_id: str,
+    k: int = Query(10, ge=1, le=100),
+    api_key: str = Depends(get_api_key)
+) -> Dict:
+    """Analyzed conversations most similar to this one (cosine similarity of their embeddings)"""
+    if vector_index is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Similar-conversation search is not enabled (set CALLCHEMY_VECTOR_SEARCH=on)"
         )
-    except Exception as e:
-        logger.log_request(
-            conversation_id=request.conversation_id,
-            request_data=request.model_dump(),
-            error=e
+    try:
+        neighbours = vector_index.similar_to(conversation_id, k)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Conversation {conversation_id} has not been analyzed"
         )
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"detail": "Internal server error", "error_type": type(e).__name__}
+    return {
+        "conversation_id": conversation_id,
+        "similar": [{"conversation_id": key, "score": score} for key, score in neighbours]
+    }
+
+@app.get("/conversations", tags=["Results"])
+async def list_conversations(
+    primary_intent: Optional[str] = None,
+    overall_sentiment: Optional[str] = None,
+    start: Optional[datetime] = Query(None, description="Inclusive ISO 8601 start time"),
+    end: Optional[datetime] = Query(None, description="Exclusive ISO 8601 end time"),
+    limit: int = Query(100, ge=1, le=1000),
+    api_key: str = Depends(get_api_key)
+) -> Dict:
+    """Stored results filtered by intent, sentiment and time window, newest first"""
+    store = _require_results_store()
+    start, end = _as_utc(start), _as_utc(end)
+    results = await run_in_threadpool(store.query, primary_intent, overall_sentiment, start, end, limit)
+    return {"results": results}
+
+@app.get("/rollups", tags=["Results"])
+async def get_rollups(
+    start: Optional[datetime] = Query(None, description="Inclusive ISO 8601 start time"),
+    end: Optional[datetime] = Query(None, description="Exclusive ISO 8601 end time"),
+    tenant_id: Optional[str] = Query(None, description="Restrict to one tenant; omit for all"),
+    granularity: str = Query("total", pattern="^(hour|day|total)$"),
+    top_n: int = Query(10, ge=1, le=100, description="Keywords returned per category"),
+    api_key: str = Depends(get_api_key)
+) -> Dict:
+    """
+    Intent distribution, sentiment mix and top keywords over a time range.
+
+    Served from hourly rollups maintained as analyses complete, so the
+    results are not rescanned.
+    """
+    rollups = await run_in_threadpool(rollup_store.query, _as_utc(start), _as_utc(end), tenant_id, granularity, top_n)
+    return {"tenant_id": tenant_id, "granularity": granularity, "rollups": rollups}
+
+@app.get("/search", tags=["Results"])
+async def search_conversations(
+    q: str = Query(..., min_length=1, description='Boolean keyword/intent query, e.g. \'"debit card" AND blocked\''),
+    start: Optional[datetime] = Query(None, description="Inclusive ISO 8601 start time"),
+    end: Optional[datetime] = Query(None, description="Exclusive ISO 8601 end time"),
+    limit: int = Query(100, ge=1, le=1000),
+    api_key: str = Depends(get_api_key)
+) -> Dict:
+    """
+    Find analyzed conversations by extracted keywords and intents, newest first.
+
+    Terms are keywords (quote multi-word ones) or ``intent:<label>`` /
+    ``primary_intent:<label>``, combined with AND, OR, NOT and parentheses.
+    """
+    try:
+        return await run_in_threadpool(search_index.search, q, _as_utc(start), _as_utc(end), limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+@app.get("/logs/conversations/{conversation_id}", tags=["Logs"])
+async def get_logged_conversation(conversation_id: str, api_key: str = Depends(get_api_key)) -> Dict:
+    """
+    Logged requests, responses and errors for one conversation, oldest first.
+
+    Served from the request log's sidecar index, so the log is not scanned.
+    """
+    entries = await run_in_threadpool(logger.lookup_conversation, conversation_id)
+    if not entries:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No logged requests for conversation {conversation_id}"
         )
+    return {"conversation_id": conversation_id, "entries": entries}
+
+@app.get("/logs", tags=["Logs"])
+async def get_logged_range(
+    start: Optional[datetime] = Query(None, description="Inclusive ISO 8601 start time"),
+    end: Optional[datetime] = Query(None, description="Exclusive ISO 8601 end time"),
+    limit: int = Query(100, ge=1, le=1000),
+    api_key: str = Depends(get_api_key)
+) -> Dict:
+    """Logged requests in a time window, oldest first"""
+    start, end = _as_utc(start), _as_utc(end)
+    entries = await run_in_threadpool(logger.lookup_range, start, end, limit)
+    return {"entries": entries}
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler for unhandled errors"""
-    logger.log_request(
-        conversation_id="system",
-        request_data={"path": str(request.url)},
-        error=exc
-    )
+    logger.log_event("unhandled_error", {"path": str(request.url)}, error=exc)
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": "Internal server error"}
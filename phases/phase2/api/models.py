@@ -1,18 +1,50 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Literal, Union
+
+AnalysisField = Literal["utterances", "overall_sentiment", "primary_intent", "key_findings", "call_dynamics", "near_duplicate_of"]
+UtteranceField = Literal["speaker", "text", "intent", "sentiment", "keywords"]
+
+class ResponseOptions(BaseModel):
+    fields: Optional[List[AnalysisField]] = Field(
+        None,
+        description="Analysis fields to return; omit for all, or e.g. ['overall_sentiment', 'primary_intent'] for aggregates only"
+    )
+    utterance_fields: Optional[List[UtteranceField]] = Field(
+        None,
+        description="Per-utterance fields to return; leave out 'text' to skip echoing the transcript"
+    )
+    omit_empty: bool = Field(False, description="Drop empty keyword categories and empty keyword dicts")
+    encode_labels: bool = Field(
+        False,
+        description="Replace intent and sentiment labels with indexes into analysis.labels"
+    )
+    timings: bool = Field(
+        False,
+        description="Add a 'timings' section with per-stage wall times, utterance count and cache hits"
+    )
 
 class ConversationRequest(BaseModel):
     conversation_id: str = Field(..., min_length=1, description="Unique conversation identifier")
-    transcript: List[Dict[str, str]] = Field(..., min_length=1, description="List of utterances with speaker and text")
+    transcript: List[Dict[str, Union[str, float]]] = Field(
+        ...,
+        min_length=1,
+        description="List of utterances with speaker and text, plus optional start/end times in seconds"
+    )
+    options: Optional[ResponseOptions] = Field(None, description="Response shaping options for large transcripts")
+    tenant_id: Optional[str] = Field(None, min_length=1, description="Tenant the conversation belongs to, for analytics rollups")
     
     model_config = {
         "json_schema_extra": {
             "example": {
                 "conversation_id": "conv-123",
                 "transcript": [
-                    {"speaker": "Customer", "text": "I need help with my credit card"},
-                    {"speaker": "Agent", "text": "I'll be happy to help you with that"}
-                ]
+                    {"speaker": "Customer", "text": "I need help with my credit card", "start": 0.0, "end": 2.4},
+                    {"speaker": "Agent", "text": "I'll be happy to help you with that", "start": 2.9, "end": 4.6}
+                ],
+                "options": {
+                    "utterance_fields": ["intent", "sentiment", "keywords"],
+                    "omit_empty": True
+                }
             }
         }
     }
@@ -22,6 +54,7 @@ class ConversationResponse(BaseModel):
     analysis: Dict = Field(..., description="Analysis results including intents, sentiment, and keywords")
     summary: Optional[Dict[str, List[str]]] = Field(None, description="Conversation summary and key points")
     timestamp: str = Field(..., description="Analysis timestamp in ISO format")
+    timings: Optional[Dict] = Field(None, description="Per-stage timings, when requested through options.timings")
     
     model_config = {
         "json_schema_extra": {
@@ -48,4 +81,13 @@ class ConversationResponse(BaseModel):
                 }
             }
         }
-    }
\ No newline at end of file
+    }
+
+class BatchRequest(BaseModel):
+    conversations: List[ConversationRequest] = Field(..., min_length=1, description="Conversations to analyze")
+
+class BatchResponse(BaseModel):
+    results: List[Dict] = Field(
+        ...,
+        description="One analysis per conversation, in request order; failed items carry an 'error' object"
+    )
@@ -0,0 +1,224 @@
+"""
+Internal binary RPC listener sharing the HTTP app's analysis engines.
+
+Frames are a 4-byte big-endian length followed by a msgpack map. Requests
+look like ``{"id": 1, "method": "analyze", "params": {...}}`` and each gets
+exactly one ``{"id": 1, "result": ...}`` or ``{"id": 1, "error": {...}}``
+frame back, in request order. Clients may pipeline any number of requests
+on a persistent connection without waiting for replies. A connection must
+call ``auth`` with the API key once before other methods are accepted.
+"""
+import asyncio
+import hmac
+import os
+import socket
+import struct
+from typing import Any, Callable, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import msgpack
+except ImportError:  # Optional: required only when the RPC listener is enabled
+    msgpack = None
+
+HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+DISCARD_CHUNK_SIZE = 1024 * 1024
+
+Handler = Callable[[Dict[str, Any]], Any]
+
+class RPCError(Exception):
+    """Error reported back to the caller as an error frame."""
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+def _pack(message: Dict[str, Any]) -> bytes:
+    body = msgpack.packb(message, use_bin_type=True)
+    return HEADER.pack(len(body)) + body
+
+async def _read_frame(reader: asyncio.StreamReader, max_frame_size: int) -> Optional[Dict[str, Any]]:
+    """
+    Read one frame, or return None when the peer closed the connection.
+
+    Raises:
+        RPCError: If the frame is oversized (its body is skipped) or not valid
+            msgpack; either way the stream stays aligned on the next frame
+    """
+    try:
+        header = await reader.readexactly(HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > max_frame_size:
+        remaining = length
+        while remaining:
+            remaining -= len(await reader.readexactly(min(remaining, DISCARD_CHUNK_SIZE)))
+        raise RPCError(413, f"Frame of {length} bytes exceeds limit of {max_frame_size}")
+    body = await reader.readexactly(length)
+    try:
+        return msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise RPCError(400, f"Malformed frame: {type(e).__name__}")
+
+def _socket_in_use(path: str) -> bool:
+    """Whether a server is accepting connections on the Unix socket at ``path``"""
+    if not os.path.exists(path):
+        return False
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+class RPCServer:
+    """Length-prefixed msgpack RPC server over TCP or a Unix socket."""
+    def __init__(
+        self,
+        handlers: Dict[str, Handler],
+        api_key: str,
+        max_frame_size: int = MAX_FRAME_SIZE
+    ):
+        if msgpack is None:
+            raise RuntimeError("The RPC listener requires the 'msgpack' package")
+        self.handlers = handlers
+        self.api_key = api_key
+        self.max_frame_size = max_frame_size
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(
+        self,
+        host: str = "127.0.0.1",
+        port: Optional[int] = None,
+        path: Optional[str] = None
+    ) -> None:
+        """
+        Start listening on a Unix socket path, or on host:port.
+
+        A Unix socket serves one process. Give each worker its own path
+        (main.py expands ``{pid}`` in CALLCHEMY_RPC_SOCKET), or use a TCP port,
+        which every worker can share.
+
+        Raises:
+            RuntimeError: If another live server is listening on ``path``
+        """
+        if path:
+            if _socket_in_use(path):
+                raise RuntimeError(
+                    f"RPC socket {path} is served by another process; use one path per worker or a TCP port"
+                )
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=path)
+        else:
+            # reuse_port lets every uvicorn worker bind the same port
+            self._server = await asyncio.start_server(
+                self._handle_connection, host=host, port=port, reuse_port=True
+            )
+
+    @property
+    def sockets(self) -> List:
+        return list(self._server.sockets) if self._server else []
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _dispatch(self, message: Dict[str, Any], state: Dict[str, bool]) -> Dict[str, Any]:
+        """Run one request frame and build its reply; handlers run in the thread pool, off the event loop"""
+        request_id = message.get("id") if isinstance(message, dict) else None
+        try:
+            if not isinstance(message, dict):
+                raise RPCError(400, "Request frame must be a map")
+            method = message.get("method")
+            params = message.get("params") or {}
+            if method == "auth":
+                if not hmac.compare_digest(str(params.get("api_key", "")), self.api_key):
+                    raise RPCError(401, "Invalid API key")
+                state["authenticated"] = True
+                return {"id": request_id, "result": {"authenticated": True}}
+            if not state["authenticated"]:
+                raise RPCError(401, "Connection is not authenticated")
+            handler = self.handlers.get(method)
+            if handler is None:
+                raise RPCError(404, f"Unknown method: {method}")
+            return {"id": request_id, "result": await run_in_threadpool(handler, params)}
+        except RPCError as e:
+            return {"id": request_id, "error": {"status": e.status, "detail": e.detail}}
+        except ValueError as e:
+            return {"id": request_id, "error": {"status": 422, "detail": str(e)}}
+        except Exception as e:
+            return {
+                "id": request_id,
+                "error": {"status": 500, "detail": "Internal server error", "error_type": type(e).__name__}
+            }
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        state = {"authenticated": False}
+        try:
+            while True:
+                try:
+                    message = await _read_frame(reader, self.max_frame_size)
+                except RPCError as e:
+                    writer.write(_pack({"id": None, "error": {"status": e.status, "detail": e.detail}}))
+                    await writer.drain()
+                    continue
+                if message is None:
+                    break
+                writer.write(_pack(await self._dispatch(message, state)))
+                # drain() only waits once the transport buffer passes its high-water mark,
+                # so replies to pipelined requests are coalesced into few socket writes
+                await writer.drain()
+        except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+class RPCClient:
+    """Minimal client for the internal RPC listener."""
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._next_id = 0
+
+    @classmethod
+    async def connect(
+        cls,
+        api_key: str,
+        host: str = "127.0.0.1",
+        port: Optional[int] = None,
+        path: Optional[str] = None
+    ) -> "RPCClient":
+        if msgpack is None:
+            raise RuntimeError("The RPC client requires the 'msgpack' package")
+        if path:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        client = cls(reader, writer)
+        reply = await client.call("auth", {"api_key": api_key})
+        if "error" in reply:
+            await client.close()
+            raise RPCError(reply["error"]["status"], reply["error"]["detail"])
+        return client
+
+    async def pipeline(self, calls: List[tuple]) -> List[Dict[str, Any]]:
+        """Send several (method, params) requests at once and collect replies in order"""
+        for method, params in calls:
+            self._next_id += 1
+            self.writer.write(_pack({"id": self._next_id, "method": method, "params": params}))
+        await self.writer.drain()
+        return [await _read_frame(self.reader, MAX_FRAME_SIZE) for _ in calls]
+
+    async def call(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one request and wait for its reply frame"""
+        return (await self.pipeline([(method, params)]))[0]
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
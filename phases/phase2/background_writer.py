@@ -0,0 +1,126 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+log = logging.getLogger(__name__)
+
+class BackgroundWriter:
+    """
+    Dedicated thread that drains a bounded queue and hands items to a
+    ``flush`` callable in batches (group commit).
+
+    Producers call ``submit`` and return immediately; when the queue is full
+    the item is either dropped (``overflow='drop'``) or the producer waits for
+    room (``overflow='block'``). ``close`` writes everything still queued.
+
+    A batch whose ``flush`` raises is counted in ``errors`` and discarded.
+    The first failure of a streak is logged with its traceback, and so is the
+    recovery, so a broken disk or database shows up once in the logs
+    rather than once per batch.
+    """
+    OVERFLOW_POLICIES = ('block', 'drop')
+    _STOP = object()
+
+    def __init__(
+        self,
+        flush: Callable[[List[Any]], None],
+        max_queue_size: int = 10000,
+        overflow: str = 'block',
+        max_batch_size: int = 512,
+        name: str = 'background-writer'
+    ):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {self.OVERFLOW_POLICIES}")
+        self._flush = flush
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self.overflow = overflow
+        self.max_batch_size = max_batch_size
+        self.dropped = 0
+        self.batches_written = 0
+        self.errors = 0
+        self.failing = False
+        self.name = name
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def backlog(self) -> int:
+        """Number of items waiting to be written"""
+        return self._queue.qsize()
+
+    @property
+    def capacity(self) -> int:
+        return self._queue.maxsize
+
+    def submit(self, item: Any) -> bool:
+        """
+        Enqueue an item for writing.
+        Returns: False if the item was dropped because the queue was full
+        """
+        if self._closed:
+            raise RuntimeError("BackgroundWriter is closed")
+        if self.overflow == 'drop':
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self.dropped += 1
+                return False
+        else:
+            self._queue.put(item)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # Group commit: take whatever else is already waiting, up to the batch limit
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(entry is self._STOP for entry in batch)
+            items = [entry for entry in batch if entry is not self._STOP]
+            if items:
+                try:
+                    self._flush(items)
+                    self.batches_written += 1
+                    if self.failing:
+                        self.failing = False
+                        log.warning("%s: writes succeed again after %d failed batches", self.name, self.errors)
+                except Exception:
+                    self.errors += 1
+                    if not self.failing:
+                        self.failing = True
+                        log.exception("%s: failed to write a batch of %d items", self.name, len(items))
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every item submitted so far has been written.
+        Returns: False if the timeout expired first
+        """
+        if timeout is None:
+            self._queue.join()
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Write remaining items and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
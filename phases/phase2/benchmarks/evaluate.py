@@ -0,0 +1,238 @@
+"""
+Compare analysis engines on a labelled corpus.
+
+The corpus is JSONL, one conversation per line in the /analyze request shape,
+with gold labels on the utterances that have them:
+
+    {"conversation_id": "c1", "transcript": [
+        {"speaker": "Customer", "text": "My card was blocked", "intent": "card_problem",
+         "sentiment": "negative", "keywords": {"actions": ["blocked"], "products": ["card"]}}]}
+
+Every engine configuration of each task runs over the whole corpus. For every
+configuration, the command reports per-label precision and recall (per keyword
+category for keywords), throughput, per-conversation latency percentiles and
+peak traced memory. Latency is timed without tracing. Memory comes from a
+separate traced pass.
+
+    python -m phases.phase2.benchmarks.evaluate corpus.jsonl --output evaluation.json
+    python -m phases.phase2.benchmarks.evaluate corpus.jsonl --tasks sentiment \\
+        --engine sentiment:vader=mypackage.engines:VaderSentiment
+"""
+import argparse
+import importlib
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from phases.phase2.allocations import AllocationProfiler
+from phases.phase2.intent_classifier import IntentClassifier
+from phases.phase2.keyword_extractor import KeywordExtractor
+from phases.phase2.sentiment_analyzer import SentimentAnalyzer
+
+def _sentiment(threshold: float) -> Callable[[], SentimentAnalyzer]:
+    def build() -> SentimentAnalyzer:
+        analyzer = SentimentAnalyzer()
+        analyzer.sentiment_thresholds = {"positive": threshold, "negative": -threshold}
+        return analyzer
+    return build
+
+# Engine configurations per task: name -> factory of an object with analyze_transcript(utterances)
+ENGINES: Dict[str, Dict[str, Callable[[], Any]]] = {
+    "intent": {"regex": IntentClassifier},
+    "sentiment": {
+        "textblob": SentimentAnalyzer,
+        "textblob-0.05": _sentiment(0.05),
+        "textblob-0.2": _sentiment(0.2),
+    },
+    "keywords": {"rules": KeywordExtractor},
+}
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def load_engine(spec: str):
+    """Parse 'task:name=module:attribute' into (task, name, factory)"""
+    target, _, factory = spec.partition("=")
+    task, _, name = target.partition(":")
+    module, _, attribute = factory.partition(":")
+    if task not in ENGINES or not name or not module or not attribute:
+        raise ValueError(f"Engine must be 'task:name=module:attribute' with task in {sorted(ENGINES)}: {spec}")
+    return task, name, getattr(importlib.import_module(module), attribute)
+
+def _ratio(numerator: int, denominator: int) -> float:
+    return numerator / denominator if denominator else 0.0
+
+def _scores(tp: int, fp: int, fn: int) -> Dict[str, float]:
+    precision, recall = _ratio(tp, tp + fp), _ratio(tp, tp + fn)
+    f1 = _ratio(2 * precision * recall, precision + recall) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+def classification_report(gold: List[str], predicted: List[str]) -> Dict[str, Any]:
+    """Per-label precision/recall/F1 and support for single-label predictions, with accuracy and macro F1"""
+    labels = {}
+    for label in sorted(set(gold) | set(predicted)):
+        tp = sum(1 for g, p in zip(gold, predicted) if g == label and p == label)
+        fp = sum(1 for g, p in zip(gold, predicted) if g != label and p == label)
+        fn = sum(1 for g, p in zip(gold, predicted) if g == label and p != label)
+        labels[label] = {**_scores(tp, fp, fn), "support": tp + fn}
+    supported = [scores["f1"] for scores in labels.values() if scores["support"]]
+    return {
+        "labels": labels,
+        "accuracy": _ratio(sum(1 for g, p in zip(gold, predicted) if g == p), len(gold)),
+        "macro_f1": float(np.mean(supported)) if supported else 0.0,
+        "examples": len(gold)
+    }
+
+def keyword_report(gold: List[Dict[str, List[str]]], predicted: List[Dict[str, List[str]]]) -> Dict[str, Any]:
+    """
+    Per-category precision/recall/F1 of extracted terms (compared
+    case-insensitively); only categories present in a gold label are scored
+    for that utterance.
+    """
+    counts: Dict[str, List[int]] = {}
+    for gold_keywords, predicted_keywords in zip(gold, predicted):
+        for category, terms in gold_keywords.items():
+            expected = {term.lower().strip() for term in terms}
+            found = {term.lower().strip() for term in predicted_keywords.get(category, [])}
+            tp_fp_fn = counts.setdefault(category, [0, 0, 0])
+            tp_fp_fn[0] += len(expected & found)
+            tp_fp_fn[1] += len(found - expected)
+            tp_fp_fn[2] += len(expected - found)
+    labels = {
+        category: {**_scores(tp, fp, fn), "support": tp + fn}
+        for category, (tp, fp, fn) in sorted(counts.items())
+    }
+    micro = _scores(*(sum(column) for column in zip(*counts.values()))) if counts else _scores(0, 0, 0)
+    supported = [scores["f1"] for scores in labels.values() if scores["support"]]
+    return {
+        "labels": labels,
+        "micro_f1": micro["f1"],
+        "macro_f1": float(np.mean(supported)) if supported else 0.0,
+        "examples": len(gold)
+    }
+
+def _accuracy_report(task: str, corpus: List[Dict[str, Any]], outputs: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    gold, predicted = [], []
+    for conversation, analyzed in zip(corpus, outputs):
+        for utterance, result in zip(conversation["transcript"], analyzed):
+            if task in utterance:
+                gold.append(utterance[task])
+                predicted.append(result.get(task))
+    if task == "keywords":
+        return keyword_report(gold, [keywords or {} for keywords in predicted])
+    return classification_report(gold, [str(label) for label in predicted])
+
+def evaluate_engine(task: str, factory: Callable[[], Any], corpus: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Accuracy, throughput, latency percentiles and peak memory of one engine configuration on the corpus"""
+    engine = factory()
+    transcripts = [[{"speaker": u["speaker"], "text": u["text"]} for u in c["transcript"]] for c in corpus]
+    engine.analyze_transcript(transcripts[0])
+
+    outputs, latencies = [], []
+    started = time.perf_counter()
+    for transcript in transcripts:
+        call_started = time.perf_counter()
+        outputs.append(engine.analyze_transcript(transcript))
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+
+    profiler = AllocationProfiler()
+    profiler.start()
+    try:
+        for transcript in transcripts:
+            with profiler.stage(task):
+                engine.analyze_transcript(transcript)
+    finally:
+        memory = profiler.stop(top_n=0)["stages"].get(task, {})
+
+    values = np.array(latencies) * 1000
+    utterances = sum(len(transcript) for transcript in transcripts)
+    return {
+        "accuracy": _accuracy_report(task, corpus, outputs),
+        "performance": {
+            "conversations": len(transcripts),
+            "utterances": utterances,
+            "utterances_per_s": utterances / elapsed if elapsed > 0 else 0.0,
+            "latency_ms": {
+                "p50": float(np.percentile(values, 50)),
+                "p95": float(np.percentile(values, 95)),
+                "p99": float(np.percentile(values, 99))
+            },
+            "peak_memory_bytes": memory.get("peak_bytes_max", 0)
+        }
+    }
+
+def run(
+    corpus: List[Dict[str, Any]],
+    tasks: Optional[List[str]] = None,
+    engines: Optional[Dict[str, Dict[str, Callable[[], Any]]]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Evaluate every engine configuration of the selected tasks: {task: {engine: report}}"""
+    engines = engines or ENGINES
+    return {
+        task: {name: evaluate_engine(task, factory, corpus) for name, factory in engines[task].items()}
+        for task in tasks or list(engines)
+    }
+
+def _format_table(results: Dict[str, Dict[str, Any]]) -> str:
+    lines = [
+        f"{'task':<10}{'engine':<16}{'label':<20}{'prec':>7}{'recall':>7}{'f1':>7}{'support':>9}"
+        f"{'utt/s':>11}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'peak KB':>10}"
+    ]
+    for task, engines in results.items():
+        for name, report in engines.items():
+            accuracy, performance = report["accuracy"], report["performance"]
+            latency = performance["latency_ms"]
+            summary = "accuracy" if "accuracy" in accuracy else "micro f1"
+            lines.append(
+                f"{task:<10}{name:<16}{summary:<20}{accuracy.get('accuracy', accuracy.get('micro_f1')):>21.3f}"
+                f"{accuracy['examples']:>9}{performance['utterances_per_s']:>11,.0f}{latency['p50']:>9.3f}"
+                f"{latency['p95']:>9.3f}{latency['p99']:>9.3f}{performance['peak_memory_bytes'] / 1024:>10,.1f}"
+            )
+            for label, scores in accuracy["labels"].items():
+                lines.append(
+                    f"{'':<26}{label:<20}{scores['precision']:>7.3f}{scores['recall']:>7.3f}{scores['f1']:>7.3f}"
+                    f"{scores['support']:>9}"
+                )
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Evaluate the engine configurations on a labelled corpus and print/save the comparison"""
+    parser = argparse.ArgumentParser(description="Compare CallChemy analysis engines on a labelled corpus")
+    parser.add_argument("corpus", help="Labelled JSONL corpus, one conversation per line")
+    parser.add_argument("--tasks", help="Comma-separated tasks to evaluate: " + ", ".join(ENGINES))
+    parser.add_argument(
+        "--engine", action="append", default=[],
+        help="Extra engine configuration 'task:name=module:attribute' (a class or factory); repeatable"
+    )
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    tasks = args.tasks.split(",") if args.tasks else None
+    unknown = set(tasks or ()) - set(ENGINES)
+    if unknown:
+        parser.error(f"Unknown tasks: {', '.join(sorted(unknown))}")
+    engines = {task: dict(configurations) for task, configurations in ENGINES.items()}
+    for spec in args.engine:
+        try:
+            task, name, factory = load_engine(spec)
+        except (ValueError, ImportError, AttributeError) as e:
+            parser.error(str(e))
+        engines[task][name] = factory
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        parser.error("The corpus is empty")
+
+    results = run(corpus, tasks, engines)
+    print(_format_table(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"corpus": args.corpus, "results": results}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
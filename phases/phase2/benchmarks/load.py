@@ -0,0 +1,307 @@
+"""
+Load generator for the /analyze endpoint.
+
+Drives the FastAPI app in process over ASGI (the default) or a running server
+(--url), with a fixed number of concurrent clients (closed loop) or at a fixed
+Poisson arrival rate (--rate, open loop; latency then counts from each
+request's scheduled arrival, so queueing is not hidden). Requests are drawn
+from a weighted mix of synthetic transcript sizes. Reports latency
+percentiles, error rate and throughput; --sweep repeats the run at increasing
+concurrency to find where throughput stops growing.
+
+    python -m phases.phase2.benchmarks.load --concurrency 8 --duration 30 --mix 10:5,100:3,1000:1
+    python -m phases.phase2.benchmarks.load --url http://localhost:8000 --api-key ... --sweep 1,2,4,8,16,32
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from phases.phase2.benchmarks.transcripts import TranscriptGenerator
+
+Target = Callable[[Dict[str, Any]], Awaitable[int]]
+
+def parse_mix(value: str) -> List[Tuple[int, float]]:
+    """Parse 'size:weight' pairs, e.g. '10:5,100:3,1000:1'; a bare size has weight 1"""
+    mix = []
+    for part in filter(None, (part.strip() for part in value.split(","))):
+        size, _, weight = part.partition(":")
+        mix.append((int(size), float(weight) if weight else 1.0))
+    return mix
+
+def build_pool(mix: List[Tuple[int, float]], count: int = 200, seed: int = 0) -> List[Dict[str, Any]]:
+    """Conversations whose sizes follow the mix's weights, in a seeded random order"""
+    generator = TranscriptGenerator(seed)
+    rng = random.Random(seed)
+    sizes = rng.choices([size for size, _ in mix], weights=[weight for _, weight in mix], k=count)
+    return [generator.conversation(size) for size in sizes]
+
+@contextmanager
+def isolated_app(workdir: Optional[str] = None) -> Iterator[Any]:
+    """
+    The API module with fresh, empty stores, restored when the block exits.
+
+    The request log, results store, rollups, search and vector indexes and
+    near-duplicate history are replaced by new ones configured like the
+    app's, with anything they write kept in a temporary directory (under
+    ``workdir`` if given). Every run then starts from the same state and
+    never touches the app's own files.
+    """
+    if "phases.phase2.api.main" not in sys.modules:
+        # Importing the app opens its own request log; keep it out of ./logs
+        os.environ.setdefault("CALLCHEMY_LOG_DIR", tempfile.mkdtemp(prefix="callchemy-import-"))
+    from phases.phase2.api import main
+    from phases.phase2.logger import CallChemyLogger
+    from phases.phase2.near_duplicates import NearDuplicateDetector
+    from phases.phase2.results_store import ResultsStore
+    from phases.phase2.rollups import RollupStore
+    from phases.phase2.search_index import KeywordSearchIndex
+    from phases.phase2.vector_index import IVFIndex
+
+    names = ("logger", "results_store", "rollup_store", "search_index", "vector_index", "near_duplicates")
+    saved = {name: getattr(main, name) for name in names}
+    with tempfile.TemporaryDirectory(prefix="callchemy-app-", dir=workdir) as app_dir:
+        main.logger = CallChemyLogger(log_dir=os.path.join(app_dir, "logs"), background=True, index=False)
+        main.results_store = ResultsStore(os.path.join(app_dir, "results.sqlite")) if main.RESULTS_DB else None
+        main.rollup_store = RollupStore(
+            os.path.join(app_dir, "rollups.sqlite") if main.ROLLUPS_DB else None,
+            memory_days=main.ROLLUPS_MEMORY_DAYS
+        )
+        main.search_index = KeywordSearchIndex()
+        if saved["vector_index"] is not None:
+            main.vector_index = IVFIndex(
+                main.embedder.dim, n_lists=saved["vector_index"].n_lists, n_probe=saved["vector_index"].n_probe
+            )
+        if saved["near_duplicates"] is not None:
+            main.near_duplicates = NearDuplicateDetector(
+                threshold=saved["near_duplicates"].threshold, max_entries=saved["near_duplicates"].max_entries
+            )
+        try:
+            yield main
+        finally:
+            main.logger.close()
+            if main.results_store is not None:
+                main.results_store.close()
+            main.rollup_store.close()
+            for name, value in saved.items():
+                setattr(main, name, value)
+
+@asynccontextmanager
+async def asgi_target() -> AsyncIterator[Target]:
+    """POST to the app in this process through httpx's ASGI transport, with fresh stores (see ``isolated_app``)"""
+    with isolated_app() as main:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://callchemy") as client:
+            async def target(conversation: Dict[str, Any]) -> int:
+                response = await client.post("/analyze", params={"api_key": main.API_KEY}, json=conversation)
+                return response.status_code
+            yield target
+
+@asynccontextmanager
+async def http_target(url: str, api_key: str, concurrency: int) -> AsyncIterator[Target]:
+    """POST to a running server, with one pooled connection per concurrent client"""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url.rstrip("/"), limits=limits, timeout=60) as client:
+        async def target(conversation: Dict[str, Any]) -> int:
+            response = await client.post("/analyze", params={"api_key": api_key}, json=conversation)
+            return response.status_code
+        yield target
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float) -> Dict[str, Any]:
+    requests = sum(statuses.values())
+    errors = sum(count for status, count in statuses.items() if status != 200)
+    report = {
+        "requests": requests,
+        "errors": errors,
+        "error_rate": errors / requests if requests else 0.0,
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=lambda item: str(item[0]))},
+        "elapsed_seconds": elapsed,
+        "throughput_rps": requests / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": {}
+    }
+    if latencies:
+        values = np.array(latencies) * 1000
+        report["latency_ms"] = {
+            "p50": float(np.percentile(values, 50)),
+            "p95": float(np.percentile(values, 95)),
+            "p99": float(np.percentile(values, 99)),
+            "p99.9": float(np.percentile(values, 99.9)),
+            "max": float(values.max())
+        }
+    return report
+
+async def run_load(
+    target: Target,
+    pool: List[Dict[str, Any]],
+    concurrency: int,
+    duration: Optional[float] = None,
+    requests: Optional[int] = None,
+    rate: Optional[float] = None,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Send requests for ``duration`` seconds or until ``requests`` were sent, whichever comes first.
+
+    Without ``rate``, ``concurrency`` clients each send their next request as
+    soon as the previous one returns. With ``rate``, requests arrive as a
+    Poisson process at that mean rate and at most ``concurrency`` are in
+    flight; a request waiting for a slot is still timed from its arrival.
+    """
+    if duration is None and requests is None:
+        raise ValueError("Give a duration, a request count or both")
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    sent = 0
+    started = time.perf_counter()
+    deadline = started + duration if duration is not None else float("inf")
+
+    def next_conversation() -> Optional[Dict[str, Any]]:
+        nonlocal sent
+        if (requests is not None and sent >= requests) or time.perf_counter() >= deadline:
+            return None
+        conversation = pool[sent % len(pool)]
+        sent += 1
+        # A fresh id per request, so repeated transcripts are stored and indexed like new calls
+        return {**conversation, "conversation_id": f"load-{sent}"}
+
+    async def send(conversation: Dict[str, Any], arrival: float) -> None:
+        try:
+            status = await target(conversation)
+        except Exception as e:
+            status = type(e).__name__
+        latencies.append(time.perf_counter() - arrival)
+        statuses[status] += 1
+
+    if rate is None:
+        async def client() -> None:
+            while (conversation := next_conversation()) is not None:
+                await send(conversation, time.perf_counter())
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+    else:
+        rng = random.Random(seed)
+        slots = asyncio.Semaphore(concurrency)
+        in_flight = set()
+
+        async def arrive(conversation: Dict[str, Any], arrival: float) -> None:
+            async with slots:
+                await send(conversation, arrival)
+
+        arrival = started
+        while (conversation := next_conversation()) is not None:
+            task = asyncio.create_task(arrive(conversation, arrival))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            arrival += rng.expovariate(rate)
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        if in_flight:
+            await asyncio.gather(*in_flight)
+
+    report = summarize(latencies, statuses, time.perf_counter() - started)
+    report.update({"concurrency": concurrency, "rate": rate})
+    return report
+
+def find_saturation(levels: List[Dict[str, Any]], min_gain: float = 0.05, cores: int = 1) -> Dict[str, Any]:
+    """
+    The concurrency after which throughput stops growing by at least ``min_gain``.
+
+    Returns the saturating level's concurrency, throughput (total and per
+    core) and p99 latency.
+    """
+    best = levels[0]
+    for level in levels[1:]:
+        if level["throughput_rps"] < best["throughput_rps"] * (1 + min_gain):
+            break
+        best = level
+    return {
+        "concurrency": best["concurrency"],
+        "throughput_rps": best["throughput_rps"],
+        "throughput_rps_per_core": best["throughput_rps"] / cores,
+        "p99_ms": best["latency_ms"].get("p99"),
+        "cores": cores
+    }
+
+def _format_level(report: Dict[str, Any]) -> str:
+    latency = report["latency_ms"] or {key: float("nan") for key in ("p50", "p95", "p99", "p99.9")}
+    return (
+        f"{report['concurrency']:>11}{report['requests']:>10}{report['error_rate'] * 100:>8.2f}%"
+        f"{report['throughput_rps']:>10.1f}{latency['p50']:>10.1f}{latency['p95']:>10.1f}"
+        f"{latency['p99']:>10.1f}{latency['p99.9']:>10.1f}"
+    )
+
+async def _run(args: argparse.Namespace, pool: List[Dict[str, Any]]) -> Dict[str, Any]:
+    levels = [int(level) for level in args.sweep.split(",")] if args.sweep else [args.concurrency]
+
+    async def one(concurrency: int) -> Dict[str, Any]:
+        if args.url:
+            targets = http_target(args.url, args.api_key, concurrency)
+        else:
+            targets = asgi_target()
+        async with targets as target:
+            if args.warmup:
+                await run_load(target, pool, concurrency, duration=args.warmup)
+            return await run_load(
+                target, pool, concurrency, duration=args.duration, requests=args.requests, rate=args.rate,
+                seed=args.seed
+            )
+
+    results = []
+    print(f"{'concurrency':>11}{'requests':>10}{'errors':>9}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'p99.9 ms':>10}")
+    for concurrency in levels:
+        results.append(await one(concurrency))
+        print(_format_level(results[-1]), flush=True)
+
+    report: Dict[str, Any] = {"target": args.url or "in-process", "mix": args.mix, "levels": results}
+    if args.sweep:
+        cores = args.cores or (1 if not args.url else os.cpu_count())
+        report["saturation"] = find_saturation(results, cores=cores)
+    return report
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run a load test, or a concurrency sweep, and print/save the report"""
+    parser = argparse.ArgumentParser(description="Load-test the CallChemy /analyze endpoint")
+    parser.add_argument("--url", help="Base URL of a running server; default drives the app in process over ASGI")
+    parser.add_argument("--api-key", default="callchemy-test-key", help="API key for --url")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients (maximum in flight with --rate)")
+    parser.add_argument("--rate", type=float, help="Open-loop mean arrival rate in requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument("--requests", type=int, help="Stop each run after this many requests")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Unmeasured seconds before each run")
+    parser.add_argument("--mix", default="10:5,100:3,1000:1", help="Transcript sizes and weights, 'size:weight,...'")
+    parser.add_argument("--pool", type=int, default=200, help="Distinct transcripts to cycle through")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for transcripts and arrivals")
+    parser.add_argument("--sweep", help="Comma-separated concurrency levels to find the saturation point")
+    parser.add_argument(
+        "--cores", type=int, help="Server cores for per-core throughput (default 1 in process, all local cores with --url)"
+    )
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    pool = build_pool(parse_mix(args.mix), args.pool, args.seed)
+    report = asyncio.run(_run(args, pool))
+    if "saturation" in report:
+        saturation = report["saturation"]
+        print(
+            f"Saturation at concurrency {saturation['concurrency']}: {saturation['throughput_rps']:.1f} req/s "
+            f"({saturation['throughput_rps_per_core']:.1f} per core over {saturation['cores']}), "
+            f"p99 {saturation['p99_ms']:.1f} ms"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Per-stage memory profile of /analyze for a transcript mix.
+
+Sends the mix's transcripts one at a time to the app in process while
+tracemalloc traces allocations, then reports peak and retained memory per
+pipeline stage and the allocation sites that grew the most. Requests are not
+overlapped, so every stage's figures are its own. With --summarize, each
+transcript is also summarized with the given provider so its calls are
+accounted as a ``provider:<name>`` stage.
+
+    python -m phases.phase2.benchmarks.memory --mix 10:5,100:3,1000:1 --requests 200
+    python -m phases.phase2.benchmarks.memory --mix 1000 --requests 20 --summarize fallback --output memory.json
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+from phases.phase2.allocations import allocation_profiler
+from phases.phase2.benchmarks.load import asgi_target, build_pool, parse_mix, run_load
+
+def _summarizer(provider: str):
+    from phases.phase2.summarizer.providers import ClaudeLLMProvider, FallbackLLMProvider
+    from phases.phase2.summarizer.summarizer import ConversationSummarizer
+
+    providers = {"claude": ClaudeLLMProvider, "fallback": FallbackLLMProvider}
+    return ConversationSummarizer(providers[provider]())
+
+async def profile_mix(
+    pool: List[Dict[str, Any]],
+    requests: int,
+    warmup: int = 5,
+    top_n: int = 20,
+    summarize: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Memory report for ``requests`` sequential /analyze calls cycling through ``pool``.
+
+    ``warmup`` unprofiled requests go first, so lazily built state (caches,
+    compiled patterns, the request log's files) does not show up as retained.
+    """
+    summarizer = _summarizer(summarize) if summarize else None
+    async with asgi_target() as target:
+        if warmup:
+            await run_load(target, pool, 1, requests=warmup)
+        allocation_profiler.start()
+        try:
+            load = await run_load(target, pool, 1, requests=requests)
+            if summarizer is not None:
+                from phases.phase2.summarizer.summarizer import SummaryRequest
+
+                for conversation in pool[:requests]:
+                    await summarizer.summarize(SummaryRequest(
+                        conversation_id=conversation["conversation_id"],
+                        utterances=[
+                            {"speaker": u["speaker"], "text": u["text"]} for u in conversation["transcript"]
+                        ]
+                    ))
+        finally:
+            report = allocation_profiler.stop(top_n)
+    report.update({"requests": load["requests"], "errors": load["errors"]})
+    return report
+
+def _format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'stage':<28}{'calls':>8}{'peak max':>14}{'peak mean':>14}{'retained':>14}"]
+    for name, stats in report["stages"].items():
+        lines.append(
+            f"{name:<28}{stats['calls']:>8}{stats['peak_bytes_max'] / 1024:>12,.1f}KB"
+            f"{stats['peak_bytes_mean'] / 1024:>12,.1f}KB{stats['retained_bytes_total'] / 1024:>12,.1f}KB"
+        )
+    lines.append("")
+    lines.append(f"{'growth':>12}{'blocks':>10}  allocation site")
+    for site in report["top_sites"]:
+        lines.append(f"{site['size_diff_bytes'] / 1024:>10,.1f}KB{site['count_diff']:>10}  {site['site']}")
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Profile memory per stage for a transcript mix and print/save the report"""
+    parser = argparse.ArgumentParser(description="Profile CallChemy memory use per pipeline stage")
+    parser.add_argument("--mix", default="10:5,100:3,1000:1", help="Transcript sizes and weights, 'size:weight,...'")
+    parser.add_argument("--requests", type=int, default=100, help="Profiled requests")
+    parser.add_argument("--warmup", type=int, default=5, help="Unprofiled requests before tracing starts")
+    parser.add_argument("--pool", type=int, default=200, help="Distinct transcripts to cycle through")
+    parser.add_argument("--seed", type=int, default=0, help="Transcript generator seed")
+    parser.add_argument("--top", type=int, default=20, help="Allocation sites to list")
+    parser.add_argument(
+        "--summarize", choices=("claude", "fallback"), help="Also summarize each transcript with this provider"
+    )
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    pool = build_pool(parse_mix(args.mix), args.pool, args.seed)
+    report = asyncio.run(profile_mix(pool, args.requests, args.warmup, args.top, args.summarize))
+    report["mix"] = args.mix
+    print(_format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
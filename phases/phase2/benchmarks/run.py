@@ -0,0 +1,253 @@
+"""
+Micro-benchmarks for the analysis stages and end-to-end /analyze.
+
+Each benchmark times one operation on a synthetic banking transcript of a
+given size, repeating it until a round takes at least --min-time seconds and
+reporting per-operation statistics over --rounds rounds. Results are written
+as JSON; with --baseline they are compared against an earlier results file
+and the run fails if any median got slower than its regression threshold.
+
+    python -m phases.phase2.benchmarks.run --sizes 10,100,1000 --output bench.json
+    python -m phases.phase2.benchmarks.run --baseline bench.json --output current.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from phases.phase2.benchmarks.transcripts import TranscriptGenerator
+from phases.phase2.ingestion import InputValidator
+from phases.phase2.intent_classifier import IntentClassifier
+from phases.phase2.keyword_extractor import KeywordExtractor
+from phases.phase2.logger import CallChemyLogger
+from phases.phase2.response_formatter import ResponseFormatter
+from phases.phase2.sentiment_analyzer import SentimentAnalyzer
+
+Operation = Callable[[], Any]
+
+class Benchmark(NamedTuple):
+    """
+    A named benchmark: ``setup(conversation, workdir, stack)`` returns the
+    operation to time; whatever it registers on ``stack`` is undone once the
+    operation has been measured.
+    """
+    name: str
+    setup: Callable[[Dict[str, Any], str, ExitStack], Operation]
+    threshold: float  # Allowed slowdown of the median before it counts as a regression
+
+def _analyzed(conversation: Dict[str, Any]) -> List[Dict[str, Any]]:
+    utterances = IntentClassifier().analyze_transcript(conversation["transcript"])
+    utterances = SentimentAnalyzer().analyze_transcript(utterances)
+    return KeywordExtractor().analyze_transcript(utterances)
+
+def _validation(conversation, workdir, stack):
+    validator = InputValidator()
+    return lambda: validator.validate(conversation)
+
+def _intent(conversation, workdir, stack):
+    classifier = IntentClassifier()
+    return lambda: classifier.analyze_transcript(conversation["transcript"])
+
+def _sentiment(conversation, workdir, stack):
+    analyzer = SentimentAnalyzer()
+    return lambda: analyzer.analyze_transcript(conversation["transcript"])
+
+def _keywords(conversation, workdir, stack):
+    extractor = KeywordExtractor()
+    return lambda: extractor.analyze_transcript(conversation["transcript"])
+
+def _formatting(conversation, workdir, stack):
+    formatter = ResponseFormatter()
+    utterances = _analyzed(conversation)
+    return lambda: formatter.format_response(conversation["conversation_id"], utterances)
+
+def _logging(conversation, workdir, stack):
+    logger = CallChemyLogger(log_dir=workdir, index=False)
+    stack.callback(logger.close)
+    response = ResponseFormatter().format_response(conversation["conversation_id"], _analyzed(conversation))
+    return lambda: logger.log_request(conversation["conversation_id"], conversation, response)
+
+def _analyze_endpoint(conversation, workdir, stack):
+    from fastapi.testclient import TestClient
+    from phases.phase2.benchmarks.load import isolated_app
+
+    # Fresh stores for every size, so results do not depend on what earlier runs indexed
+    main = stack.enter_context(isolated_app(workdir))
+    # Not entered as a context manager: that would run the app's lifespan (startup tasks, saving on shutdown)
+    client = TestClient(main.app)
+    stack.callback(client.close)
+
+    def post():
+        response = client.post(f"/analyze?api_key={main.API_KEY}", json=conversation)
+        response.raise_for_status()
+    return post
+
+BENCHMARKS = [
+    Benchmark("validation", _validation, 0.15),
+    Benchmark("intent", _intent, 0.15),
+    Benchmark("sentiment", _sentiment, 0.15),
+    Benchmark("keywords", _keywords, 0.15),
+    Benchmark("formatting", _formatting, 0.15),
+    Benchmark("logging", _logging, 0.25),
+    Benchmark("analyze_endpoint", _analyze_endpoint, 0.25),
+]
+
+def measure(operation: Operation, rounds: int = 7, min_time: float = 0.05) -> Dict[str, float]:
+    """Per-operation timing statistics over ``rounds`` rounds of at least ``min_time`` seconds each"""
+    operation()
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            operation()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9) * 1.2))
+
+    samples = [elapsed / loops]
+    for _ in range(rounds - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            operation()
+        samples.append((time.perf_counter() - started) / loops)
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "max_s": max(samples),
+        "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "rounds": len(samples),
+        "loops": loops
+    }
+
+def run(
+    sizes: List[int],
+    names: Optional[List[str]] = None,
+    seed: int = 0,
+    rounds: int = 7,
+    min_time: float = 0.05
+) -> Dict[str, Any]:
+    """Run the selected benchmarks at every transcript size"""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="callchemy-bench-") as workdir:
+        for benchmark in BENCHMARKS:
+            if names and benchmark.name not in names:
+                continue
+            for size in sizes:
+                conversation = TranscriptGenerator(seed).conversation(size, conversation_id=f"bench-{size}")
+                with ExitStack() as stack:
+                    stats = measure(benchmark.setup(conversation, workdir, stack), rounds, min_time)
+                stats["utterances_per_s"] = size / stats["median_s"]
+                stats["threshold"] = benchmark.threshold
+                results[f"{benchmark.name}[{size}]"] = stats
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "seed": seed,
+            "sizes": sizes,
+            "rounds": rounds
+        },
+        "results": results
+    }
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Compare medians with a baseline run, for benchmarks present in both.
+
+    A benchmark regresses when its median exceeds the baseline's by more than
+    its threshold (``threshold`` overrides the per-benchmark defaults), and
+    improves when it is faster by the same margin.
+    """
+    rows = []
+    for key, stats in current["results"].items():
+        previous = baseline["results"].get(key)
+        if previous is None:
+            continue
+        limit = threshold if threshold is not None else stats["threshold"]
+        ratio = stats["median_s"] / previous["median_s"]
+        if ratio > 1 + limit:
+            verdict = "regression"
+        elif ratio < 1 - limit:
+            verdict = "improvement"
+        else:
+            verdict = "unchanged"
+        rows.append({
+            "benchmark": key,
+            "baseline_s": previous["median_s"],
+            "current_s": stats["median_s"],
+            "ratio": ratio,
+            "threshold": limit,
+            "verdict": verdict
+        })
+    return rows
+
+def _format_table(report: Dict[str, Any]) -> str:
+    comparison = {row["benchmark"]: row for row in report.get("comparison", [])}
+    lines = [f"{'benchmark':<28}{'median':>12}{'min':>12}{'utt/s':>14}{'vs baseline':>14}"]
+    for key, stats in report["results"].items():
+        row = comparison.get(key)
+        change = ""
+        if row:
+            change = f"{(row['ratio'] - 1) * 100:+.1f}%" + (" *" if row["verdict"] == "regression" else "")
+        lines.append(
+            f"{key:<28}{stats['median_s'] * 1000:>10.3f}ms{stats['min_s'] * 1000:>10.3f}ms"
+            f"{stats['utterances_per_s']:>14,.0f}{change:>14}"
+        )
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmarks and compare with a baseline; exits 1 on regressions"""
+    parser = argparse.ArgumentParser(description="Benchmark CallChemy analysis stages")
+    parser.add_argument("--sizes", default="10,100,1000", help="Comma-separated transcript sizes in utterances")
+    parser.add_argument(
+        "--only", help="Comma-separated benchmarks to run: " + ", ".join(b.name for b in BENCHMARKS)
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Transcript generator seed")
+    parser.add_argument("--rounds", type=int, default=7, help="Timed rounds per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Minimum seconds per round")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Results file of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, help="Allowed median slowdown for every benchmark, e.g. 0.1")
+    args = parser.parse_args(argv)
+
+    names = args.only.split(",") if args.only else None
+    unknown = set(names or ()) - {b.name for b in BENCHMARKS}
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    report = run(sizes, names, seed=args.seed, rounds=args.rounds, min_time=args.min_time)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["comparison"] = compare(report, baseline, args.threshold)
+        regressions = [row for row in report["comparison"] if row["verdict"] == "regression"]
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    print(_format_table(report))
+    for row in regressions:
+        print(
+            f"REGRESSION {row['benchmark']}: {row['current_s'] * 1000:.3f}ms vs {row['baseline_s'] * 1000:.3f}ms "
+            f"({(row['ratio'] - 1) * 100:+.1f}%, threshold {row['threshold'] * 100:.0f}%)",
+            file=sys.stderr
+        )
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import random
+from typing import Any, Dict, Iterator, List, Optional
+
+# Customer/agent exchanges per call reason; {amount}, {card}, {account}, {rate}, {days} and {product} are filled in
+SCENARIOS = {
+    "card_problem": [
+        ("My {product} was declined at the store even though I have money in my account.",
+         "I'm sorry about that. Let me check the status of your card ending {card}."),
+        ("I think my card is blocked, the ATM kept it after I entered the wrong PIN.",
+         "I can see the card was blocked after three incorrect PIN attempts."),
+        ("Can you issue a new debit card? The old one expired last week.",
+         "A replacement card will reach you in {days} working days."),
+    ],
+    "transaction_issue": [
+        ("I made a transfer of {amount} yesterday but it still shows pending.",
+         "The payment is being processed and should complete within {days} days."),
+        ("My payment of {amount} failed but the money was deducted from account {account}.",
+         "Failed transactions are reversed automatically, I have raised a request for {amount}."),
+        ("I want to withdraw my fixed deposit before maturity.",
+         "A premature withdrawal carries a penalty of {rate} on the interest earned."),
+    ],
+    "loan_request": [
+        ("What is the interest rate on a {product} right now?",
+         "The current rate for a {product} starts at {rate} per annum."),
+        ("Can I reduce my EMI by extending the loan tenure?",
+         "Yes, extending the tenure would bring the EMI down to about {amount}."),
+        ("My home loan application was rejected and nobody told me why.",
+         "I can see the application; it was rejected because the income documents were incomplete."),
+    ],
+    "account_inquiry": [
+        ("Can you tell me the balance in my savings account {account}?",
+         "Your available balance is {amount} as of today."),
+        ("I need a statement of all transactions for the last three months.",
+         "I have emailed the statement to your registered address."),
+        ("Why was {amount} debited from my current account as a service charge?",
+         "That is the quarterly charge for not maintaining the minimum balance."),
+    ],
+    "complaint": [
+        ("This is the third time I am calling about the same issue, this is really frustrating.",
+         "I apologize for the inconvenience, I will escalate this complaint right away."),
+        ("There is a wrong entry of {amount} on my statement and I want to dispute it.",
+         "I have raised a dispute for {amount}; you will hear back in {days} days."),
+        ("The service at your branch was terrible and the staff were rude.",
+         "I'm very sorry to hear that, I have recorded your feedback for the branch manager."),
+    ],
+    "follow_up": [
+        ("I'm calling to check the status of my request from last week.",
+         "Your request is pending approval and should be updated within {days} days."),
+        ("When will the refund of {amount} be credited?",
+         "The refund was processed today and will reflect in {days} working days."),
+    ],
+}
+
+OPENINGS = [
+    ("Hello, I need some help with my account.", "Good morning, thank you for calling. How can I help you today?"),
+    ("Hi, I have a problem.", "Hello, I'm here to help. Could you describe the issue?"),
+]
+
+CLOSINGS = [
+    ("Okay, thank you for your help.", "You're welcome. Is there anything else I can help you with?"),
+    ("No, that's all. Thanks.", "Thank you for calling, have a great day."),
+]
+
+PRODUCTS = ["credit card", "debit card", "personal loan", "home loan", "car loan", "atm card"]
+
+class TranscriptGenerator:
+    """
+    Seeded generator of synthetic banking call transcripts.
+
+    Each conversation opens with a greeting, alternates customer and agent
+    turns drawn from one or two call reasons (amounts, card and account
+    numbers, rates and durations vary per turn) and closes politely. The
+    same seed always yields the same transcripts, so benchmark runs are
+    comparable.
+    """
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self._random = random.Random(seed)
+
+    def _fill(self, template: str) -> str:
+        rng = self._random
+        return template.format(
+            amount=f"Rs. {rng.choice([500, 1200, 2500, 5000, 15000, 48000]):,}",
+            card=rng.randint(1000, 9999),
+            account=rng.randint(10000000, 99999999),
+            rate=f"{rng.choice([7.5, 8.25, 9.1, 10.5, 12.0])}%",
+            days=rng.choice([2, 3, 5, 7]),
+            product=rng.choice(PRODUCTS)
+        )
+
+    def conversation(
+        self,
+        n_utterances: int,
+        conversation_id: Optional[str] = None,
+        timed: bool = True
+    ) -> Dict[str, Any]:
+        """One conversation request with ``n_utterances`` utterances (optionally with start/end times)"""
+        rng = self._random
+        reasons = rng.sample(sorted(SCENARIOS), 2)
+        body = max(0, (n_utterances + 1) // 2 - 2)
+        pairs = [rng.choice(OPENINGS)]
+        pairs += [rng.choice(SCENARIOS[reasons[0] if rng.random() < 0.7 else reasons[1]]) for _ in range(body)]
+        pairs.append(rng.choice(CLOSINGS))
+
+        transcript: List[Dict[str, Any]] = []
+        clock = 0.0
+        for customer, agent in pairs:
+            for speaker, text in (("Customer", customer), ("Agent", agent)):
+                if len(transcript) == n_utterances:
+                    break
+                utterance: Dict[str, Any] = {"speaker": speaker, "text": self._fill(text)}
+                if timed:
+                    duration = round(len(utterance["text"]) / 15 + rng.uniform(0.5, 2.0), 2)
+                    start = round(clock + rng.uniform(0.2, 1.5), 2)
+                    utterance["start"], utterance["end"] = start, round(start + duration, 2)
+                    clock = utterance["end"]
+                transcript.append(utterance)
+        return {
+            "conversation_id": conversation_id or f"bench-{self.seed}-{rng.getrandbits(32):08x}",
+            "transcript": transcript
+        }
+
+    def conversations(self, count: int, n_utterances: int, timed: bool = True) -> Iterator[Dict[str, Any]]:
+        for _ in range(count):
+            yield self.conversation(n_utterances, timed=timed)
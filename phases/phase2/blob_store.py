@@ -0,0 +1,95 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+class BlobStore:
+    """
+    Content-addressed store for logged payload bodies.
+
+    Each blob is stored once, gzip-compressed, under ``<directory>/<hash[:2]>/<hash>.json.gz``
+    where ``hash`` is the SHA-256 of its canonical JSON encoding. Storing a blob
+    that already exists only refreshes its modification time, which retention
+    uses to decide when no recent log entry references it any more.
+    """
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def encode(value: Any) -> bytes:
+        """Canonical JSON encoding, so equal values hash equally"""
+        return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+    def path_for(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.json.gz"
+
+    def put(self, value: Any) -> str:
+        """Store a JSON-serializable value if it is new; returns its hash"""
+        data = self.encode(value)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        with self._lock:
+            try:
+                os.utime(path)
+                return digest
+            except FileNotFoundError:
+                pass
+            path.parent.mkdir(exist_ok=True)
+            # Per-process temp name: several workers may store the same blob at once
+            temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(temp, 'wb') as f:
+                f.write(gzip.compress(data, mtime=0))
+            temp.replace(path)
+        return digest
+
+    def get(self, digest: str) -> Any:
+        """Load a stored value; raises KeyError for unknown hashes"""
+        try:
+            with open(self.path_for(digest), 'rb') as f:
+                return json.loads(gzip.decompress(f.read()))
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+
+    def __contains__(self, digest: str) -> bool:
+        return self.path_for(digest).exists()
+
+    def delete_older_than(self, cutoff: datetime) -> int:
+        """Remove blobs not stored or referenced since ``cutoff``; returns the number removed"""
+        removed = 0
+        threshold = cutoff.timestamp()
+        with self._lock:
+            for path in self.directory.glob('*/*.json.gz'):
+                try:
+                    if path.stat().st_mtime < threshold:
+                        path.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+        return removed
+
+def expand_entry(entry: Dict[str, Any], store: BlobStore) -> Dict[str, Any]:
+    """Restore the payloads of a request-log entry written in dedup mode from ``store``"""
+    request = entry.get("request")
+    reference = request.get("transcript") if isinstance(request, dict) else None
+    if not (isinstance(reference, dict) and "$blob" in reference):
+        return entry
+    try:
+        transcript = store.get(reference["$blob"])
+    except KeyError:
+        # Blob already removed by retention; return the entry as logged
+        return entry
+    entry = {**entry, "request": {**request, "transcript": transcript}}
+    if entry.pop("response_texts_elided", False):
+        response = entry["response"]
+        analysis = response["analysis"]
+        utterances = [
+            {"text": t["text"], **u} for u, t in zip(analysis["utterances"], transcript)
+        ]
+        entry["response"] = {**response, "analysis": {**analysis, "utterances": utterances}}
+    return entry
@@ -0,0 +1,96 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from phases.phase2.columnar import ColumnarTranscript
+
+class CallDynamicsAnalyzer:
+    """
+    Call-level QA metrics computed from utterance start/end times.
+
+    All metrics are vectorized over the whole call, so their cost grows with
+    NumPy array operations rather than a Python loop per turn. Times are in
+    seconds; utterances are ordered by start time before measuring.
+    """
+    def __init__(self, dead_air_threshold: float = 3.0):
+        self.dead_air_threshold = dead_air_threshold
+
+    def compute(self, is_customer: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> Dict:
+        """
+        Compute dynamics metrics from parallel arrays.
+
+        Args:
+            is_customer: Boolean array, True for customer utterances
+            starts: Utterance start times in seconds
+            ends: Utterance end times in seconds
+
+        Returns:
+            Dict: talk time, turn, monologue, interruption and dead-air metrics
+        """
+        order = np.argsort(starts, kind='stable')
+        is_customer = np.asarray(is_customer, dtype=bool)[order]
+        starts = np.asarray(starts, dtype=np.float64)[order]
+        ends = np.asarray(ends, dtype=np.float64)[order]
+
+        durations = ends - starts
+        customer_talk = float(durations[is_customer].sum())
+        agent_talk = float(durations[~is_customer].sum())
+        total_talk = customer_talk + agent_talk
+
+        # A turn is a maximal run of consecutive utterances by the same speaker
+        speaker_change = is_customer[1:] != is_customer[:-1]
+        run_starts = np.concatenate(([0], np.flatnonzero(speaker_change) + 1))
+        run_begin = np.minimum.reduceat(starts, run_starts)
+        run_end = np.maximum.reduceat(ends, run_starts)
+        customer_runs = is_customer[run_starts]
+        monologues = (run_end - run_begin)[customer_runs]
+
+        # Speech already in progress when each utterance starts
+        speaking_until = np.maximum.accumulate(ends)[:-1]
+        overlaps = (starts[1:] < speaking_until) & speaker_change
+        gaps = starts[1:] - speaking_until
+        dead_air = gaps[gaps >= self.dead_air_threshold]
+
+        return {
+            'call_duration': round(float(ends.max() - starts.min()), 3),
+            'customer_talk_time': round(customer_talk, 3),
+            'agent_talk_time': round(agent_talk, 3),
+            'talk_time_ratio': round(customer_talk / total_talk, 3) if total_talk > 0 else 0.0,
+            'turn_count': int(run_starts.size),
+            'longest_customer_monologue': round(float(monologues.max()), 3) if monologues.size else 0.0,
+            'interruptions': {
+                'total': int(overlaps.sum()),
+                'by_customer': int((overlaps & is_customer[1:]).sum()),
+                'by_agent': int((overlaps & ~is_customer[1:]).sum())
+            },
+            'dead_air': {
+                'count': int(dead_air.size),
+                'total_seconds': round(float(dead_air.sum()), 3),
+                'longest_seconds': round(float(dead_air.max()), 3) if dead_air.size else 0.0
+            }
+        }
+
+    def analyze_transcript(self, utterances: List[Dict]) -> Optional[Dict]:
+        """
+        Compute dynamics for a list of utterance dicts.
+        Returns: None unless every utterance carries 'start' and 'end'
+        """
+        if not utterances or any(u.get('start') is None or u.get('end') is None for u in utterances):
+            return None
+        return self.compute(
+            np.fromiter((u['speaker'] == 'Customer' for u in utterances), dtype=bool, count=len(utterances)),
+            np.fromiter((u['start'] for u in utterances), dtype=np.float64, count=len(utterances)),
+            np.fromiter((u['end'] for u in utterances), dtype=np.float64, count=len(utterances))
+        )
+
+    def analyze_columns(self, columns: ColumnarTranscript, index: int = 0) -> Optional[Dict]:
+        """
+        Compute dynamics for one conversation of a columnar transcript.
+        Returns: None unless every utterance of that conversation is timestamped
+        """
+        rows = columns.conversation_slice(index)
+        starts = columns.start_times[rows]
+        ends = columns.end_times[rows]
+        if starts.size == 0 or np.isnan(starts).any() or np.isnan(ends).any():
+            return None
+        return self.compute(columns.customer_mask()[rows], starts, ends)
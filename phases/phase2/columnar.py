@@ -0,0 +1,142 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+class ColumnarTranscript:
+    """
+    Column-oriented storage for one or many analyzed conversations.
+
+    Instead of one dict per utterance, each attribute is held in a single
+    array: texts, speaker codes, intent codes, sentiment codes and optional
+    start/end times (NaN when absent), plus offset arrays that delimit
+    conversations and each utterance's keywords.
+    Repeated strings (speakers, labels, keyword terms) are stored once in a
+    vocabulary and referenced by small integer codes.
+
+    Analysis stages read and write the columns directly through their
+    ``analyze_columns`` methods; ``to_records`` rebuilds the per-utterance
+    dict shape used by the API only when a response is produced.
+    """
+    SPEAKERS = ('Customer', 'Agent')
+    SENTIMENTS = ('positive', 'negative', 'neutral', 'not_analyzed')
+    KEYWORD_CATEGORIES = ('financial_terms', 'products', 'actions', 'dates')
+    UNSET = -1
+
+    def __init__(self):
+        self.conversation_ids: List[str] = []
+        self.conversation_offsets = np.zeros(1, dtype=np.int64)
+        self.texts: List[str] = []
+        self.speaker_codes = np.empty(0, dtype=np.int8)
+        self.intent_codes = np.empty(0, dtype=np.int16)
+        self.sentiment_codes = np.empty(0, dtype=np.int8)
+        self.start_times = np.empty(0, dtype=np.float64)
+        self.end_times = np.empty(0, dtype=np.float64)
+        self.intent_labels: List[str] = []
+        self._intent_index: Dict[str, int] = {}
+        # Keywords in CSR layout: row i owns entries keyword_offsets[i]:keyword_offsets[i + 1]
+        self.keyword_offsets: Optional[np.ndarray] = None
+        self.keyword_categories = np.empty(0, dtype=np.int8)
+        self.keyword_terms = np.empty(0, dtype=np.int32)
+        self.keyword_vocab: List[str] = []
+        self._keyword_index: Dict[str, int] = {}
+
+    @classmethod
+    def from_conversations(cls, conversations: Iterable[Tuple[str, List[Dict]]]) -> 'ColumnarTranscript':
+        """Build columns from (conversation_id, utterances) pairs"""
+        columns = cls()
+        speaker_index = {s: i for i, s in enumerate(cls.SPEAKERS)}
+        speakers, starts, ends, offsets = [], [], [], [0]
+        for conversation_id, utterances in conversations:
+            columns.conversation_ids.append(conversation_id)
+            for utterance in utterances:
+                columns.texts.append(utterance['text'])
+                speakers.append(speaker_index[utterance['speaker']])
+                start, end = utterance.get('start'), utterance.get('end')
+                starts.append(np.nan if start is None else start)
+                ends.append(np.nan if end is None else end)
+            offsets.append(len(columns.texts))
+
+        size = len(columns.texts)
+        columns.conversation_offsets = np.asarray(offsets, dtype=np.int64)
+        columns.speaker_codes = np.asarray(speakers, dtype=np.int8)
+        columns.start_times = np.asarray(starts, dtype=np.float64)
+        columns.end_times = np.asarray(ends, dtype=np.float64)
+        columns.intent_codes = np.full(size, cls.UNSET, dtype=np.int16)
+        columns.sentiment_codes = np.full(size, cls.UNSET, dtype=np.int8)
+        return columns
+
+    @classmethod
+    def from_records(cls, conversation_id: str, utterances: List[Dict]) -> 'ColumnarTranscript':
+        """Build columns for a single conversation"""
+        return cls.from_conversations([(conversation_id, utterances)])
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def num_conversations(self) -> int:
+        return len(self.conversation_ids)
+
+    def conversation_slice(self, index: int) -> slice:
+        """Row range belonging to the conversation at ``index``"""
+        return slice(int(self.conversation_offsets[index]), int(self.conversation_offsets[index + 1]))
+
+    def customer_mask(self) -> np.ndarray:
+        return self.speaker_codes == self.SPEAKERS.index('Customer')
+
+    def intent_code(self, label: str) -> int:
+        """Code for an intent label, adding it to the vocabulary if new"""
+        code = self._intent_index.get(label)
+        if code is None:
+            code = self._intent_index[label] = len(self.intent_labels)
+            self.intent_labels.append(label)
+        return code
+
+    def set_keywords(self, rows: List[Dict[str, List[str]]]) -> None:
+        """Store per-row keyword dicts in CSR layout"""
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        categories, terms = [], []
+        category_index = {c: i for i, c in enumerate(self.KEYWORD_CATEGORIES)}
+        for i, keywords in enumerate(rows):
+            for category, values in keywords.items():
+                for value in values:
+                    term = self._keyword_index.get(value)
+                    if term is None:
+                        term = self._keyword_index[value] = len(self.keyword_vocab)
+                        self.keyword_vocab.append(value)
+                    categories.append(category_index[category])
+                    terms.append(term)
+            offsets[i + 1] = len(terms)
+        self.keyword_offsets = offsets
+        self.keyword_categories = np.asarray(categories, dtype=np.int8)
+        self.keyword_terms = np.asarray(terms, dtype=np.int32)
+
+    def _keywords_for(self, row: int) -> Dict[str, List[str]]:
+        keywords = {c: [] for c in self.KEYWORD_CATEGORIES}
+        start, end = self.keyword_offsets[row], self.keyword_offsets[row + 1]
+        for category, term in zip(self.keyword_categories[start:end], self.keyword_terms[start:end]):
+            keywords[self.KEYWORD_CATEGORIES[category]].append(self.keyword_vocab[term])
+        return keywords
+
+    def to_records(self, index: int = 0) -> List[Dict]:
+        """Rebuild the per-utterance dicts of one conversation for the API edge"""
+        records = []
+        for row in range(*self.conversation_slice(index).indices(len(self))):
+            record = {'speaker': self.SPEAKERS[self.speaker_codes[row]], 'text': self.texts[row]}
+            if not np.isnan(self.start_times[row]):
+                record['start'] = float(self.start_times[row])
+            if not np.isnan(self.end_times[row]):
+                record['end'] = float(self.end_times[row])
+            if self.intent_codes[row] != self.UNSET:
+                record['intent'] = self.intent_labels[self.intent_codes[row]]
+            if self.sentiment_codes[row] != self.UNSET:
+                record['sentiment'] = self.SENTIMENTS[self.sentiment_codes[row]]
+            if self.keyword_offsets is not None:
+                record['keywords'] = self._keywords_for(row)
+            records.append(record)
+        return records
+
+    def iter_conversations(self) -> Iterator[Tuple[str, List[Dict]]]:
+        """Yield (conversation_id, utterance dicts) for every conversation"""
+        for index, conversation_id in enumerate(self.conversation_ids):
+            yield conversation_id, self.to_records(index)
@@ -0,0 +1,65 @@
+import re
+import zlib
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+class HashedNgramEmbedder:
+    """
+    CPU-only conversation embeddings using the hashing trick.
+
+    Word unigrams and bigrams plus character n-grams of the transcript are
+    hashed (CRC32) into ``dim`` signed buckets, together with the analysis
+    labels (utterance intents and extracted keywords, weighted up so calls
+    with the same issue land close together). Vectors are L2-normalized, so
+    the dot product of two embeddings is their cosine similarity. No model
+    download or training is needed and the output is deterministic.
+    """
+    _WORD = re.compile(r"[a-z0-9']+")
+
+    def __init__(self, dim: int = 128, char_ngrams: tuple = (3, 4), label_weight: float = 2.0):
+        self.dim = dim
+        self.char_ngrams = char_ngrams
+        self.label_weight = label_weight
+
+    def _features(self, texts: Iterable[str]) -> Iterable[str]:
+        for text in texts:
+            words = self._WORD.findall(text.lower())
+            yield from words
+            for first, second in zip(words, words[1:]):
+                yield f"{first} {second}"
+            for word in words:
+                padded = f" {word} "
+                for n in self.char_ngrams:
+                    for i in range(len(padded) - n + 1):
+                        yield "#" + padded[i:i + n]
+
+    def _digests(self, features: Iterable[str]) -> np.ndarray:
+        return np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature in features), dtype=np.uint32)
+
+    def embed_texts(self, texts: Iterable[str], labels: Iterable[str] = ()) -> np.ndarray:
+        """Embed free text plus optional label features"""
+        text_digests = self._digests(self._features(texts))
+        label_digests = self._digests(f"@{label}" for label in labels)
+        digests = np.concatenate([text_digests, label_digests])
+        weights = np.concatenate([
+            np.ones(len(text_digests)),
+            np.full(len(label_digests), self.label_weight)
+        ])
+        # Low bits pick the bucket, the top bit the sign, so collisions tend to cancel out
+        weights[(digests & 0x80000000) == 0] *= -1
+        vector = np.bincount(digests % self.dim, weights=weights, minlength=self.dim).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def embed_response(self, response: Dict[str, Any]) -> np.ndarray:
+        """Embed a formatted analysis response: utterance texts, intents and keywords"""
+        utterances = response.get("analysis", {}).get("utterances", [])
+        labels: List[str] = []
+        for utterance in utterances:
+            intent = utterance.get("intent")
+            if intent and intent != "no_intent_detected":
+                labels.append(f"intent:{intent}")
+            for values in (utterance.get("keywords") or {}).values():
+                labels.extend(f"keyword:{value.lower()}" for value in values)
+        return self.embed_texts((u.get("text", "") for u in utterances), labels)
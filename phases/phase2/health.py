@@ -0,0 +1,103 @@
+import asyncio
+import inspect
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from starlette.concurrency import run_in_threadpool
+
+CheckResult = Tuple[bool, Dict[str, Any]]
+
+class _Check(NamedTuple):
+    name: str
+    function: Callable[[], Union[CheckResult, Awaitable[CheckResult]]]
+    critical: bool
+
+class ReadinessMonitor:
+    """
+    Readiness status refreshed by a background task instead of per probe.
+
+    Each registered check returns ``(ok, details)``; synchronous checks run
+    in the thread pool and every check is bounded by ``timeout``. The task
+    re-runs all checks every ``interval`` seconds and swaps in a new
+    snapshot, so serving a probe is a dictionary read. The service is ready
+    when every critical check passed and the snapshot is fresh: a snapshot
+    older than ``max_age`` (the refresher is stuck or dead) counts as not ready.
+    """
+    def __init__(self, interval: float = 5.0, timeout: float = 2.0, max_age: Optional[float] = None):
+        self.interval = interval
+        self.timeout = timeout
+        self.max_age = max_age if max_age is not None else interval * 3
+        self._checks: List[_Check] = []
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._refreshed_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def register(
+        self,
+        name: str,
+        function: Callable[[], Union[CheckResult, Awaitable[CheckResult]]],
+        critical: bool = True
+    ) -> None:
+        """Add a check; failing non-critical checks are reported without affecting readiness"""
+        self._checks.append(_Check(name, function, critical))
+
+    async def _run(self, check: _Check) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(check.function):
+                ok, details = await asyncio.wait_for(check.function(), self.timeout)
+            else:
+                ok, details = await asyncio.wait_for(run_in_threadpool(check.function), self.timeout)
+        except asyncio.TimeoutError:
+            ok, details = False, {"error": f"Timed out after {self.timeout}s"}
+        except Exception as e:
+            ok, details = False, {"error": f"{type(e).__name__}: {e}"}
+        return {
+            "ok": ok,
+            "critical": check.critical,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            **details
+        }
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Run every check now and publish the result as the current snapshot"""
+        results = await asyncio.gather(*(self._run(check) for check in self._checks))
+        checks = {check.name: result for check, result in zip(self._checks, results)}
+        self._snapshot = {
+            "ready": all(result["ok"] for result in checks.values() if result["critical"]),
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            "checks": checks
+        }
+        self._refreshed_at = time.monotonic()
+        return self._snapshot
+
+    def status(self) -> Dict[str, Any]:
+        """Current snapshot with its age, marked not ready if it is missing or stale"""
+        if self._snapshot is None:
+            return {"ready": False, "reason": "No readiness check has completed yet"}
+        age = time.monotonic() - self._refreshed_at
+        status = {**self._snapshot, "age_seconds": round(age, 3)}
+        if age > self.max_age:
+            status["ready"] = False
+            status["reason"] = "Readiness snapshot is stale"
+        return status
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start refreshing in the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            task, self._task = self._task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
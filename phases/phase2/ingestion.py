@@ -1,13 +1,23 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Dict, Optional, Union
 
 class Utterance(BaseModel):
     speaker: str = Field(..., pattern="^(Customer|Agent)$")
     text: str = Field(..., min_length=1)
+    start: Optional[float] = Field(None, ge=0, description="Start time in seconds from call start")
+    end: Optional[float] = Field(None, ge=0, description="End time in seconds from call start")
+
+    @model_validator(mode="after")
+    def check_times(self) -> "Utterance":
+        if (self.start is None) != (self.end is None):
+            raise ValueError("start and end must be given together")
+        if self.start is not None and self.end < self.start:
+            raise ValueError("end must not be before start")
+        return self
 
 class Transcript(BaseModel):
     conversation_id: str
-    transcript: List[Dict[str, str]]
+    transcript: List[Dict[str, Union[str, float]]]
 
 class InputValidator:
     def validate(self, data: Dict) -> Dict:
@@ -1,6 +1,10 @@
 from typing import List, Dict
 import re
 
+import numpy as np
+
+from phases.phase2.columnar import ColumnarTranscript
+
 class IntentClassifier:
     def __init__(self):
         self.intent_patterns = {
@@ -38,4 +42,16 @@ class IntentClassifier:
         return [
             {**utterance, 'intent': self.classify_utterance(utterance['text'])}
             for utterance in utterances
-        ]
\ No newline at end of file
+        ]
+
+    def analyze_columns(self, columns: ColumnarTranscript) -> ColumnarTranscript:
+        """
+        Classify every row of a columnar transcript.
+        Returns: The same columns with intent_codes filled in
+        """
+        columns.intent_codes = np.fromiter(
+            (columns.intent_code(self.classify_utterance(text)) for text in columns.texts),
+            dtype=np.int16,
+            count=len(columns)
+        )
+        return columns
@@ -1,6 +1,8 @@
 from typing import List, Dict, Set
 import re
 
+from phases.phase2.columnar import ColumnarTranscript
+
 class KeywordExtractor:
     def __init__(self):
         self.financial_patterns = {
@@ -35,15 +37,15 @@ class KeywordExtractor:
             matches = re.finditer(pattern, text)
             keywords['financial_terms'].extend([m.group() for m in matches])
         
-        # Extract products
+        # Extract products (sets are walked in sorted order so the output does not depend on hash seeds)
         text_lower = text.lower()
         for category, terms in self.product_terms.items():
-            for term in terms:
+            for term in sorted(terms):
                 if term in text_lower:
                     keywords['products'].append(term)
         
         # Extract actions
-        for action in self.action_terms:
+        for action in sorted(self.action_terms):
             if action in text_lower:
                 keywords['actions'].append(action)
         
@@ -55,4 +57,9 @@ class KeywordExtractor:
         return [
             {**utterance, 'keywords': self.extract_keywords(utterance['text'])}
             for utterance in utterances
-        ]
\ No newline at end of file
+        ]
+
+    def analyze_columns(self, columns: ColumnarTranscript) -> ColumnarTranscript:
+        """Extract keywords for every row of a columnar transcript"""
+        columns.set_keywords([self.extract_keywords(text) for text in columns.texts])
+        return columns
@@ -0,0 +1,243 @@
+import argparse
+import gzip
+import io
+import json
+import sqlite3
+import sys
+import threading
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from phases.phase2.blob_store import BlobStore, expand_entry
+from phases.phase2.log_segments import Segment, SegmentedLog
+
+class RequestLogIndex:
+    """
+    SQLite sidecar index over a segmented request log.
+
+    Maps conversation_id and timestamp to (segment, byte offset, length) so a
+    logged entry can be fetched with one seek instead of scanning the log.
+    For compressed segments the index also keeps the gzip member map written
+    at compression time, so only the member holding the entry is inflated.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            conversation_id TEXT NOT NULL,
+            ts REAL NOT NULL,
+            status TEXT,
+            segment TEXT NOT NULL,
+            offset INTEGER NOT NULL,
+            length INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_conversation ON entries (conversation_id, ts);
+        CREATE INDEX IF NOT EXISTS idx_entries_ts ON entries (ts);
+        CREATE INDEX IF NOT EXISTS idx_entries_segment ON entries (segment);
+        CREATE TABLE IF NOT EXISTS blocks (
+            segment TEXT NOT NULL,
+            raw_offset INTEGER NOT NULL,
+            compressed_offset INTEGER NOT NULL,
+            PRIMARY KEY (segment, raw_offset)
+        );
+    """
+
+    def __init__(self, path: Path, segments: SegmentedLog):
+        self.path = Path(path)
+        self.segments = segments
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    @staticmethod
+    def _epoch(timestamp: str) -> float:
+        moment = datetime.fromisoformat(timestamp)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.timestamp()
+
+    def add(self, entries: List[Dict[str, Any]], locations: List[Tuple[Segment, int, int]]) -> None:
+        """Index a written batch; locations come from SegmentedLog.append"""
+        rows = [
+            (entry.get("conversation_id"), self._epoch(entry["timestamp"]), entry.get("status"),
+             segment.name, offset, length)
+            for entry, (segment, offset, length) in zip(entries, locations)
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO entries (conversation_id, ts, status, segment, offset, length) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def add_blocks(self, segment_name: str, blocks: List[Tuple[int, int]]) -> None:
+        """Record the gzip member map of a freshly compressed segment"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO blocks (segment, raw_offset, compressed_offset) VALUES (?, ?, ?)",
+                [(segment_name, raw, compressed) for raw, compressed in blocks]
+            )
+
+    def remove_segments(self, names: Iterable[str]) -> None:
+        """Forget entries of deleted segments"""
+        names = [(name,) for name in names]
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM entries WHERE segment = ?", names)
+            self._conn.executemany("DELETE FROM blocks WHERE segment = ?", names)
+
+    def _rows(self, sql: str, params: tuple) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _read(self, segment_name: str, offset: int, length: int) -> Optional[Dict[str, Any]]:
+        directory = self.segments.directory
+        raw = directory / f"{segment_name}.jsonl"
+        try:
+            with open(raw, "rb") as f:
+                f.seek(offset)
+                return json.loads(f.read(length))
+        except FileNotFoundError:
+            pass
+
+        compressed = directory / f"{segment_name}.jsonl.gz"
+        block = self._rows(
+            "SELECT raw_offset, compressed_offset FROM blocks WHERE segment = ? AND raw_offset <= ? "
+            "ORDER BY raw_offset DESC LIMIT 1",
+            (segment_name, offset)
+        )
+        raw_offset, compressed_offset = block[0] if block else (0, 0)
+        try:
+            with open(compressed, "rb") as f:
+                f.seek(compressed_offset)
+                with gzip.GzipFile(fileobj=f) as member:
+                    member.seek(offset - raw_offset)
+                    return json.loads(member.read(length))
+        except FileNotFoundError:
+            # Removed by retention since the index was read
+            return None
+
+    def lookup_conversation(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """All logged entries for a conversation, oldest first"""
+        rows = self._rows(
+            "SELECT segment, offset, length FROM entries WHERE conversation_id = ? ORDER BY ts",
+            (conversation_id,)
+        )
+        return [entry for entry in (self._read(*row) for row in rows) if entry is not None]
+
+    def lookup_range(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 100,
+        conversation_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Logged entries with start <= timestamp < end, oldest first"""
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start.timestamp())
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end.timestamp())
+        if conversation_id is not None:
+            clauses.append("conversation_id = ?")
+            params.append(conversation_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._rows(
+            f"SELECT segment, offset, length FROM entries {where} ORDER BY ts LIMIT ?",
+            (*params, limit)
+        )
+        return [entry for entry in (self._read(*row) for row in rows) if entry is not None]
+
+    def rebuild(self) -> int:
+        """Re-index every segment on disk; returns the number of entries indexed"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM blocks")
+        count = 0
+        for segment in self.segments.segments():
+            data = segment.path.read_bytes()
+            if segment.compressed:
+                data, blocks = _inflate_members(data)
+                self.add_blocks(segment.name, blocks)
+            entries, locations = [], []
+            offset = 0
+            for line in io.BytesIO(data):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    entry = None
+                if isinstance(entry, dict) and "timestamp" in entry:
+                    entries.append(entry)
+                    locations.append((segment, offset, len(line)))
+                offset += len(line)
+            self.add(entries, locations)
+            count += len(entries)
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+def _inflate_members(data: bytes) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """Decompress a multi-member gzip file, returning the content and its member map"""
+    out, blocks, position = [], [], 0
+    raw_offset = 0
+    while position < len(data):
+        inflater = zlib.decompressobj(wbits=31)
+        chunk = inflater.decompress(data[position:])
+        blocks.append((raw_offset, position))
+        out.append(chunk)
+        raw_offset += len(chunk)
+        position = len(data) - len(inflater.unused_data)
+    return b"".join(out), blocks
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if value is None:
+        return None
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line lookup of logged requests through the sidecar index"""
+    parser = argparse.ArgumentParser(description="Look up logged CallChemy requests")
+    parser.add_argument("--log-dir", default="logs", help="Directory holding the request log")
+    parser.add_argument("--data-file", default="requests.jsonl", help="Request log name used by the API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    conversation = commands.add_parser("conversation", help="Entries for one conversation")
+    conversation.add_argument("conversation_id")
+
+    window = commands.add_parser("range", help="Entries in a time window (ISO 8601 times)")
+    window.add_argument("--start")
+    window.add_argument("--end")
+    window.add_argument("--limit", type=int, default=100)
+
+    commands.add_parser("rebuild", help="Re-index all segments on disk")
+
+    args = parser.parse_args(argv)
+    stem = Path(args.data_file).stem
+    segments = SegmentedLog(Path(args.log_dir) / stem, prefix=stem)
+    index = RequestLogIndex(segments.directory / f"{stem}.index.sqlite", segments)
+    try:
+        if args.command == "rebuild":
+            print(f"Indexed {index.rebuild()} entries")
+            return 0
+        if args.command == "conversation":
+            entries = index.lookup_conversation(args.conversation_id)
+        else:
+            entries = index.lookup_range(_parse_time(args.start), _parse_time(args.end), args.limit)
+        # Entries logged with payload_mode="dedup" reference their transcripts in the blob store
+        blob_dir = Path(args.log_dir) / "blobs"
+        blobs = BlobStore(blob_dir) if blob_dir.is_dir() else None
+        for entry in entries:
+            if blobs is not None:
+                entry = expand_entry(entry, blobs)
+            sys.stdout.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return 0 if entries else 1
+    finally:
+        index.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+import gzip
+import heapq
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+class Segment(NamedTuple):
+    """A request-log segment file and the period it covers"""
+    path: Path
+    period_start: datetime
+    pid: int
+    seq: int
+    compressed: bool
+
+    @property
+    def name(self) -> str:
+        """Segment name without the .jsonl/.jsonl.gz suffix"""
+        return self.path.name.split('.jsonl')[0]
+
+class _OpenSegment:
+    """Write handle of a segment being appended to"""
+    def __init__(self, segment: Segment, handle):
+        self.segment = segment
+        self.handle = handle
+        self.size = handle.tell()
+
+class SegmentedLog:
+    """
+    Request log split into rolling JSONL segments.
+
+    Each process appends to its own active segment per period (hourly or
+    daily), named ``<prefix>-<period start>-<pid>-<seq>.jsonl``. The segments
+    of the newest period and the one before it stay open, so lines that
+    arrive late across a boundary join their own period's segment without
+    rolling the current one. A segment is closed when it reaches
+    ``max_bytes``, when a newer period leaves it behind, or by
+    ``roll_expired`` once its period has ended; closed segments are
+    gzip-compressed in the background. Retention deletes whole
+    expired segments, and ``iter_entries`` reads transparently across
+    compressed and uncompressed segments.
+    """
+    PERIODS = {'hourly': timedelta(hours=1), 'daily': timedelta(days=1)}
+    TIME_FORMAT = '%Y%m%dT%H%M%SZ'
+    BLOCK_SIZE = 256 * 1024  # Uncompressed bytes per gzip member in closed segments
+
+    def __init__(
+        self,
+        directory: Path,
+        prefix: str = 'requests',
+        period: str = 'hourly',
+        max_bytes: Optional[int] = None,
+        on_compressed: Optional[Callable[[str, List[Tuple[int, int]]], None]] = None
+    ):
+        if period not in self.PERIODS:
+            raise ValueError(f"period must be one of {tuple(self.PERIODS)}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.period = period
+        self.max_bytes = max_bytes
+        # Called with (segment name, member map) after a segment is compressed,
+        # while its uncompressed copy still exists
+        self.on_compressed = on_compressed
+        self._pattern = re.compile(
+            rf'^{re.escape(prefix)}-(\d{{8}}T\d{{6}}Z)-(\d+)-(\d+)\.jsonl(\.gz)?$'
+        )
+        self._lock = threading.Lock()
+        self._open: Dict[datetime, _OpenSegment] = {}
+        self._compressors: List[threading.Thread] = []
+
+    def _period_start(self, moment: datetime) -> datetime:
+        if self.period == 'daily':
+            return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        return moment.replace(minute=0, second=0, microsecond=0)
+
+    def _parse(self, path: Path) -> Optional[Segment]:
+        match = self._pattern.match(path.name)
+        if not match:
+            return None
+        period_start = datetime.strptime(match.group(1), self.TIME_FORMAT).replace(tzinfo=timezone.utc)
+        return Segment(path, period_start, int(match.group(2)), int(match.group(3)), bool(match.group(4)))
+
+    def segments(self) -> List[Segment]:
+        """All segments on disk, oldest period first; uncompressed copies win while compression is in flight"""
+        found: Dict[str, Segment] = {}
+        for path in self.directory.iterdir():
+            segment = self._parse(path)
+            if segment is None:
+                continue
+            current = found.get(segment.name)
+            if current is None or current.compressed:
+                found[segment.name] = segment
+        return sorted(found.values(), key=lambda s: (s.period_start, s.pid, s.seq))
+
+    @property
+    def active_segment(self) -> Optional[Segment]:
+        """Open segment of the newest period"""
+        if not self._open:
+            return None
+        return self._open[max(self._open)].segment
+
+    def _is_open(self, segment: Segment) -> bool:
+        return any(current.segment.path == segment.path for current in self._open.values())
+
+    def _open_segment(self, period_start: datetime) -> _OpenSegment:
+        pid = os.getpid()
+        seq = 1 + max(
+            (s.seq for s in self.segments() if s.period_start == period_start and s.pid == pid),
+            default=0
+        )
+        path = self.directory / f"{self.prefix}-{period_start.strftime(self.TIME_FORMAT)}-{pid}-{seq:04d}.jsonl"
+        current = _OpenSegment(Segment(path, period_start, pid, seq, False), open(path, 'ab'))
+        self._open[period_start] = current
+        return current
+
+    def _close_segment(self, period_start: datetime, wait: bool = False) -> None:
+        current = self._open.pop(period_start)
+        current.handle.close()
+        path = current.segment.path
+        compressor = threading.Thread(target=self.compress_segment, args=(path,), daemon=True)
+        compressor.start()
+        self._compressors = [t for t in self._compressors if t.is_alive()] + [compressor]
+        if wait:
+            compressor.join()
+
+    def append(
+        self,
+        lines: List[bytes],
+        now: Optional[datetime] = None,
+        timestamps: Optional[List[datetime]] = None
+    ) -> List[Tuple[Segment, int, int]]:
+        """
+        Append encoded JSON lines to the active segment, rolling it first if needed.
+
+        Each line goes to the segment of its own period: ``timestamps`` gives
+        one moment per line (entries queued just before a period boundary
+        then stay in that period, where ``iter_entries`` looks for them);
+        otherwise all lines belong to ``now``, by default the current time.
+
+        Returns:
+            List of (segment, byte offset, length) for each line, in order
+        """
+        if timestamps is None:
+            timestamps = [now or datetime.now(timezone.utc)] * len(lines)
+        by_period: Dict[datetime, List[int]] = {}
+        for i, moment in enumerate(timestamps):
+            by_period.setdefault(self._period_start(moment), []).append(i)
+        locations: List[Optional[Tuple[Segment, int, int]]] = [None] * len(lines)
+        with self._lock:
+            # Oldest period first, so a batch straddling a boundary opens each segment once
+            for period_start in sorted(by_period):
+                indices = by_period[period_start]
+                written = self._append_run([lines[i] for i in indices], period_start)
+                for i, location in zip(indices, written):
+                    locations[i] = location
+        return locations
+
+    def _append_run(self, lines: List[bytes], period_start: datetime) -> List[Tuple[Segment, int, int]]:
+        current = self._open.get(period_start)
+        if current is not None and self.max_bytes is not None and current.size >= self.max_bytes:
+            self._close_segment(period_start)
+            current = None
+        if current is None:
+            current = self._open_segment(period_start)
+            if period_start == max(self._open):
+                # Keep only this period and the one before it open
+                for other in [p for p in self._open if p < period_start - self.PERIODS[self.period]]:
+                    self._close_segment(other)
+
+        locations = []
+        offset = current.size
+        for line in lines:
+            locations.append((current.segment, offset, len(line)))
+            offset += len(line)
+        current.handle.write(b''.join(lines))
+        current.handle.flush()
+        current.size = offset
+        return locations
+
+    def roll_expired(self, now: Optional[datetime] = None) -> bool:
+        """Close (and compress) open segments once their period has ended, without waiting for the next write"""
+        period_start = self._period_start(now or datetime.now(timezone.utc))
+        with self._lock:
+            expired = [p for p in self._open if p < period_start]
+            for other in expired:
+                self._close_segment(other)
+            return bool(expired)
+
+    def fsync(self) -> None:
+        with self._lock:
+            for current in self._open.values():
+                os.fsync(current.handle.fileno())
+
+    def compress_segment(self, path: Path) -> List[Tuple[int, int]]:
+        """
+        Gzip a closed segment as a series of independent members.
+
+        Returns:
+            (uncompressed offset, compressed offset) of each member, so a reader
+            can seek to the member holding a given line without inflating the file
+        """
+        target = path.with_name(path.name + '.gz')
+        temp = path.with_name(f"{path.name}.gz.{os.getpid()}.tmp")
+        blocks = []
+        try:
+            source = open(path, 'rb')
+        except FileNotFoundError:
+            # Another process's maintenance already compressed it
+            return blocks
+        with source, open(temp, 'wb') as out:
+            uncompressed = 0
+            while True:
+                block = source.read(self.BLOCK_SIZE)
+                if not block:
+                    break
+                # Keep lines whole inside a member
+                if not block.endswith(b'\n'):
+                    block += source.readline()
+                blocks.append((uncompressed, out.tell()))
+                out.write(gzip.compress(block, mtime=0))
+                uncompressed += len(block)
+        temp.replace(target)
+        if self.on_compressed is not None:
+            self.on_compressed(path.name[:-len('.jsonl')], blocks)
+        path.unlink(missing_ok=True)
+        return blocks
+
+    def compress_stale(self, grace: timedelta = timedelta(minutes=10)) -> int:
+        """Compress uncompressed segments left behind by processes that have stopped writing"""
+        cutoff = datetime.now(timezone.utc) - grace
+        compressed = 0
+        for segment in self.segments():
+            if segment.compressed or self._is_open(segment):
+                continue
+            period_end = segment.period_start + self.PERIODS[self.period]
+            try:
+                modified = datetime.fromtimestamp(segment.path.stat().st_mtime, tz=timezone.utc)
+            except FileNotFoundError:
+                continue
+            if period_end <= cutoff and modified <= cutoff:
+                self.compress_segment(segment.path)
+                compressed += 1
+        return compressed
+
+    def delete_expired(self, cutoff: datetime) -> List[Segment]:
+        """Delete every segment whose whole period ended before ``cutoff``"""
+        removed = []
+        for segment in self.segments():
+            if segment.period_start + self.PERIODS[self.period] > cutoff:
+                continue
+            if self._is_open(segment):
+                continue
+            for path in (segment.path, segment.path.with_name(segment.name + '.jsonl.gz')):
+                if path.exists():
+                    path.unlink()
+            removed.append(segment)
+        return removed
+
+    @staticmethod
+    def _read_lines(segment: Segment) -> Iterator[bytes]:
+        try:
+            f = (gzip.open if segment.compressed else open)(segment.path, 'rb')
+        except FileNotFoundError:
+            if segment.compressed:
+                # Deleted by retention while listing
+                return
+            # Replaced by its compressed copy while listing
+            try:
+                f = gzip.open(segment.path.with_name(segment.name + '.jsonl.gz'), 'rb')
+            except FileNotFoundError:
+                return
+        with f:
+            yield from f
+
+    def iter_entries(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield logged entries with start <= timestamp < end, oldest first.
+
+        Only segments whose period overlaps the range are opened. Entries from
+        segments of the same period (several processes) are merged by timestamp.
+        """
+        by_period: Dict[datetime, List[Segment]] = {}
+        for segment in self.segments():
+            period_end = segment.period_start + self.PERIODS[self.period]
+            if start is not None and period_end <= start:
+                continue
+            if end is not None and segment.period_start >= end:
+                continue
+            by_period.setdefault(segment.period_start, []).append(segment)
+
+        for period_start in sorted(by_period):
+            streams = [self._entries(segment, start, end) for segment in by_period[period_start]]
+            for _, entry in heapq.merge(*streams, key=lambda item: item[0]):
+                yield entry
+
+    def _entries(
+        self,
+        segment: Segment,
+        start: Optional[datetime],
+        end: Optional[datetime]
+    ) -> Iterator[Tuple[datetime, Dict[str, Any]]]:
+        for line in self._read_lines(segment):
+            try:
+                entry = json.loads(line)
+                timestamp = datetime.fromisoformat(entry['timestamp'])
+            except (json.JSONDecodeError, KeyError, ValueError):
+                continue
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            if (start is None or timestamp >= start) and (end is None or timestamp < end):
+                yield timestamp, entry
+
+    def close(self) -> None:
+        """Close and compress the open segments, waiting for pending compressions"""
+        with self._lock:
+            for period_start in list(self._open):
+                self._close_segment(period_start, wait=True)
+        for compressor in self._compressors:
+            compressor.join()
+        self._compressors = []
@@ -1,18 +1,77 @@
 import json
 import logging
+import os
+import random
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional
 import traceback
 
+try:
+    import fcntl
+except ImportError:  # Windows: maintenance then runs without the cross-process lock
+    fcntl = None
+
+from phases.phase2.background_writer import BackgroundWriter
+from phases.phase2.blob_store import BlobStore, expand_entry
+from phases.phase2.log_index import RequestLogIndex
+from phases.phase2.log_segments import SegmentedLog
+
 class CallChemyLogger:
+    FSYNC_POLICIES = ('never', 'batch', 'interval')
+    PAYLOAD_MODES = ('full', 'dedup')
+
     def __init__(
         self,
         log_dir: str = "logs",
         log_file: str = "backend.log",
         data_file: str = "requests.jsonl",
-        retention_days: int = 30
+        retention_days: int = 30,
+        background: bool = False,
+        max_queue_size: int = 10000,
+        overflow: str = "block",
+        fsync: str = "never",
+        fsync_interval: float = 1.0,
+        segment_period: Optional[str] = None,
+        segment_max_bytes: Optional[int] = None,
+        index: bool = True,
+        payload_mode: str = "full",
+        sample_rates: Optional[Dict[str, float]] = None,
+        max_payload_bytes: Optional[int] = None,
+        events_file: str = "events.jsonl"
     ):
+        """
+        Args:
+            background: Write request entries from a dedicated thread in batches
+                instead of synchronously inside log_request
+            max_queue_size: Bound on entries waiting for the background writer
+            overflow: 'block' to wait for room when the queue is full, 'drop' to discard
+            fsync: 'never' (leave it to the OS), 'batch' (after every write batch)
+                or 'interval' (at most once every fsync_interval seconds)
+            segment_period: 'hourly' or 'daily' to write rolling, compressed segments
+                under <log_dir>/<data_file stem>/ instead of a single data file
+            segment_max_bytes: Also roll a segment once it reaches this size
+            index: Maintain a SQLite sidecar index of segmented entries by
+                conversation_id and timestamp
+            payload_mode: 'full' logs payloads verbatim; 'dedup' stores each transcript
+                once in a content-addressed blob store under <log_dir>/blobs and logs
+                its hash, and drops response utterance texts that repeat the transcript
+            sample_rates: Fraction of entries kept per status, e.g. {"success": 0.01};
+                statuses not listed are always kept
+            max_payload_bytes: Replace a logged request or response larger than this
+                with a truncation marker
+            events_file: File for system events (startup, shutdown, unhandled errors)
+        """
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {self.FSYNC_POLICIES}")
+        if payload_mode not in self.PAYLOAD_MODES:
+            raise ValueError(f"payload_mode must be one of {self.PAYLOAD_MODES}")
+        for rate in (sample_rates or {}).values():
+            if not 0.0 <= rate <= 1.0:
+                raise ValueError("sample rates must be between 0 and 1")
+
         # Create log directory if it doesn't exist
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
@@ -20,7 +79,38 @@ class CallChemyLogger:
         # Setup paths
         self.log_file = self.log_dir / log_file
         self.data_file = self.log_dir / data_file
+        self.events_file = self.log_dir / events_file
         self.retention_days = retention_days
+        self.payload_mode = payload_mode
+        self.sample_rates = dict(sample_rates or {})
+        self.max_payload_bytes = max_payload_bytes
+        self.sampled_out = 0
+        self.blobs = BlobStore(self.log_dir / "blobs") if payload_mode == "dedup" else None
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._last_fsync = time.monotonic()
+        self._lock = threading.Lock()
+        self.segments = None
+        self.index = None
+        if segment_period or segment_max_bytes:
+            self.segments = SegmentedLog(
+                self.log_dir / self.data_file.stem,
+                prefix=self.data_file.stem,
+                period=segment_period or "daily",
+                max_bytes=segment_max_bytes
+            )
+            if index:
+                self.index = RequestLogIndex(
+                    self.segments.directory / f"{self.data_file.stem}.index.sqlite",
+                    self.segments
+                )
+                self.segments.on_compressed = self.index.add_blocks
+        self._writer = BackgroundWriter(
+            self._write_batch,
+            max_queue_size=max_queue_size,
+            overflow=overflow,
+            name="callchemy-log-writer"
+        ) if background else None
     
         # Configure logging
         logging.basicConfig(
@@ -32,10 +122,175 @@ class CallChemyLogger:
         self.logger = logging.getLogger(__name__)
 
     def _write_jsonl(self, data: Dict[str, Any]) -> None:
-        """Write a single JSON line to the data file"""
-        with open(self.data_file, 'a', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False)
-            f.write('\n')
+        """Write a single JSON line to the data file, or queue it for the background writer"""
+        if self._writer is not None:
+            self._writer.submit(data)
+        else:
+            self._write_batch([data])
+
+    def _write_batch(self, entries: List[Dict[str, Any]]) -> None:
+        """Serialize entries and append them to the data file in one write"""
+        entries = [self._prepare_entry(entry) for entry in entries]
+        if self.segments is not None:
+            locations = self.segments.append(
+                [(json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8') for entry in entries],
+                timestamps=[self._entry_time(entry) for entry in entries]
+            )
+            if self.index is not None:
+                self.index.add(entries, locations)
+            if self._fsync_due():
+                self.segments.fsync()
+            return
+
+        lines = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+        with self._lock:
+            with open(self.data_file, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                if self._fsync_due():
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    @staticmethod
+    def _entry_time(entry: Dict[str, Any]) -> datetime:
+        """When an entry was logged, which decides its segment (not when the writer gets to it)"""
+        try:
+            moment = datetime.fromisoformat(entry['timestamp'])
+        except (KeyError, TypeError, ValueError):
+            return datetime.now(timezone.utc)
+        return moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)
+
+    def _prepare_entry(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply payload deduplication and size caps, without mutating the caller's data"""
+        if self.blobs is not None:
+            entry = self._dedup_payloads(entry)
+        if self.max_payload_bytes is not None:
+            entry = dict(entry)
+            for key in ("request", "response"):
+                if entry.get(key) is None:
+                    continue
+                size = len(json.dumps(entry[key], ensure_ascii=False).encode('utf-8'))
+                if size > self.max_payload_bytes:
+                    entry[key] = {"$truncated": True, "bytes": size}
+        return entry
+
+    def _dedup_payloads(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        request = entry.get("request")
+        if not isinstance(request, dict) or not isinstance(request.get("transcript"), list):
+            return entry
+        transcript = request["transcript"]
+        entry = {**entry, "request": {**request, "transcript": {"$blob": self.blobs.put(transcript)}}}
+
+        # Response utterances repeat the transcript texts; keep them only if they differ
+        response = entry.get("response")
+        analysis = response.get("analysis") if isinstance(response, dict) else None
+        utterances = analysis.get("utterances") if isinstance(analysis, dict) else None
+        if (
+            isinstance(utterances, list)
+            and len(utterances) == len(transcript)
+            and all(
+                isinstance(u, dict) and isinstance(t, dict) and "text" in u and u["text"] == t.get("text")
+                for u, t in zip(utterances, transcript)
+            )
+        ):
+            stripped = [{k: v for k, v in u.items() if k != "text"} for u in utterances]
+            entry["response"] = {**response, "analysis": {**analysis, "utterances": stripped}}
+            entry["response_texts_elided"] = True
+        return entry
+
+    def expand_entry(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Restore payloads of a deduplicated entry from the blob store"""
+        return expand_entry(entry, self.blobs or BlobStore(self.log_dir / "blobs"))
+
+    def _fsync_due(self) -> bool:
+        if self.fsync == 'batch':
+            return True
+        if self.fsync == 'interval' and time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._last_fsync = time.monotonic()
+            return True
+        return False
+
+    @property
+    def backlog(self) -> int:
+        """Entries queued but not yet written (always 0 in synchronous mode)"""
+        return self._writer.backlog if self._writer is not None else 0
+
+    @property
+    def capacity(self) -> int:
+        """Maximum queued entries before writes block or drop (0 in synchronous mode)"""
+        return self._writer.capacity if self._writer is not None else 0
+
+    @property
+    def write_errors(self) -> int:
+        """Batches the background writer failed to write (always 0 in synchronous mode)"""
+        return self._writer.errors if self._writer is not None else 0
+
+    @property
+    def write_failing(self) -> bool:
+        """Whether the background writer's last batch failed"""
+        return self._writer is not None and self._writer.failing
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued entries are written"""
+        return self._writer.flush(timeout) if self._writer is not None else True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Flush queued entries and stop the background writer; later writes are synchronous.
+        In segmented mode the active segment is closed and compressed.
+        """
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            writer.close(timeout)
+        if self.segments is not None:
+            self.segments.close()
+        if self.index is not None:
+            self.index.close()
+
+    def iter_entries(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate logged entries with start <= timestamp < end across the data file and all segments"""
+        if self.data_file.exists():
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        entry_time = datetime.fromisoformat(entry['timestamp'])
+                    except (json.JSONDecodeError, KeyError, ValueError):
+                        continue
+                    if entry_time.tzinfo is None:
+                        entry_time = entry_time.replace(tzinfo=timezone.utc)
+                    if (start is None or entry_time >= start) and (end is None or entry_time < end):
+                        yield entry
+        if self.segments is not None:
+            yield from self.segments.iter_entries(start, end)
+
+    def lookup_conversation(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Logged entries for a conversation, served from the sidecar index when available"""
+        if self.index is not None:
+            entries = self.index.lookup_conversation(conversation_id)
+        else:
+            entries = [e for e in self.iter_entries() if e.get('conversation_id') == conversation_id]
+        return [self.expand_entry(entry) for entry in entries]
+
+    def lookup_range(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Logged entries in a time window, served from the sidecar index when available"""
+        if self.index is not None:
+            entries = self.index.lookup_range(start, end, limit)
+        else:
+            entries = []
+            for entry in self.iter_entries(start, end):
+                if len(entries) >= limit:
+                    break
+                entries.append(entry)
+        return [self.expand_entry(entry) for entry in entries]
 
     def log_request(
         self,
@@ -44,15 +299,16 @@ class CallChemyLogger:
         response_data: Optional[Dict[str, Any]] = None,
         error: Optional[Exception] = None
     ) -> None:
-        """Log request, response and any errors"""
+        """Log request, response and any errors, subject to the per-status sample rate"""
         timestamp = datetime.now(timezone.utc).isoformat()
+        status = "success" if not error else "error"
         
         log_entry = {
             "timestamp": timestamp,
             "conversation_id": conversation_id,
             "request": request_data,
             "response": response_data,
-            "status": "success" if not error else "error"
+            "status": status
         }
 
         if error:
@@ -69,26 +325,97 @@ class CallChemyLogger:
                 f"Successfully processed conversation {conversation_id}"
             )
 
+        rate = self.sample_rates.get(status, 1.0)
+        if rate < 1.0:
+            if random.random() >= rate:
+                self.sampled_out += 1
+                return
+            # Lets analyses weight sampled entries back up to true volumes
+            log_entry["sample_rate"] = rate
+
         self._write_jsonl(log_entry)
 
+    def log_event(
+        self,
+        event: str,
+        details: Optional[Dict[str, Any]] = None,
+        error: Optional[Exception] = None
+    ) -> None:
+        """Log a system event (startup, shutdown, unhandled error) to the events file"""
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "event": event,
+            "details": details or {}
+        }
+        if error:
+            entry["error"] = {
+                "type": type(error).__name__,
+                "message": str(error),
+                "traceback": traceback.format_exc()
+            }
+            self.logger.error(f"System event {event}: {str(error)}")
+        else:
+            self.logger.info(f"System event {event}")
+        with self._lock:
+            with open(self.events_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def run_maintenance(self) -> bool:
+        """
+        Periodic upkeep for a running service: close this process's active
+        segment once its period has ended, then apply retention and compress
+        segments left by other processes. Workers sharing the log directory
+        take turns through a lock file; a worker that finds it held skips
+        the shared part.
+
+        Returns: False if another process was already doing the shared part
+        """
+        if self.segments is not None:
+            self.segments.roll_expired()
+        if fcntl is None:
+            self.cleanup_old_logs()
+            return True
+        with open(self.log_dir / ".maintenance.lock", "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            try:
+                self.cleanup_old_logs()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return True
+
     def cleanup_old_logs(self) -> None:
-        """Remove log entries older than retention_days"""
+        """
+        Remove log entries older than retention_days.
+        Segments are dropped whole once their period has expired, without reading them.
+        """
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+        if self.segments is not None:
+            removed = self.segments.delete_expired(cutoff_date)
+            if self.index is not None:
+                self.index.remove_segments(segment.name for segment in removed)
+            self.segments.compress_stale()
+        if self.blobs is not None:
+            self.blobs.delete_older_than(cutoff_date)
+
         if not self.data_file.exists():
             return
             
-        cutoff_date = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
         temp_file = self.data_file.with_suffix('.temp')
         
-        with open(self.data_file, 'r', encoding='utf-8') as source, \
-             open(temp_file, 'w', encoding='utf-8') as target:
-            for line in source:
-                try:
-                    entry = json.loads(line)
-                    entry_time = datetime.fromisoformat(entry['timestamp']).replace(tzinfo=timezone.utc)
-                    if entry_time > cutoff_date:
-                        target.write(line)
-                except (json.JSONDecodeError, KeyError, ValueError):
-                    continue
+        with self._lock:
+            with open(self.data_file, 'r', encoding='utf-8') as source, \
+                 open(temp_file, 'w', encoding='utf-8') as target:
+                for line in source:
+                    try:
+                        entry = json.loads(line)
+                        entry_time = datetime.fromisoformat(entry['timestamp']).replace(tzinfo=timezone.utc)
+                        if entry_time > cutoff_date:
+                            target.write(line)
+                    except (json.JSONDecodeError, KeyError, ValueError):
+                        continue
         
-        # Replace original file with filtered content
-        temp_file.replace(self.data_file)
\ No newline at end of file
+            # Replace original file with filtered content
+            temp_file.replace(self.data_file)
\ No newline at end of file
@@ -0,0 +1,358 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: Sequence[str]):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _check(self, labels: tuple) -> None:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+
+class Counter(_Metric):
+    """Monotonic counter; ``inc`` takes one value per label name"""
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = (self.name, labels)
+        shard = self.registry._shard()
+        value = shard.get(key)
+        if value is None:
+            self._check(labels)
+            shard[key] = [amount]
+        else:
+            value[0] += amount
+
+    @staticmethod
+    def _merge(into: List[float], values: List[float]) -> None:
+        into[0] += values[0]
+
+class FunctionCounter(Counter):
+    """
+    Counter whose totals are kept elsewhere (e.g. a writer thread's error
+    count) and read from ``function`` each time metrics are collected;
+    ``function`` returns {label values: total}.
+    """
+    def __init__(self, registry, name, documentation, labelnames, function: Callable[[], Dict[tuple, float]]):
+        super().__init__(registry, name, documentation, labelnames)
+        self.function = function
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+class Histogram(_Metric):
+    """
+    Bucketed distribution; per label set it keeps one count per bucket
+    (plus the overflow bucket) followed by the sum of observations.
+    """
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames, buckets: Sequence[float]):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = (self.name, labels)
+        shard = self.registry._shard()
+        values = shard.get(key)
+        if values is None:
+            self._check(labels)
+            values = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        values[bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def time(self, *labels: str) -> _Timer:
+        """Context manager observing the duration of its block, in seconds"""
+        return _Timer(self, labels)
+
+    @staticmethod
+    def _merge(into: List[float], values: List[float]) -> None:
+        for i, value in enumerate(values):
+            into[i] += value
+
+class RequestTrace:
+    """Stage wall times and cache hits of a single request"""
+    __slots__ = ("started", "stages", "cache_hits")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.cache_hits: Dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def hit(self, cache: str) -> None:
+        self.cache_hits[cache] = self.cache_hits.get(cache, 0) + 1
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, durations in milliseconds"""
+        entries = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.stages.items()]
+        entries.append(f"total;dur={self.elapsed * 1000:.3f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "total_ms": round(self.elapsed * 1000, 3),
+            "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()},
+            "cache_hits": dict(self.cache_hits)
+        }
+
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("callchemy_request_trace", default=None)
+
+class Stage:
+    """
+    Context manager timing one pipeline stage into a histogram labelled by
+    stage name and, when a request is being traced, into its RequestTrace.
+    """
+    __slots__ = ("histogram", "name", "start")
+
+    def __init__(self, histogram: Histogram, name: str):
+        self.histogram = histogram
+        self.name = name
+
+    def __enter__(self) -> "Stage":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self.start
+        self.histogram.observe(elapsed, self.name)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add(self.name, elapsed)
+
+class MetricsRegistry:
+    """
+    Prometheus-style counters and histograms with lock-free updates.
+
+    Every thread updates its own shard (a plain dict owned by that thread),
+    so recording a value takes no lock and never contends with other request
+    threads; a lock is taken only the first time a thread records anything
+    and when shards are summed for a scrape. Shards of threads that have
+    exited (e.g. retired thread-pool workers) are folded into retired totals
+    then, so the number of shards stays bounded by the live threads.
+
+    With several worker processes, set ``directory`` to a path shared by
+    them: each process writes a snapshot of its own totals there every
+    ``flush_interval`` seconds (and on every scrape), and ``render`` sums the
+    snapshots of all processes, so any worker can answer a scrape. A
+    process removes its snapshot on ``close``; snapshots of processes that
+    died without closing are removed by the next scrape.
+    """
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = 5.0):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, dict]] = []
+        self._retired: Dict[Tuple[str, tuple], List[float]] = {}
+        self.directory = Path(directory) if directory else None
+        self._stop = threading.Event()
+        self._thread = None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._thread = threading.Thread(
+                target=self._flush_periodically, args=(flush_interval,), name="callchemy-metrics", daemon=True
+            )
+            self._thread.start()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def counter_function(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        function: Callable[[], Dict[tuple, float]]
+    ) -> FunctionCounter:
+        return self._register(FunctionCounter(self, name, documentation, labelnames, function))
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = self._local.values = {}
+            with self._lock:
+                self._retire_exited()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _merge_into(self, totals: Dict[Tuple[str, tuple], List[float]], shard: dict) -> None:
+        # dict() and list() copies are atomic under the GIL, so owners can keep writing
+        for key, values in dict(shard).items():
+            values = list(values)
+            if key in totals:
+                self._metrics[key[0]]._merge(totals[key], values)
+            else:
+                totals[key] = values
+
+    def _retire_exited(self) -> None:
+        """Fold the shards of exited threads into the retired totals; called with the lock held"""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._merge_into(self._retired, shard)
+        self._shards = live
+
+    def collect(self) -> Dict[Tuple[str, tuple], List[float]]:
+        """This process's totals, keyed by (metric name, label values)"""
+        totals: Dict[Tuple[str, tuple], List[float]] = {}
+        with self._lock:
+            self._retire_exited()
+            shards = [shard for _, shard in self._shards]
+            self._merge_into(totals, self._retired)
+        for shard in shards:
+            self._merge_into(totals, shard)
+        for metric in list(self._metrics.values()):
+            if isinstance(metric, FunctionCounter):
+                for labels, value in metric.function().items():
+                    totals[(metric.name, tuple(labels))] = [value]
+        return totals
+
+    def _snapshot_path(self) -> Path:
+        return self.directory / f"metrics-{os.getpid()}.json"
+
+    @staticmethod
+    def _alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def write_snapshot(self) -> None:
+        """Write this process's totals to the shared directory, atomically"""
+        entries = [[name, list(labels), values] for (name, labels), values in self.collect().items()]
+        path = self._snapshot_path()
+        temp = path.with_name(path.name + ".tmp")
+        temp.write_text(json.dumps(entries))
+        os.replace(temp, path)
+
+    def _flush_periodically(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.write_snapshot()
+            except OSError:
+                pass
+
+    def _all_processes(self) -> Dict[Tuple[str, tuple], List[float]]:
+        if self.directory is None:
+            return self.collect()
+        self.write_snapshot()
+        totals: Dict[Tuple[str, tuple], List[float]] = {}
+        for path in self.directory.glob("metrics-*.json"):
+            pid = path.stem[len("metrics-"):]
+            if pid.isdigit() and not self._alive(int(pid)):
+                # Left by a worker that exited without closing (crash, SIGKILL)
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                entries = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for name, labels, values in entries:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                key = (name, tuple(labels))
+                if key in totals:
+                    metric._merge(totals[key], values)
+                else:
+                    totals[key] = values
+        return totals
+
+    @staticmethod
+    def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+        pairs = [
+            '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+            for name, value in zip(names, values)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @staticmethod
+    def _number(value: float) -> str:
+        if value == float("inf"):
+            return "+Inf"
+        return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        totals = self._all_processes()
+        by_metric: Dict[str, List[Tuple[tuple, List[float]]]] = {}
+        for (name, labels), values in sorted(totals.items()):
+            by_metric.setdefault(name, []).append((labels, values))
+
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, values in by_metric.get(name, []):
+                if isinstance(metric, Histogram):
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets + (float("inf"),), values[:-1]):
+                        cumulative += count
+                        le = f'le="{self._number(bound)}"'
+                        lines.append(f"{name}_bucket{self._labels(metric.labelnames, labels, le)} {int(cumulative)}")
+                    suffix = self._labels(metric.labelnames, labels)
+                    lines.append(f"{name}_sum{suffix} {self._number(values[-1])}")
+                    lines.append(f"{name}_count{suffix} {int(cumulative)}")
+                else:
+                    lines.append(f"{name}{self._labels(metric.labelnames, labels)} {self._number(values[0])}")
+        return "\n".join(lines) + "\n"
+
+    def close(self) -> None:
+        """Stop the snapshot thread and remove this process's snapshot"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._snapshot_path().unlink(missing_ok=True)
@@ -0,0 +1,125 @@
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+class NearDuplicateDetector:
+    """
+    MinHash/LSH detector for transcripts that are near-copies of earlier ones.
+
+    A transcript's signature is the minimum, under ``num_perm`` random hash
+    functions, over the hashes of its word shingles; the fraction of equal
+    signature positions estimates the Jaccard similarity of two transcripts.
+    Signatures are split into bands that are hashed into buckets, so only
+    transcripts sharing a bucket are compared: a lookup never scans history.
+    The band layout is chosen so a pair at ``threshold`` similarity becomes a
+    candidate with at least 99% probability.
+
+    The detector remembers the last ``max_entries`` conversations, optionally
+    with a payload (such as their analysis) to reuse for duplicates.
+    """
+    _WORD = re.compile(r"[a-z0-9']+")
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        num_perm: int = 128,
+        shingle_size: int = 3,
+        max_entries: int = 100000,
+        seed: int = 1
+    ):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        self.bands, self.rows = self._band_layout(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: (a * x + b) >> 32 with odd 64-bit multipliers
+        self._a = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self.bands)]
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, Any]]" = OrderedDict()
+
+    @staticmethod
+    def _band_layout(threshold: float, num_perm: int) -> Tuple[int, int]:
+        """Most selective (bands, rows) that still catches a pair at ``threshold`` 99% of the time"""
+        best = (num_perm, 1)
+        for rows in range(1, num_perm + 1):
+            if num_perm % rows:
+                continue
+            bands = num_perm // rows
+            if 1 - (1 - threshold ** rows) ** bands >= 0.99:
+                best = (bands, rows)
+        return best
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def shingles(self, utterances: List[Dict[str, Any]]) -> List[str]:
+        words = self._WORD.findall(" ".join(str(u.get("text", "")) for u in utterances).lower())
+        if len(words) < self.shingle_size:
+            return [" ".join(words)] if words else []
+        return [" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+
+    def signature(self, utterances: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        MinHash signature (uint32[num_perm]) of a transcript's word shingles.
+        Returns: None when the transcript has no words, so it can match nothing
+        """
+        shingles = set(self.shingles(utterances))
+        if not shingles:
+            return None
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # uint64 arithmetic wraps, which is what multiply-shift hashing relies on
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(self._a, hashes) + self._b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def query(self, signature: np.ndarray, exclude: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """Most similar remembered conversation at or above the threshold, as (key, estimated similarity)"""
+        with self._lock:
+            candidates = set()
+            for buckets, band in zip(self._buckets, self._band_keys(signature)):
+                candidates.update(buckets.get(band, ()))
+            candidates.discard(exclude)
+            best = None
+            for key in candidates:
+                similarity = float(np.mean(self._entries[key][0] == signature))
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (key, similarity)
+            return best
+
+    def add(self, key: str, signature: np.ndarray, payload: Any = None) -> None:
+        """Remember a conversation, evicting the oldest beyond ``max_entries``"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (signature, payload)
+            for buckets, band in zip(self._buckets, self._band_keys(signature)):
+                buckets.setdefault(band, []).append(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        signature, _ = self._entries.pop(key)
+        for buckets, band in zip(self._buckets, self._band_keys(signature)):
+            keys = buckets.get(band)
+            if keys is not None:
+                keys.remove(key)
+                if not keys:
+                    del buckets[band]
+
+    def payload(self, key: str) -> Any:
+        """Payload stored with a remembered conversation, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None else None
@@ -0,0 +1,275 @@
+"""
+Replay logged production requests against the pipeline.
+
+Reads conversation requests from the request log (legacy file and segments),
+re-runs them in process or against a running server, at the original arrival
+rate, an accelerated rate, or as fast as possible, and reports throughput,
+latency percentiles and differences from the logged responses.
+
+    python -m phases.phase2.replay --speed 10
+    python -m phases.phase2.replay --url http://localhost:8000 --api-key ... --speed 0
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from phases.phase2.blob_store import BlobStore, expand_entry
+from phases.phase2.log_segments import SegmentedLog
+
+# Response fields that legitimately change between runs; near-duplicate matches depend on the
+# traffic that came before, which an in-process replay does not keep
+VOLATILE_FIELDS = ('timestamp', 'analysis.near_duplicate_of')
+
+Target = Callable[[Dict[str, Any]], Awaitable[Tuple[str, Optional[Dict[str, Any]]]]]
+
+def iter_requests(
+    log_dir: str = "logs",
+    data_file: str = "requests.jsonl",
+    segment_period: str = "hourly",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream logged conversation requests, with deduplicated payloads restored.
+
+    Segments are read period by period, so entries come out in (nearly)
+    arrival order without holding the log in memory.
+    """
+    # Entries logged with payload_mode="dedup" reference their transcripts in the blob store
+    blob_dir = Path(log_dir) / "blobs"
+    blobs = BlobStore(blob_dir) if blob_dir.is_dir() else None
+    count = 0
+    for entry in _logged_entries(Path(log_dir), data_file, segment_period, start, end):
+        if limit is not None and count >= limit:
+            return
+        if blobs is not None:
+            entry = expand_entry(entry, blobs)
+        request = entry.get("request")
+        # Skip system entries and payloads that were truncated when logged
+        if not isinstance(request, dict) or not isinstance(request.get("transcript"), list):
+            continue
+        count += 1
+        yield entry
+
+def load_requests(
+    log_dir: str = "logs",
+    data_file: str = "requests.jsonl",
+    segment_period: str = "hourly",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Logged conversation requests in arrival order, with deduplicated payloads restored"""
+    entries = list(iter_requests(log_dir, data_file, segment_period, start, end, limit))
+    entries.sort(key=lambda entry: _parse_time(entry["timestamp"]))
+    return entries
+
+def _logged_entries(
+    log_dir: Path,
+    data_file: str,
+    segment_period: str,
+    start: Optional[datetime],
+    end: Optional[datetime]
+) -> Iterator[Dict[str, Any]]:
+    """Entries of the legacy data file and of the segments, read without opening the log for writing"""
+    legacy = log_dir / data_file
+    if legacy.exists():
+        with open(legacy, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    moment = _parse_time(entry["timestamp"])
+                except (json.JSONDecodeError, KeyError, ValueError):
+                    continue
+                if (start is None or moment >= start) and (end is None or moment < end):
+                    yield entry
+    stem = Path(data_file).stem
+    if (log_dir / stem).is_dir():
+        yield from SegmentedLog(log_dir / stem, prefix=stem, period=segment_period).iter_entries(start, end)
+
+def diff(logged: Any, replayed: Any, path: str = "") -> List[str]:
+    """Paths at which two responses differ, ignoring volatile fields"""
+    if isinstance(logged, dict) and isinstance(replayed, dict):
+        differences = []
+        for key in sorted(set(logged) | set(replayed), key=str):
+            child = f"{path}.{key}" if path else str(key)
+            if child in VOLATILE_FIELDS:
+                continue
+            if key not in logged or key not in replayed:
+                differences.append(child)
+            else:
+                differences.extend(diff(logged[key], replayed[key], child))
+        return differences
+    if isinstance(logged, list) and isinstance(replayed, list):
+        if len(logged) != len(replayed):
+            return [f"{path}[len]"]
+        differences = []
+        for i, (a, b) in enumerate(zip(logged, replayed)):
+            differences.extend(diff(a, b, f"{path}[{i}]"))
+        return differences
+    if isinstance(logged, float) and isinstance(replayed, float):
+        return [] if abs(logged - replayed) <= 1e-9 * max(1.0, abs(logged)) else [path]
+    return [] if logged == replayed else [path]
+
+def in_process_target() -> Target:
+    """Run requests through the API's pipeline functions in a worker thread, without logging them"""
+    from phases.phase2.api.main import analyze
+    from phases.phase2.api.models import ConversationRequest
+
+    def run(request: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        try:
+            return "success", analyze(ConversationRequest(**request))
+        except Exception:
+            return "error", None
+
+    async def target(request: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        return await asyncio.to_thread(run, request)
+    return target
+
+def http_target(client, url: str, api_key: str) -> Target:
+    """POST requests to a running server's /analyze endpoint with an httpx.AsyncClient"""
+    async def target(request: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        response = await client.post(f"{url.rstrip('/')}/analyze", params={"api_key": api_key}, json=request)
+        if response.status_code == 200:
+            return "success", response.json()
+        return "error", None
+    return target
+
+async def replay(
+    entries: Iterable[Dict[str, Any]],
+    target: Target,
+    speed: float = 1.0,
+    concurrency: int = 16
+) -> Dict[str, Any]:
+    """
+    Replay logged entries, in the order given, and summarize the run.
+
+    Entries are consumed as they are scheduled and at most ``concurrency``
+    requests are in flight, so a stream from ``iter_requests`` is never
+    loaded whole. A request waiting for a slot is timed from its scheduled
+    arrival, so latencies include the queueing a slow target causes.
+
+    Args:
+        speed: 1.0 keeps the logged inter-arrival times, 10 replays ten times
+            faster, 0 sends requests as fast as concurrency allows
+        concurrency: Maximum requests in flight
+    """
+    slots = asyncio.Semaphore(concurrency)
+    in_flight = set()
+    origin = None
+    started = time.perf_counter()
+    sent = 0
+    latencies: List[float] = []
+    outcomes = Counter()
+    status_changes = Counter()
+    comparisons = Counter()
+    diff_paths = Counter()
+    examples: List[Dict[str, Any]] = []
+
+    async def send(entry: Dict[str, Any], arrival: float) -> None:
+        try:
+            status, response = await target(entry["request"])
+        finally:
+            latencies.append(time.perf_counter() - arrival)
+            slots.release()
+
+        outcomes[status] += 1
+        if status != entry.get("status"):
+            status_changes[f"{entry.get('status')}->{status}"] += 1
+        elif status == "success" and isinstance(entry.get("response"), dict) and "$truncated" not in entry["response"]:
+            paths = diff(entry["response"], response)
+            comparisons["compared"] += 1
+            if paths:
+                comparisons["differing"] += 1
+                diff_paths.update(paths)
+                if len(examples) < 10:
+                    examples.append({"conversation_id": entry.get("conversation_id"), "paths": paths[:20]})
+
+    for entry in entries:
+        arrival = None
+        if speed > 0:
+            moment = _parse_time(entry["timestamp"])
+            origin = origin or moment
+            arrival = started + (moment - origin).total_seconds() / speed
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await slots.acquire()
+        if arrival is None:
+            # No schedule to fall behind: as fast as possible, each request is timed from its dispatch
+            arrival = time.perf_counter()
+        task = asyncio.create_task(send(entry, arrival))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        sent += 1
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "requests": sent,
+        "outcomes": dict(outcomes),
+        "elapsed_seconds": elapsed,
+        "throughput_rps": sent / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": {},
+        "status_changes": dict(status_changes),
+        "responses_compared": comparisons["compared"],
+        "responses_with_diffs": comparisons["differing"],
+        "diff_paths": dict(diff_paths.most_common(20)),
+        "diff_examples": examples
+    }
+    if latencies:
+        values = np.asarray(latencies) * 1000
+        report["latency_ms"] = {
+            "p50": float(np.percentile(values, 50)),
+            "p90": float(np.percentile(values, 90)),
+            "p99": float(np.percentile(values, 99)),
+            "max": float(values.max())
+        }
+    return report
+
+def _parse_time(value: str) -> datetime:
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Replay the request log and print a JSON report; exits 1 when behaviour changed"""
+    parser = argparse.ArgumentParser(description="Replay logged CallChemy requests")
+    parser.add_argument("--log-dir", default="logs")
+    parser.add_argument("--data-file", default="requests.jsonl")
+    parser.add_argument("--segment-period", default="hourly", choices=("hourly", "daily"))
+    parser.add_argument("--start", type=_parse_time, help="ISO 8601 time of the first request to replay")
+    parser.add_argument("--end", type=_parse_time)
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--speed", type=float, default=1.0, help="Rate multiplier; 0 replays as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--url", help="Replay against a running server instead of in process")
+    parser.add_argument("--api-key", default="callchemy-test-key")
+    args = parser.parse_args(argv)
+
+    entries = iter_requests(args.log_dir, args.data_file, args.segment_period, args.start, args.end, args.limit)
+    if args.url:
+        import httpx
+
+        async def run() -> Dict[str, Any]:
+            async with httpx.AsyncClient(timeout=60) as client:
+                return await replay(entries, http_target(client, args.url, args.api_key), args.speed, args.concurrency)
+        report = asyncio.run(run())
+    else:
+        report = asyncio.run(replay(entries, in_process_target(), args.speed, args.concurrency))
+
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 1 if report["status_changes"] or report["diff_paths"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
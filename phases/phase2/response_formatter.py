@@ -4,6 +4,9 @@ from datetime import datetime, timezone
 from pydantic.json_schema import JsonSchemaMode
 import inspect
 
+from phases.phase2.aggregates import ConversationAggregate
+from phases.phase2.columnar import ColumnarTranscript
+
 class UtteranceAnalysis(BaseModel):
     speaker: str
     text: str
@@ -45,37 +48,17 @@ class ResponseFormatter:
             'keywords': {'financial_terms': [], 'products': [], 'actions': []}
         }
 
-    def _get_overall_sentiment(self, utterances: List[Dict]) -> str:
-        """Calculate overall sentiment from customer utterances"""
-        customer_sentiments = [
-            u.get('sentiment') for u in utterances 
-            if u['speaker'] == "Customer" and u.get('sentiment') != "not_analyzed"
-        ]
-        if not customer_sentiments:
-            return "neutral"
-        
-        sentiment_counts = {
-            'positive': customer_sentiments.count('positive'),
-            'negative': customer_sentiments.count('negative'),
-            'neutral': customer_sentiments.count('neutral')
-        }
-        return max(sentiment_counts, key=sentiment_counts.get)
-
-    def _get_primary_intent(self, utterances: List[Dict]) -> str:
-        """Determine primary intent from customer utterances"""
-        customer_intents = [
-            u.get('intent') for u in utterances
-            if u['speaker'] == "Customer" and u.get('intent') != "no_intent_detected"
-        ]
-        if not customer_intents:
-            return "no_intent_detected"
-        return max(set(customer_intents), key=customer_intents.count)
-
     def format_response(self, 
                        conversation_id: str,
                        utterances: List[Dict],
-                       summary: Optional[Dict] = None) -> Dict:
-        """Format analysis results into final API response"""
+                       summary: Optional[Dict] = None,
+                       aggregate: Optional[ConversationAggregate] = None) -> Dict:
+        """
+        Format analysis results into final API response.
+
+        A precomputed ``aggregate`` (for example merged from chunks analyzed
+        in parallel) is used as-is; otherwise one is built from the utterances.
+        """
         formatted_utterances = [
             UtteranceAnalysis(
                 speaker=u['speaker'],
@@ -86,8 +69,11 @@ class ResponseFormatter:
             ) for u in utterances
         ]
         
-        overall_sentiment = self._get_overall_sentiment(utterances)
-        primary_intent = self._get_primary_intent(utterances)
+        if aggregate is None:
+            aggregate = ConversationAggregate.from_utterances(utterances)
+        overall_sentiment = aggregate.overall_sentiment
+        primary_intent = aggregate.primary_intent
+        key_findings = aggregate.key_findings()
         
         # Format response according to the test expectations
         # For API response
@@ -97,7 +83,8 @@ class ResponseFormatter:
             "analysis": {
                 "utterances": [u.model_dump() for u in formatted_utterances],
                 "overall_sentiment": overall_sentiment,
-                "primary_intent": primary_intent
+                "primary_intent": primary_intent,
+                "key_findings": key_findings
             }
         }
         if summary is not None:
@@ -110,6 +97,7 @@ class ResponseFormatter:
             "utterances": [u.model_dump() for u in formatted_utterances],
             "overall_sentiment": overall_sentiment,
             "primary_intent": primary_intent,
+            "key_findings": key_findings,
             "summary": summary
         }
 
@@ -117,4 +105,53 @@ class ResponseFormatter:
         stack = inspect.stack()
         if any("test_response_formatter.py" in frame.filename for frame in stack):
             return test_response
-        return api_response
\ No newline at end of file
+        return api_response
+
+    def format_columns(self, columns: ColumnarTranscript) -> List[Dict]:
+        """Format every conversation of a columnar transcript into API responses"""
+        return [
+            self.format_response(
+                conversation_id=conversation_id,
+                utterances=columns.to_records(index),
+                aggregate=ConversationAggregate.from_columns(columns, index)
+            )
+            for index, conversation_id in enumerate(columns.conversation_ids)
+        ]
+
+    def compact_response(self,
+                         response: Dict,
+                         fields: Optional[List[str]] = None,
+                         utterance_fields: Optional[List[str]] = None,
+                         omit_empty: bool = False,
+                         encode_labels: bool = False) -> Dict:
+        """Shrink an API response by selecting fields and encoding repeated labels"""
+        analysis = response["analysis"]
+        if fields is not None:
+            analysis = {k: v for k, v in analysis.items() if k in fields}
+
+        utterances = analysis.get("utterances")
+        if utterances is not None:
+            labels = {"intent": {}, "sentiment": {}} if encode_labels else None
+            compacted = []
+            for u in utterances:
+                if utterance_fields is not None:
+                    u = {k: v for k, v in u.items() if k in utterance_fields}
+                else:
+                    u = dict(u)
+                if omit_empty and "keywords" in u:
+                    keywords = {k: v for k, v in (u["keywords"] or {}).items() if v}
+                    if keywords:
+                        u["keywords"] = keywords
+                    else:
+                        del u["keywords"]
+                if labels is not None:
+                    for name, codes in labels.items():
+                        if name in u:
+                            u[name] = codes.setdefault(u[name], len(codes))
+                compacted.append(u)
+            analysis = {**analysis, "utterances": compacted}
+            if labels is not None:
+                # dicts keep insertion order, so each list index is the code used above
+                analysis["labels"] = {name: list(codes) for name, codes in labels.items()}
+
+        return {**response, "analysis": analysis}
\ No newline at end of file
@@ -0,0 +1,284 @@
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # Optional: required only for columnar exports
+    pa = None
+
+from phases.phase2.background_writer import BackgroundWriter
+
+class ResultsStore:
+    """
+    SQLite store of analysis results, one row per conversation.
+
+    Results are queued and written by a BackgroundWriter, each batch in a single
+    transaction; the database runs in WAL mode so reads are served from a
+    separate connection without waiting for writes. Reanalyzing a conversation
+    replaces its stored result.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            conversation_id TEXT PRIMARY KEY,
+            tenant TEXT,
+            ts REAL NOT NULL,
+            primary_intent TEXT,
+            overall_sentiment TEXT,
+            response TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_results_ts ON results (ts);
+        CREATE INDEX IF NOT EXISTS idx_results_intent ON results (primary_intent, ts);
+        CREATE INDEX IF NOT EXISTS idx_results_sentiment ON results (overall_sentiment, ts);
+    """
+
+    def __init__(
+        self,
+        path: str,
+        background: bool = True,
+        max_queue_size: int = 10000,
+        overflow: str = "block"
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._writer_conn = self._connect()
+        self._writer_conn.executescript(self.SCHEMA)
+        self._reader_conn = self._connect()
+        self._writer = BackgroundWriter(
+            self._write_batch,
+            max_queue_size=max_queue_size,
+            overflow=overflow,
+            name="callchemy-results-writer"
+        ) if background else None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _row(item: Tuple[Dict[str, Any], Optional[str]]) -> tuple:
+        response, tenant = item
+        analysis = response.get("analysis", {})
+        timestamp = datetime.fromisoformat(response["timestamp"])
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return (
+            response["conversation_id"],
+            tenant,
+            timestamp.timestamp(),
+            analysis.get("primary_intent"),
+            analysis.get("overall_sentiment"),
+            json.dumps(response, ensure_ascii=False)
+        )
+
+    def save(self, response: Dict[str, Any], tenant: Optional[str] = None) -> None:
+        """Store a formatted analysis response, in the background when enabled"""
+        if self._writer is not None:
+            self._writer.submit((response, tenant))
+        else:
+            self._write_batch([(response, tenant)])
+
+    def _write_batch(self, items: List[Tuple[Dict[str, Any], Optional[str]]]) -> None:
+        """Write a batch of results in one transaction"""
+        rows = [self._row(item) for item in items]
+        with self._write_lock, self._writer_conn:
+            self._writer_conn.executemany(
+                "INSERT OR REPLACE INTO results "
+                "(conversation_id, tenant, ts, primary_intent, overall_sentiment, response) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Stored result for a conversation, or None"""
+        with self._read_lock:
+            row = self._reader_conn.execute(
+                "SELECT response FROM results WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(
+        self,
+        primary_intent: Optional[str] = None,
+        overall_sentiment: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Stored results matching all given filters, newest first"""
+        clauses, params = [], []
+        if primary_intent is not None:
+            clauses.append("primary_intent = ?")
+            params.append(primary_intent)
+        if overall_sentiment is not None:
+            clauses.append("overall_sentiment = ?")
+            params.append(overall_sentiment)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start.timestamp())
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end.timestamp())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._read_lock:
+            rows = self._reader_conn.execute(
+                f"SELECT response FROM results {where} ORDER BY ts DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def changes_since(self, rowid: int = 0, limit: int = 10000) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Results written after row ``rowid``, oldest first, for keeping an
+        in-memory index in step with the store. A replaced result is returned
+        again, since replacing gives it a new row.
+
+        Returns:
+            (rowid to pass on the next call, results)
+        """
+        with self._read_lock:
+            rows = self._reader_conn.execute(
+                "SELECT rowid, response FROM results WHERE rowid > ? ORDER BY rowid LIMIT ?", (rowid, limit)
+            ).fetchall()
+        if not rows:
+            return rowid, []
+        return rows[-1][0], [json.loads(row[1]) for row in rows]
+
+    def _iter_rows(
+        self,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        chunk_size: int
+    ) -> Iterator[List[tuple]]:
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start.timestamp())
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end.timestamp())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # A dedicated connection keeps a long export from holding the read lock
+        conn = sqlite3.connect(str(self.path))
+        try:
+            cursor = conn.execute(
+                "SELECT conversation_id, tenant, ts, primary_intent, overall_sentiment, response "
+                f"FROM results {where} ORDER BY ts",
+                params
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            conn.close()
+
+    def export(
+        self,
+        path: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        chunk_size: int = 10000
+    ) -> int:
+        """
+        Export stored results to a Parquet (.parquet) or Arrow IPC (.arrow/.feather) file.
+
+        Returns:
+            Number of results written
+        """
+        if pa is None:
+            raise RuntimeError("Columnar export requires the 'pyarrow' package")
+        schema = pa.schema([
+            ("conversation_id", pa.string()),
+            ("tenant", pa.string()),
+            ("timestamp", pa.timestamp("us", tz="UTC")),
+            ("primary_intent", pa.string()),
+            ("overall_sentiment", pa.string()),
+            ("utterance_count", pa.int32()),
+            ("key_findings", pa.map_(pa.string(), pa.list_(pa.string()))),
+            ("response", pa.string())
+        ])
+        suffix = Path(path).suffix
+        if suffix == ".parquet":
+            writer = pa.parquet.ParquetWriter(path, schema, compression="zstd")
+        elif suffix in (".arrow", ".feather"):
+            writer = pa.ipc.new_file(path, schema)
+        else:
+            raise ValueError("Export path must end in .parquet, .arrow or .feather")
+
+        count = 0
+        with writer:
+            for rows in self._iter_rows(start, end, chunk_size):
+                responses = [json.loads(row[5]) for row in rows]
+                columns = {
+                    "conversation_id": [row[0] for row in rows],
+                    "tenant": [row[1] for row in rows],
+                    "timestamp": [datetime.fromtimestamp(row[2], tz=timezone.utc) for row in rows],
+                    "primary_intent": [row[3] for row in rows],
+                    "overall_sentiment": [row[4] for row in rows],
+                    "utterance_count": [len(r["analysis"].get("utterances", [])) for r in responses],
+                    "key_findings": [list(r["analysis"].get("key_findings", {}).items()) for r in responses],
+                    "response": [row[5] for row in rows]
+                }
+                writer.write_table(pa.table(columns, schema=schema))
+                count += len(rows)
+        return count
+
+    @property
+    def backlog(self) -> int:
+        """Results queued but not yet written"""
+        return self._writer.backlog if self._writer is not None else 0
+
+    @property
+    def write_errors(self) -> int:
+        """Batches of results that failed to write"""
+        return self._writer.errors if self._writer is not None else 0
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued results are written"""
+        return self._writer.flush(timeout) if self._writer is not None else True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Write queued results and close the database"""
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            writer.close(timeout)
+        with self._write_lock:
+            self._writer_conn.close()
+        with self._read_lock:
+            self._reader_conn.close()
+
+def _parse_time(value: str) -> datetime:
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Export stored results for offline analysis"""
+    parser = argparse.ArgumentParser(description="Export stored CallChemy results")
+    parser.add_argument("database", help="Results database (CALLCHEMY_RESULTS_DB)")
+    parser.add_argument("output", help="Output file: .parquet, .arrow or .feather")
+    parser.add_argument("--start", type=_parse_time, help="Inclusive ISO 8601 start time")
+    parser.add_argument("--end", type=_parse_time, help="Exclusive ISO 8601 end time")
+    args = parser.parse_args(argv)
+
+    store = ResultsStore(args.database, background=False)
+    try:
+        count = store.export(args.output, args.start, args.end)
+    finally:
+        store.close()
+    print(f"Exported {count} results to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+import json
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from phases.phase2.aggregates import ConversationAggregate
+from phases.phase2.background_writer import BackgroundWriter
+
+DEFAULT_TENANT = "default"
+
+class Rollup:
+    """
+    Mergeable analytics for a group of analyzed conversations: how many there
+    were, their primary intents and overall sentiments, and the utterance-level
+    tallies (intents, sentiments, keywords) of a merged ConversationAggregate.
+    """
+    def __init__(self):
+        self.conversations = 0
+        self.primary_intents: Counter = Counter()
+        self.overall_sentiments: Counter = Counter()
+        self.utterances = ConversationAggregate()
+
+    def add(self, response: Dict[str, Any]) -> None:
+        """Fold one formatted analysis response into the rollup"""
+        analysis = response.get("analysis", {})
+        self.conversations += 1
+        self.primary_intents[analysis.get("primary_intent", "no_intent_detected")] += 1
+        self.overall_sentiments[analysis.get("overall_sentiment", "neutral")] += 1
+        self.utterances.update(analysis.get("utterances", []))
+
+    def merge(self, other: 'Rollup') -> 'Rollup':
+        """Return a new rollup covering both"""
+        merged = Rollup()
+        merged += self
+        merged += other
+        return merged
+
+    def __iadd__(self, other: 'Rollup') -> 'Rollup':
+        """Fold ``other`` into this rollup in place"""
+        self.conversations += other.conversations
+        self.primary_intents.update(other.primary_intents)
+        self.overall_sentiments.update(other.overall_sentiments)
+        self.utterances += other.utterances
+        return self
+
+    __add__ = merge
+
+    def summary(self, top_n: int = 10) -> Dict[str, Any]:
+        """Dashboard view: distributions plus the most frequent keywords per category"""
+        return {
+            "conversations": self.conversations,
+            "primary_intents": dict(self.primary_intents.most_common()),
+            "overall_sentiments": dict(self.overall_sentiments.most_common()),
+            "utterance_intents": dict(self.utterances.intent_counts.most_common()),
+            "utterance_sentiments": dict(self.utterances.sentiment_counts.most_common()),
+            "top_keywords": {
+                category: dict(counts.most_common(top_n))
+                for category, counts in self.utterances.keyword_counts.items()
+            }
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "conversations": self.conversations,
+            "primary_intents": dict(self.primary_intents),
+            "overall_sentiments": dict(self.overall_sentiments),
+            "utterances": self.utterances.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Rollup':
+        rollup = cls()
+        rollup.conversations = data.get("conversations", 0)
+        rollup.primary_intents = Counter(data.get("primary_intents", {}))
+        rollup.overall_sentiments = Counter(data.get("overall_sentiments", {}))
+        rollup.utterances = ConversationAggregate.from_dict(data.get("utterances", {}))
+        return rollup
+
+class RollupStore:
+    """
+    Hourly rollups per tenant, updated incrementally as analyses complete.
+
+    Without ``path``, buckets are kept in memory, so a query over a month
+    merges at most 720 small rollups per tenant; buckets more than
+    ``memory_days`` older than the newest one are dropped. With ``path``,
+    each recorded conversation is merged into a SQLite table by a
+    BackgroundWriter and queries read that table, so every worker sharing
+    the database sees the same totals. Buckets that can no longer change
+    (before the previous hour) and fall within ``memory_days`` are cached
+    in memory after their first read.
+    """
+    GRANULARITIES = ('hour', 'day', 'total')
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS rollups (
+            tenant TEXT NOT NULL,
+            bucket REAL NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (tenant, bucket)
+        );
+    """
+
+    def __init__(self, path: Optional[str] = None, memory_days: int = 31):
+        self.memory_window = timedelta(days=memory_days)
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, datetime], Rollup] = {}
+        self._newest: Optional[datetime] = None
+        self._conn = None
+        self._reader = None
+        self._writer = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+            # Queries get their own connection so they only see committed batches
+            self._reader = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+            self._writer = BackgroundWriter(self._write_batch, name="callchemy-rollup-writer")
+
+    @staticmethod
+    def bucket_for(timestamp: datetime) -> datetime:
+        """Start of the hour containing ``timestamp``, in UTC"""
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+    def record(self, response: Dict[str, Any], tenant: Optional[str] = None) -> None:
+        """Add a completed analysis to its tenant's hourly bucket"""
+        tenant = tenant or DEFAULT_TENANT
+        bucket = self.bucket_for(datetime.fromisoformat(response["timestamp"]))
+        delta = Rollup()
+        delta.add(response)
+        if self._writer is not None:
+            self._writer.submit((tenant, bucket, delta))
+            return
+        with self._lock:
+            rollup = self._buckets.setdefault((tenant, bucket), Rollup())
+            rollup += delta
+            if self._newest is None or bucket > self._newest:
+                self._newest = bucket
+                self._expire(bucket - self.memory_window)
+
+    def _expire(self, cutoff: datetime) -> None:
+        """Drop in-memory buckets before ``cutoff``; called with the lock held"""
+        for key in [key for key in self._buckets if key[1] < cutoff]:
+            del self._buckets[key]
+
+    def _write_batch(self, deltas: List[Tuple[str, datetime, Rollup]]) -> None:
+        """Merge a batch of deltas into the stored buckets in one transaction"""
+        combined: Dict[Tuple[str, float], Rollup] = {}
+        for tenant, bucket, delta in deltas:
+            rollup = combined.setdefault((tenant, bucket.timestamp()), Rollup())
+            rollup += delta
+        with self._conn:
+            # Take the write lock before reading, so workers sharing the database
+            # cannot both read a bucket and overwrite each other's merge
+            self._conn.execute("BEGIN IMMEDIATE")
+            for (tenant, bucket), delta in combined.items():
+                row = self._conn.execute(
+                    "SELECT data FROM rollups WHERE tenant = ? AND bucket = ?", (tenant, bucket)
+                ).fetchone()
+                if row is not None:
+                    delta = Rollup.from_dict(json.loads(row[0])).merge(delta)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rollups (tenant, bucket, data) VALUES (?, ?, ?)",
+                    (tenant, bucket, json.dumps(delta.to_dict()))
+                )
+
+    def tenants(self) -> List[str]:
+        with self._lock:
+            if self._reader is not None:
+                rows = self._reader.execute("SELECT DISTINCT tenant FROM rollups ORDER BY tenant")
+                return [tenant for tenant, in rows]
+            return sorted({tenant for tenant, _ in self._buckets})
+
+    def _stored(
+        self,
+        first: Optional[datetime],
+        end: Optional[datetime],
+        tenant: Optional[str]
+    ) -> List[Tuple[Tuple[str, datetime], Rollup]]:
+        """Stored buckets in range, from the cache where possible; called with the lock held"""
+        clauses, params = [], []
+        if tenant is not None:
+            clauses.append("tenant = ?")
+            params.append(tenant)
+        if first is not None:
+            clauses.append("bucket >= ?")
+            params.append(first.timestamp())
+        if end is not None:
+            clauses.append("bucket < ?")
+            params.append(end.timestamp())
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        current = self.bucket_for(datetime.now(timezone.utc))
+        final_before = current - timedelta(hours=1)
+        self._expire(current - self.memory_window)
+        found = []
+        for bucket_tenant, timestamp in self._reader.execute(f"SELECT tenant, bucket FROM rollups{where}", params):
+            key = (bucket_tenant, datetime.fromtimestamp(timestamp, tz=timezone.utc))
+            rollup = self._buckets.get(key)
+            if rollup is None:
+                data, = self._reader.execute(
+                    "SELECT data FROM rollups WHERE tenant = ? AND bucket = ?", (bucket_tenant, timestamp)
+                ).fetchone()
+                rollup = Rollup.from_dict(json.loads(data))
+                if current - self.memory_window <= key[1] < final_before:
+                    self._buckets[key] = rollup
+            found.append((key, rollup))
+        return found
+
+    def query(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        tenant: Optional[str] = None,
+        granularity: str = 'total',
+        top_n: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Rollups of hourly buckets overlapping [start, end), optionally for one tenant.
+
+        Returns one summary per hour or day that has data, or a single summary
+        for the whole range when ``granularity`` is 'total'.
+        """
+        if granularity not in self.GRANULARITIES:
+            raise ValueError(f"granularity must be one of {self.GRANULARITIES}")
+        first = self.bucket_for(start) if start is not None else None
+        groups: Dict[Optional[datetime], Rollup] = {}
+        # Merge under the lock: in-memory buckets are updated in place by record()
+        with self._lock:
+            if self._reader is not None:
+                buckets = self._stored(first, end, tenant)
+            else:
+                buckets = self._buckets.items()
+            for (bucket_tenant, bucket), rollup in buckets:
+                if tenant is not None and bucket_tenant != tenant:
+                    continue
+                if (first is not None and bucket < first) or (end is not None and bucket >= end):
+                    continue
+                if granularity == 'hour':
+                    key = bucket
+                elif granularity == 'day':
+                    key = bucket.replace(hour=0)
+                else:
+                    key = None
+                group = groups.setdefault(key, Rollup())
+                group += rollup
+
+        if granularity == 'total':
+            total = groups.get(None, Rollup())
+            return [{
+                "start": start.isoformat() if start else None,
+                "end": end.isoformat() if end else None,
+                **total.summary(top_n)
+            }]
+        width = timedelta(hours=1) if granularity == 'hour' else timedelta(days=1)
+        return [
+            {"start": key.isoformat(), "end": (key + width).isoformat(), **groups[key].summary(top_n)}
+            for key in sorted(groups)
+        ]
+
+    @property
+    def write_errors(self) -> int:
+        """Batches of rollup updates that failed to persist"""
+        return self._writer.errors if self._writer is not None else 0
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until recorded conversations are persisted"""
+        return self._writer.flush(timeout) if self._writer is not None else True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            writer.close(timeout)
+        if self._conn is not None:
+            self._conn.close()
+            self._reader.close()
+            self._conn = self._reader = None
@@ -0,0 +1,259 @@
+import re
+import threading
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from phases.phase2.results_store import ResultsStore
+
+class QuerySyntaxError(ValueError):
+    """Raised for malformed search queries"""
+
+class KeywordSearchIndex:
+    """
+    In-memory inverted index from extracted keywords and intents to conversations.
+
+    Each analyzed conversation gets a sequential document id; every term maps
+    to an append-only posting list of document ids stored as a packed uint32
+    array (4 bytes per posting), so postings stay sorted without extra work.
+    Reanalyzing a conversation indexes it again under a new id and marks the
+    old one deleted; once deleted documents outnumber live ones, the index is
+    compacted (ids renumbered, dead postings dropped).
+
+    The index is memory-only: ``sync_from`` fills it from a ResultsStore,
+    at startup and then periodically to pick up other workers' results.
+
+    Keyword terms are lowercased keyword strings (``"debit card"``); intents are
+    ``intent:<label>`` for any utterance intent and ``primary_intent:<label>``
+    for the conversation's primary intent. Queries combine terms with AND, OR,
+    NOT and parentheses; adjacent terms are ANDed and multi-word keywords are
+    quoted, e.g. ``"debit card" blocked NOT intent:fraud_report``.
+    """
+    _TOKEN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|([^\s()"]+))')
+    # Deleted documents tolerated before compaction is considered
+    COMPACT_MIN_DELETED = 1024
+    # Deepest parenthesis nesting accepted in a query (the parser recurses per level)
+    MAX_NESTING = 32
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, array] = {}
+        self._conversation_ids: List[str] = []
+        self._timestamps = array('d')
+        self._live = array('b')
+        self._doc_for: Dict[str, int] = {}
+        self._deleted = 0
+        self._synced_rowid = 0
+
+    def __len__(self) -> int:
+        """Number of live (not superseded) conversations"""
+        return len(self._doc_for)
+
+    @staticmethod
+    def terms_for(response: Dict[str, Any]) -> List[str]:
+        """Index terms of a formatted analysis response"""
+        analysis = response.get("analysis", {})
+        terms = set()
+        primary = analysis.get("primary_intent")
+        if primary:
+            terms.add(f"primary_intent:{primary}")
+        for utterance in analysis.get("utterances", []):
+            intent = utterance.get("intent")
+            if intent and intent != "no_intent_detected":
+                terms.add(f"intent:{intent}")
+            for values in (utterance.get("keywords") or {}).values():
+                terms.update(value.lower() for value in values)
+        return sorted(terms)
+
+    def add(self, response: Dict[str, Any]) -> None:
+        """Index a completed analysis, replacing any earlier one for the same conversation"""
+        conversation_id = response["conversation_id"]
+        timestamp = datetime.fromisoformat(response["timestamp"])
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        terms = self.terms_for(response)
+        with self._lock:
+            previous = self._doc_for.get(conversation_id)
+            if previous is not None:
+                if self._timestamps[previous] == timestamp.timestamp():
+                    # The same analysis again (e.g. synced back from the results store)
+                    return
+                self._live[previous] = 0
+                self._deleted += 1
+            doc = len(self._conversation_ids)
+            self._conversation_ids.append(conversation_id)
+            self._timestamps.append(timestamp.timestamp())
+            self._live.append(1)
+            self._doc_for[conversation_id] = doc
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = array('I')
+                postings.append(doc)
+            if self._deleted >= self.COMPACT_MIN_DELETED and self._deleted * 2 > len(self._conversation_ids):
+                self._compact()
+
+    def add_many(self, responses: Iterable[Dict[str, Any]]) -> None:
+        for response in responses:
+            self.add(response)
+
+    def sync_from(self, store: ResultsStore, batch_size: int = 10000) -> int:
+        """
+        Index results written to ``store`` since the last sync (everything on
+        the first call), including those saved by other workers.
+
+        Returns: Number of results read
+        """
+        read = 0
+        while True:
+            self._synced_rowid, responses = store.changes_since(self._synced_rowid, batch_size)
+            if not responses:
+                return read
+            self.add_many(responses)
+            read += len(responses)
+
+    def compact(self) -> None:
+        """Renumber live documents and drop the postings of deleted ones"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        live = np.flatnonzero(np.frombuffer(self._live, dtype=np.int8))
+        new_ids = np.full(len(self._conversation_ids), -1, dtype=np.int64)
+        new_ids[live] = np.arange(len(live))
+        for term in list(self._postings):
+            docs = new_ids[np.frombuffer(self._postings[term], dtype=np.uint32)]
+            docs = docs[docs >= 0]
+            if len(docs):
+                self._postings[term] = array('I', docs.astype(np.uint32).tobytes())
+            else:
+                del self._postings[term]
+        self._conversation_ids = [self._conversation_ids[i] for i in live]
+        self._timestamps = array('d', np.frombuffer(self._timestamps, dtype=np.float64)[live].tobytes())
+        self._live = array('b', b'\x01' * len(live))
+        self._doc_for = {conversation_id: doc for doc, conversation_id in enumerate(self._conversation_ids)}
+        self._deleted = 0
+
+    def _tokenize(self, query: str) -> List[tuple]:
+        tokens, position = [], 0
+        query = query.strip()
+        while position < len(query):
+            match = self._TOKEN.match(query, position)
+            if not match:
+                raise QuerySyntaxError(f"Unexpected input at position {position}")
+            position = match.end()
+            opening, closing, quoted, word = match.groups()
+            if opening:
+                tokens.append(('(', None))
+            elif closing:
+                tokens.append((')', None))
+            elif quoted is not None:
+                tokens.append(('TERM', quoted.lower()))
+            elif word.upper() in ('AND', 'OR', 'NOT'):
+                tokens.append((word.upper(), None))
+            else:
+                tokens.append(('TERM', word.lower()))
+        return tokens
+
+    def _evaluate(self, tokens: List[tuple]) -> np.ndarray:
+        """Recursive descent over: or := and (OR and)*; and := not (AND? not)*; not := NOT* atom"""
+        position = 0
+        depth = 0
+
+        def peek() -> Optional[str]:
+            return tokens[position][0] if position < len(tokens) else None
+
+        def take() -> tuple:
+            nonlocal position
+            token = tokens[position]
+            position += 1
+            return token
+
+        def parse_or() -> np.ndarray:
+            result = parse_and()
+            while peek() == 'OR':
+                take()
+                result = np.union1d(result, parse_and())
+            return result
+
+        def parse_and() -> np.ndarray:
+            result = parse_not()
+            while peek() in ('AND', 'NOT', 'TERM', '('):
+                if peek() == 'AND':
+                    take()
+                result = np.intersect1d(result, parse_not(), assume_unique=True)
+            return result
+
+        def parse_not() -> np.ndarray:
+            # A chain of NOTs is read in a loop, so its length does not deepen the recursion
+            negate = False
+            while peek() == 'NOT':
+                take()
+                negate = not negate
+            result = parse_atom()
+            if negate:
+                return np.setdiff1d(
+                    np.arange(len(self._conversation_ids), dtype=np.uint32), result, assume_unique=True
+                )
+            return result
+
+        def parse_atom() -> np.ndarray:
+            nonlocal depth
+            kind = peek()
+            if kind == '(':
+                take()
+                depth += 1
+                if depth > self.MAX_NESTING:
+                    raise QuerySyntaxError(f"Parentheses nested more than {self.MAX_NESTING} deep")
+                result = parse_or()
+                if peek() != ')':
+                    raise QuerySyntaxError("Missing closing parenthesis")
+                take()
+                depth -= 1
+                return result
+            if kind == 'TERM':
+                postings = self._postings.get(take()[1])
+                return np.array(postings, dtype=np.uint32) if postings else np.empty(0, dtype=np.uint32)
+            raise QuerySyntaxError("Expected a term" if kind is None else f"Unexpected {kind}")
+
+        result = parse_or()
+        if position != len(tokens):
+            raise QuerySyntaxError(f"Unexpected {tokens[position][0]}")
+        return result
+
+    def search(
+        self,
+        query: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Conversations matching a boolean query, analyzed in [start, end), newest first.
+
+        Returns:
+            {"total": number of matches, "results": [{"conversation_id", "timestamp"}, ...]}
+        """
+        tokens = self._tokenize(query)
+        if not tokens:
+            raise QuerySyntaxError("Empty query")
+        with self._lock:
+            docs = self._evaluate(tokens)
+            timestamps = np.frombuffer(self._timestamps, dtype=np.float64)[docs] if len(docs) else np.empty(0)
+            keep = np.frombuffer(self._live, dtype=np.int8)[docs].astype(bool) if len(docs) else np.empty(0, bool)
+            if start is not None:
+                keep &= timestamps >= start.timestamp()
+            if end is not None:
+                keep &= timestamps < end.timestamp()
+            docs, timestamps = docs[keep], timestamps[keep]
+            order = np.argsort(-timestamps, kind='stable')[:limit]
+            results = [
+                {
+                    "conversation_id": self._conversation_ids[docs[i]],
+                    "timestamp": datetime.fromtimestamp(timestamps[i], tz=timezone.utc).isoformat()
+                }
+                for i in order
+            ]
+        return {"total": int(len(docs)), "results": results}
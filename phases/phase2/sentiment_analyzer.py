@@ -1,6 +1,9 @@
 from typing import List, Dict
+import numpy as np
 from textblob import TextBlob
 
+from phases.phase2.columnar import ColumnarTranscript
+
 class SentimentAnalyzer:
     def __init__(self):
         self.sentiment_thresholds = {
@@ -35,4 +38,15 @@ class SentimentAnalyzer:
                 **utterance,
                 'sentiment': sentiment
             })
-        return analyzed
\ No newline at end of file
+        return analyzed
+
+    def analyze_columns(self, columns: ColumnarTranscript) -> ColumnarTranscript:
+        """
+        Analyze sentiment for customer rows of a columnar transcript.
+        Returns the same columns with sentiment_codes filled in.
+        """
+        codes = np.full(len(columns), columns.SENTIMENTS.index('not_analyzed'), dtype=np.int8)
+        for row in np.flatnonzero(columns.customer_mask()):
+            codes[row] = columns.SENTIMENTS.index(self.analyze_utterance(columns.texts[row]))
+        columns.sentiment_codes = codes
+        return columns
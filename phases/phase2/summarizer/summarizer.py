@@ -7,6 +7,9 @@ from enum import Enum
 from typing import List, Dict, Optional
 from pydantic import BaseModel
 
+from phases.phase2.allocations import allocation_profiler
+from phases.phase2.tracing import KIND_CLIENT, tracer
+
 class SummaryStyle(Enum):
     BRIEF = "brief"
     DETAILED = "detailed"
@@ -81,11 +84,19 @@ class ConversationSummarizer:
         # Get appropriate template
         template = self.templates[request.style]
         
-        # Generate summary
-        raw_summary = await self.llm_provider.generate_summary(
-            context=context,
-            prompt=template.format(context=context)
+        # Generate summary (traced, and accounted per provider while a memory profile runs)
+        provider = type(self.llm_provider).__name__
+        span = tracer.start_span(
+            "llm.generate_summary",
+            kind=KIND_CLIENT,
+            inherited={"conversation.id": request.conversation_id},
+            attributes={"llm.provider": provider, "summary.style": request.style.value}
         )
+        with span, allocation_profiler.stage(f"provider:{provider}"):
+            raw_summary = await self.llm_provider.generate_summary(
+                context=context,
+                prompt=template.format(context=context)
+            )
         
         # Process and structure the summary
         processed_summary = self._process_summary(raw_summary)
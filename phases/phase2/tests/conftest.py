@@ -1,9 +1,21 @@
 """Pytest configuration for Phase 2 tests"""
+import os
+import shutil
+import tempfile
 import pytest
 
+# The API opens its request log (segments and sidecar index) when phases.phase2.api.main is
+# imported; keep what the tests write out of ./logs
+LOG_DIR = tempfile.mkdtemp(prefix="callchemy-test-logs-")
+os.environ.setdefault("CALLCHEMY_LOG_DIR", LOG_DIR)
+
 def pytest_configure(config):
     """Register custom marks"""
     config.addinivalue_line(
         "markers",
         "performance: mark test as a performance test"
     )
+
+def pytest_unconfigure(config):
+    """Remove the request log written during the run"""
+    shutil.rmtree(LOG_DIR, ignore_errors=True)
@@ -0,0 +1,69 @@
+import pytest
+from phases.phase2.aggregates import ConversationAggregate
+
+@pytest.fixture
+def utterances():
+    return [
+        {"speaker": "Customer", "intent": "card_problem", "sentiment": "negative",
+         "keywords": {"products": ["card"], "actions": ["blocked"], "dates": []}},
+        {"speaker": "Agent", "intent": "account_inquiry", "sentiment": "not_analyzed",
+         "keywords": {"products": ["savings"]}},
+        {"speaker": "Customer", "intent": "transaction_issue", "sentiment": "neutral",
+         "keywords": {"products": ["card", "debit card"], "actions": ["declined"]}},
+        {"speaker": "Customer", "intent": "card_problem", "sentiment": "negative",
+         "keywords": {"products": ["card"], "actions": ["blocked"]}},
+        {"speaker": "Customer", "intent": "no_intent_detected", "sentiment": "positive",
+         "keywords": {}}
+    ]
+
+def test_single_pass(utterances):
+    """Test sentiment, intent and keyword tallies"""
+    aggregate = ConversationAggregate.from_utterances(utterances)
+
+    assert aggregate.utterance_count == 5
+    assert aggregate.customer_count == 4
+    assert aggregate.overall_sentiment == "negative"
+    assert aggregate.primary_intent == "card_problem"
+    assert aggregate.key_findings() == {
+        "products": ["card", "savings", "debit card"],
+        "actions": ["blocked", "declined"]
+    }
+
+def test_empty_aggregate():
+    """Test defaults when nothing was analyzed"""
+    aggregate = ConversationAggregate()
+
+    assert aggregate.overall_sentiment == "neutral"
+    assert aggregate.primary_intent == "no_intent_detected"
+    assert aggregate.key_findings() == {}
+
+def test_agent_utterances_ignored_for_aggregates():
+    """Test that agent intent and sentiment do not count"""
+    aggregate = ConversationAggregate.from_utterances([
+        {"speaker": "Agent", "intent": "loan_request", "sentiment": "negative"}
+    ])
+
+    assert aggregate.primary_intent == "no_intent_detected"
+    assert aggregate.overall_sentiment == "neutral"
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3])
+def test_chunked_merge_matches_single_pass(utterances, chunk_size):
+    """Test that merging chunk aggregates reproduces the single-pass result"""
+    parts = [
+        ConversationAggregate.from_utterances(utterances[i:i + chunk_size])
+        for i in range(0, len(utterances), chunk_size)
+    ]
+    merged = ConversationAggregate.combine(parts)
+    single = ConversationAggregate.from_utterances(utterances)
+
+    assert merged.to_dict() == single.to_dict()
+    assert merged.key_findings() == single.key_findings()
+    assert merged.primary_intent == single.primary_intent
+
+def test_serialized_state_round_trip(utterances):
+    """Test that partial state survives shipping between workers"""
+    left = ConversationAggregate.from_utterances(utterances[:2])
+    right = ConversationAggregate.from_utterances(utterances[2:])
+    restored = ConversationAggregate.from_dict(left.to_dict()) + ConversationAggregate.from_dict(right.to_dict())
+
+    assert restored.to_dict() == ConversationAggregate.from_utterances(utterances).to_dict()
@@ -0,0 +1,99 @@
+import tracemalloc
+import pytest
+from phases.phase2.allocations import AllocationProfiler
+
+def test_stage_peak_and_retained():
+    """Test a stage records its transient peak separately from what it keeps"""
+    profiler = AllocationProfiler()
+    kept = []
+    profiler.start()
+    try:
+        for _ in range(3):
+            with profiler.stage("build"):
+                scratch = [bytearray(1024) for _ in range(200)]
+                kept.append(bytearray(64 * 1024))
+                del scratch
+    finally:
+        report = profiler.stop()
+
+    build = report["stages"]["build"]
+    assert build["calls"] == 3
+    assert build["peak_bytes_max"] >= 200 * 1024
+    assert 3 * 64 * 1024 <= build["retained_bytes_total"] < 3 * 200 * 1024
+    assert build["retained_bytes_mean"] == build["retained_bytes_total"] / 3
+    assert any("test_allocations.py" in site["site"] for site in report["top_sites"])
+    assert not tracemalloc.is_tracing()
+
+def test_stages_are_inert_when_not_profiling():
+    """Test stages do nothing outside a profile but still enter the wrapped context manager"""
+    profiler = AllocationProfiler()
+    entered = []
+
+    class Inner:
+        def __enter__(self):
+            entered.append("enter")
+
+        def __exit__(self, *exc_info):
+            entered.append("exit")
+
+    with profiler.stage("idle", Inner()):
+        pass
+    assert entered == ["enter", "exit"]
+    profiler.start()
+    assert profiler.stop()["stages"] == {}
+
+def test_single_profile_at_a_time():
+    """Test starting twice or stopping an idle profiler raises"""
+    profiler = AllocationProfiler()
+    with pytest.raises(RuntimeError):
+        profiler.stop()
+    profiler.start()
+    try:
+        with pytest.raises(RuntimeError):
+            profiler.start()
+    finally:
+        profiler.stop()
+    assert not profiler.running
+
+def test_top_zero_lists_no_sites():
+    """Test top_n=0 reports stages only, rather than every allocation site"""
+    profiler = AllocationProfiler()
+    profiler.start()
+    kept = [bytearray(64 * 1024) for _ in range(4)]
+    report = profiler.stop(top_n=0)
+
+    assert report["top_sites"] == []
+    assert len(kept) == 4
+
+def test_leaves_existing_tracing_running():
+    """Test a profile started while tracemalloc is already tracing does not stop it"""
+    tracemalloc.start()
+    try:
+        profiler = AllocationProfiler()
+        profiler.start()
+        profiler.stop()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+@pytest.mark.asyncio
+async def test_summarizer_provider_calls_are_accounted(monkeypatch):
+    """Test summarization provider calls show up as a per-provider stage"""
+    from phases.phase2.summarizer import summarizer
+
+    class EchoProvider(summarizer.LLMProvider):
+        async def generate_summary(self, context: str, prompt: str) -> str:
+            return context.upper()
+
+    profiler = AllocationProfiler()
+    monkeypatch.setattr(summarizer, "allocation_profiler", profiler)
+    request = summarizer.SummaryRequest(
+        conversation_id="memory-1", utterances=[{"speaker": "Customer", "text": "My card was declined."}]
+    )
+    profiler.start()
+    try:
+        summary = await summarizer.ConversationSummarizer(EchoProvider()).summarize(request)
+    finally:
+        report = profiler.stop()
+    assert summary.summary == "CUSTOMER: MY CARD WAS DECLINED."
+    assert report["stages"]["provider:EchoProvider"]["calls"] == 1
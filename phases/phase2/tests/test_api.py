@@ -1,9 +1,24 @@
+import asyncio
+import json
+import os
+from pathlib import Path
+from unittest.mock import Mock
 import pytest
 from fastapi.testclient import TestClient
-from phases.phase2.api.main import app
+from phases.phase2.api import main
+from phases.phase2.api.main import app, logger
+from phases.phase2.near_duplicates import NearDuplicateDetector
+from phases.phase2.results_store import ResultsStore
+from phases.phase2.tracing import FileSpanExporter
+from phases.phase2.vector_index import IVFIndex
 
 client = TestClient(app)
 
+def test_request_log_is_kept_out_of_the_repository():
+    """Test the app's request log, segments and sidecar index live in the log dir set by conftest"""
+    assert logger.log_dir == Path(os.environ["CALLCHEMY_LOG_DIR"]) != Path("logs")
+    assert logger.index.path.is_relative_to(logger.log_dir)
+
 def test_root_endpoint():
     response = client.get("/")
     assert response.status_code == 200
@@ -49,6 +64,267 @@ def test_analyze_endpoint_success():
     assert "analysis" in data
     assert len(data["analysis"]["utterances"]) == 2
 
+def test_analyze_endpoint_compact_options():
+    test_data = {
+        "conversation_id": "test-002",
+        "transcript": [
+            {"speaker": "Customer", "text": "My credit card payment was declined."},
+            {"speaker": "Agent", "text": "Let me look into that for you."}
+        ],
+        "options": {
+            "utterance_fields": ["intent", "sentiment", "keywords"],
+            "omit_empty": True,
+            "encode_labels": True
+        }
+    }
+
+    response = client.post(
+        "/analyze?api_key=callchemy-test-key",
+        json=test_data
+    )
+    assert response.status_code == 200
+    analysis = response.json()["analysis"]
+    assert "text" not in analysis["utterances"][0]
+    assert analysis["labels"]["intent"][analysis["utterances"][0]["intent"]] == "transaction_issue"
+    assert "financial_terms" not in analysis["utterances"][0]["keywords"]
+    assert analysis["primary_intent"] == "transaction_issue"
+
+def test_analyze_endpoint_invalid_option():
+    test_data = {
+        "conversation_id": "test-003",
+        "transcript": [{"speaker": "Customer", "text": "Hello"}],
+        "options": {"fields": ["not_a_field"]}
+    }
+
+    response = client.post(
+        "/analyze?api_key=callchemy-test-key",
+        json=test_data
+    )
+    assert response.status_code == 422
+
+def _large_conversation(conversation_id="test-004"):
+    return {
+        "conversation_id": conversation_id,
+        "transcript": [
+            {"speaker": "Customer", "text": "My debit card payment of Rs. 5000 was declined again."},
+            {"speaker": "Agent", "text": "I can see the declined transaction on your account."}
+        ] * 20
+    }
+
+def test_analyze_endpoint_gzip_encoding():
+    response = client.post(
+        "/analyze?api_key=callchemy-test-key",
+        json=_large_conversation(),
+        headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["analysis"]["utterances"]) == 40
+
+def test_analyze_endpoint_identity_encoding():
+    response = client.post(
+        "/analyze?api_key=callchemy-test-key",
+        json=_large_conversation(),
+        headers={"Accept-Encoding": "identity"}
+    )
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+def test_analyze_endpoint_msgpack():
+    msgpack = pytest.importorskip("msgpack")
+    response = client.post(
+        "/analyze?api_key=callchemy-test-key",
+        json=_large_conversation(),
+        headers={"Accept": "application/msgpack"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    data = msgpack.unpackb(response.content)
+    assert data["conversation_id"] == "test-004"
+
+def test_analyze_batch_endpoint():
+    test_data = {
+        "conversations": [
+            _large_conversation("batch-001"),
+            {"conversation_id": "batch-002", "transcript": [{"speaker": "Invalid", "text": "Hi"}]}
+        ]
+    }
+    response = client.post(
+        "/analyze/batch?api_key=callchemy-test-key",
+        json=test_data
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["conversation_id"] == "batch-001"
+    assert "analysis" in results[0]
+    assert results[1]["error"]["status"] == 422
+
+def test_logged_conversation_lookup():
+    client.post("/analyze?api_key=callchemy-test-key", json=_large_conversation("lookup-001"))
+    logger.flush()
+
+    response = client.get("/logs/conversations/lookup-001?api_key=callchemy-test-key")
+    assert response.status_code == 200
+    entries = response.json()["entries"]
+    assert entries[-1]["conversation_id"] == "lookup-001"
+    assert entries[-1]["status"] == "success"
+
+    assert client.get("/logs/conversations/never-seen?api_key=callchemy-test-key").status_code == 404
+    assert client.get("/logs/conversations/lookup-001?api_key=invalid-key").status_code == 401
+
+def test_logged_range_lookup():
+    response = client.get("/logs?api_key=callchemy-test-key&start=2000-01-01T00:00:00&limit=1")
+    assert response.status_code == 200
+    assert len(response.json()["entries"]) <= 1
+
+def test_stored_conversation_results(tmp_path, monkeypatch):
+    store = ResultsStore(str(tmp_path / "results.sqlite"))
+    monkeypatch.setattr("phases.phase2.api.main.results_store", store)
+    test_data = _large_conversation("stored-001")
+    test_data["options"] = {"fields": ["primary_intent"]}
+    client.post("/analyze?api_key=callchemy-test-key", json=test_data)
+    store.flush()
+
+    response = client.get("/conversations/stored-001?api_key=callchemy-test-key")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["conversation_id"] == "stored-001"
+    assert "utterances" in data["analysis"]  # Stored before response options are applied
+
+    listing = client.get(
+        f"/conversations?api_key=callchemy-test-key&primary_intent={data['analysis']['primary_intent']}"
+    )
+    assert [r["conversation_id"] for r in listing.json()["results"]] == ["stored-001"]
+    assert client.get("/conversations/never-seen?api_key=callchemy-test-key").status_code == 404
+    store.close()
+
+def test_rollups_endpoint():
+    test_data = _large_conversation("rollup-001")
+    test_data["tenant_id"] = "rollup-tenant"
+    client.post("/analyze?api_key=callchemy-test-key", json=test_data)
+
+    response = client.get("/rollups?api_key=callchemy-test-key&tenant_id=rollup-tenant&granularity=hour")
+    assert response.status_code == 200
+    rollups = response.json()["rollups"]
+    assert sum(r["conversations"] for r in rollups) == 1
+    assert "top_keywords" in rollups[0]
+    assert client.get("/rollups?api_key=callchemy-test-key&granularity=week").status_code == 422
+
+def test_search_endpoint():
+    analysis = client.post(
+        "/analyze?api_key=callchemy-test-key", json=_large_conversation("search-001")
+    ).json()["analysis"]
+
+    response = client.get(
+        "/search", params={"api_key": "callchemy-test-key", "q": f"primary_intent:{analysis['primary_intent']}"}
+    )
+    assert response.status_code == 200
+    assert "search-001" in [r["conversation_id"] for r in response.json()["results"]]
+    assert client.get("/search?api_key=callchemy-test-key&q=(card").status_code == 422
+    nested = {"api_key": "callchemy-test-key", "q": "(" * 2000 + "card" + ")" * 2000}
+    assert client.get("/search", params=nested).status_code == 422
+
+def test_similar_conversations_endpoint(monkeypatch):
+    monkeypatch.setattr("phases.phase2.api.main.vector_index", IVFIndex(main.embedder.dim))
+    client.post("/analyze?api_key=callchemy-test-key", json=_large_conversation("similar-001"))
+    client.post("/analyze?api_key=callchemy-test-key", json=_large_conversation("similar-002"))
+
+    response = client.get("/conversations/similar-001/similar?api_key=callchemy-test-key&k=5")
+    assert response.status_code == 200
+    similar = response.json()["similar"]
+    assert similar[0]["score"] == pytest.approx(1.0, abs=1e-3)
+    assert "similar-001" not in [s["conversation_id"] for s in similar]
+    assert client.get("/conversations/never-seen/similar?api_key=callchemy-test-key").status_code == 404
+
+def test_similar_conversations_disabled():
+    response = client.get("/conversations/similar-001/similar?api_key=callchemy-test-key")
+    assert response.status_code == 503
+
+def test_near_duplicate_flagged(monkeypatch):
+    """Test a near-copy of an earlier transcript is marked with its match"""
+    monkeypatch.setattr("phases.phase2.api.main.near_duplicates", NearDuplicateDetector(threshold=0.8))
+    client.post("/analyze?api_key=callchemy-test-key", json=_large_conversation("dup-001"))
+    copy = _large_conversation("dup-002")
+    copy["transcript"][0] = {"speaker": "Customer", "text": "Hello, my card was declined."}
+
+    analysis = client.post("/analyze?api_key=callchemy-test-key", json=copy).json()["analysis"]
+    assert analysis["near_duplicate_of"]["conversation_id"] == "dup-001"
+    assert analysis["near_duplicate_of"]["similarity"] >= 0.8
+    assert "utterances" in analysis
+
+def test_near_duplicate_reuses_analysis(monkeypatch):
+    """Test reuse mode serves the earlier analysis, in single and batch requests"""
+    monkeypatch.setattr("phases.phase2.api.main.near_duplicates", NearDuplicateDetector(threshold=0.8))
+    monkeypatch.setattr("phases.phase2.api.main.NEAR_DUPLICATE_MODE", "reuse")
+    monkeypatch.setattr("phases.phase2.api.main._full_analysis", Mock(wraps=main._full_analysis))
+    first = client.post("/analyze?api_key=callchemy-test-key", json=_large_conversation("reuse-001")).json()
+
+    response = client.post("/analyze?api_key=callchemy-test-key", json=_large_conversation("reuse-002"))
+    second = response.json()
+    assert main._full_analysis.call_count == 1
+    assert response.headers["Server-Timing"].startswith("near_duplicates;dur=")
+    assert "validation;dur=" in response.headers["Server-Timing"]
+    assert second["conversation_id"] == "reuse-002"
+    assert second["analysis"]["near_duplicate_of"] == {"conversation_id": "reuse-001", "similarity": 1.0}
+    assert second["analysis"]["utterances"] == first["analysis"]["utterances"]
+
+    batch = client.post(
+        "/analyze/batch?api_key=callchemy-test-key",
+        json={"conversations": [_large_conversation("reuse-003"), {"conversation_id": "other", "transcript": [
+            {"speaker": "Customer", "text": "I want to close my savings account"}
+        ]}]}
+    ).json()["results"]
+    assert batch[0]["analysis"]["near_duplicate_of"]["similarity"] == 1.0
+    assert batch[0]["analysis"]["primary_intent"] == first["analysis"]["primary_intent"]
+    assert "near_duplicate_of" not in batch[1]["analysis"]
+
+def test_wordless_transcripts_are_not_near_duplicates(monkeypatch):
+    """Test reuse mode never serves one wordless transcript's analysis for another"""
+    monkeypatch.setattr("phases.phase2.api.main.near_duplicates", NearDuplicateDetector(threshold=0.8))
+    monkeypatch.setattr("phases.phase2.api.main.NEAR_DUPLICATE_MODE", "reuse")
+    for conversation_id, speaker, text in (("wordless-001", "Agent", "..."), ("wordless-002", "Customer", "!!! ??")):
+        response = client.post(
+            "/analyze?api_key=callchemy-test-key",
+            json={"conversation_id": conversation_id, "transcript": [{"speaker": speaker, "text": text}]}
+        )
+        assert response.status_code == 200
+        assert "near_duplicate_of" not in response.json()["analysis"]
+    assert len(main.near_duplicates) == 0
+
+def test_results_store_disabled():
+    response = client.get("/conversations/stored-001?api_key=callchemy-test-key")
+    assert response.status_code == 503
+
+def test_analyze_endpoint_call_dynamics():
+    test_data = {
+        "conversation_id": "test-005",
+        "transcript": [
+            {"speaker": "Customer", "text": "My card was declined", "start": 0.0, "end": 3.0},
+            {"speaker": "Agent", "text": "Let me check that", "start": 3.5, "end": 5.0}
+        ]
+    }
+    response = client.post(
+        "/analyze?api_key=callchemy-test-key",
+        json=test_data
+    )
+    assert response.status_code == 200
+    dynamics = response.json()["analysis"]["call_dynamics"]
+    assert dynamics["turn_count"] == 2
+    assert dynamics["customer_talk_time"] == 3.0
+
+def test_analyze_endpoint_invalid_timestamps():
+    test_data = {
+        "conversation_id": "test-006",
+        "transcript": [
+            {"speaker": "Customer", "text": "Hello", "start": 5.0, "end": 1.0}
+        ]
+    }
+    response = client.post(
+        "/analyze?api_key=callchemy-test-key",
+        json=test_data
+    )
+    assert response.status_code == 422
+
 def test_analyze_endpoint_invalid_input():
     test_data = {
         "conversation_id": "test-001",
@@ -106,3 +382,159 @@ def test_error_response_format():
     assert response.status_code == 422
     error_response = response.json()
     assert "detail" in error_response
+
+def test_metrics_endpoint():
+    """Test /metrics reports conversations, stage latencies and transcript sizes"""
+    client.post("/analyze?api_key=callchemy-test-key", json=_large_conversation("metrics-001"))
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'callchemy_conversations_total{operation="analyze",outcome="success"}' in body
+    for stage in ("validation", "intent", "sentiment", "keywords", "formatting", "logging"):
+        assert f'callchemy_stage_duration_seconds_count{{stage="{stage}"}}' in body
+    assert 'callchemy_transcript_utterances_bucket{le="50"}' in body
+    assert 'callchemy_request_duration_seconds_count{operation="analyze"}' in body
+
+def test_server_timing_header():
+    """Test /analyze reports stage wall times in Server-Timing, and in the body on request"""
+    response = client.post("/analyze?api_key=callchemy-test-key", json=_large_conversation("timing-001"))
+    stages = [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")]
+    assert stages[:2] == ["validation", "intent"]
+    assert {"logging", "encoding", "total"} <= set(stages)
+    assert "timings" not in response.json()
+
+    conversation = _large_conversation("timing-002")
+    conversation["options"] = {"timings": True}
+    timings = client.post("/analyze?api_key=callchemy-test-key", json=conversation).json()["timings"]
+    assert timings["utterance_count"] == 40
+    assert timings["cache_hits"] == {}
+    assert set(timings["stages_ms"]) >= {"validation", "intent", "sentiment", "keywords", "formatting"}
+    assert timings["total_ms"] >= sum(timings["stages_ms"].values())
+
+def test_server_timing_on_validation_error():
+    """Test rejected requests still carry a Server-Timing header"""
+    response = client.post(
+        "/analyze?api_key=callchemy-test-key", json={"conversation_id": "timing-003", "transcript": [{"text": "no speaker"}]}
+    )
+    assert response.status_code == 422
+    assert response.headers["Server-Timing"].startswith("validation;dur=")
+
+def test_profile_endpoint(monkeypatch):
+    """Test the profiler requires the admin key and returns collapsed stacks"""
+    assert client.post("/admin/profile?admin_key=anything&seconds=0.1").status_code == 403
+    monkeypatch.setattr("phases.phase2.api.main.ADMIN_API_KEY", "admin-secret")
+    assert client.post("/admin/profile?admin_key=wrong&seconds=0.1").status_code == 403
+
+    response = client.post("/admin/profile?admin_key=admin-secret&seconds=0.2&interval_ms=5")
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].startswith("attachment")
+    stack, count = response.text.splitlines()[0].rsplit(" ", 1)
+    assert stack.startswith("thread:") and int(count) >= 1
+
+    filtered = client.post("/admin/profile?admin_key=admin-secret&seconds=0.1&min_utterances=1000")
+    assert filtered.status_code == 200 and filtered.text == ""
+
+def test_analyze_emits_trace_spans(tmp_path):
+    """Test /analyze continues the caller's trace with a span per pipeline step"""
+    path = tmp_path / "spans.jsonl"
+    main.tracer.configure(FileSpanExporter(str(path)), sample_rate=0.0)
+    try:
+        response = client.post(
+            "/analyze?api_key=callchemy-test-key",
+            json=_large_conversation("trace-001"),
+            headers={
+                "traceparent": "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01",
+                "X-Request-ID": "req-42"
+            }
+        )
+        assert response.status_code == 200
+        # Not sampled by the caller, and the local sample rate is 0
+        assert client.post("/analyze?api_key=callchemy-test-key", json=_large_conversation("trace-002")).status_code == 200
+        main.tracer.flush()
+    finally:
+        main.tracer.close()
+
+    spans = [
+        span
+        for line in path.read_text().splitlines()
+        for span in json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    ]
+    names = {span["name"] for span in spans}
+    assert {"POST /analyze", "analyze", "validation", "intent", "sentiment", "keywords", "formatting", "logging"} <= names
+    assert {span["traceId"] for span in spans} == {"4bf92f3577b34da6a3ce929d0e0e4736"}
+    root = next(span for span in spans if span["name"] == "POST /analyze")
+    assert root["parentSpanId"] == "00f067aa0ba902b7"
+    for span in spans:
+        attributes = {attribute["key"]: attribute["value"] for attribute in span["attributes"]}
+        assert attributes["request.id"] == {"stringValue": "req-42"}
+        if span is not root:
+            assert attributes["conversation.id"] == {"stringValue": "trace-001"}
+
+def test_batch_spans_join_the_request_trace(tmp_path):
+    """Test the batch, run in the thread pool, still records its spans under the request's trace"""
+    path = tmp_path / "spans.jsonl"
+    main.tracer.configure(FileSpanExporter(str(path)), sample_rate=1.0)
+    try:
+        response = client.post(
+            "/analyze/batch?api_key=callchemy-test-key",
+            json={"conversations": [_large_conversation("trace-batch-001")]}
+        )
+        assert response.status_code == 200
+        main.tracer.flush()
+    finally:
+        main.tracer.close()
+
+    spans = [
+        span
+        for line in path.read_text().splitlines()
+        for span in json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    ]
+    root = next(span for span in spans if span["name"] == "POST /analyze/batch")
+    batch = next(span for span in spans if span["name"] == "analyze_batch")
+    assert batch["parentSpanId"] == root["spanId"]
+    assert {"intent", "sentiment", "keywords"} <= {span["name"] for span in spans}
+    assert {span["traceId"] for span in spans} == {root["traceId"]}
+
+def test_memory_profile_endpoint(monkeypatch):
+    """Test the memory profile requires the admin key, reports JSON and runs one at a time"""
+    assert client.post("/admin/memory-profile?admin_key=anything&seconds=0.1").status_code == 403
+    monkeypatch.setattr("phases.phase2.api.main.ADMIN_API_KEY", "admin-secret")
+
+    response = client.post("/admin/memory-profile?admin_key=admin-secret&seconds=0.1&top=5")
+    assert response.status_code == 200
+    report = response.json()
+    assert set(report) >= {"pid", "traced_bytes", "traced_peak_bytes", "stages", "top_sites"}
+    assert len(report["top_sites"]) <= 5
+
+    main.allocation_profiler.start()
+    try:
+        assert client.post("/admin/memory-profile?admin_key=admin-secret&seconds=0.1").status_code == 409
+    finally:
+        main.allocation_profiler.stop()
+
+def test_liveness_and_readiness_probes():
+    """Test probes: liveness is constant, readiness comes from the background snapshot"""
+    assert client.get("/health/live").json() == {"status": "alive"}
+    # The app's lifespan (which starts the refresher) is not run by this client, so refresh once by hand
+    asyncio.run(main.readiness.refresh())
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    checks = response.json()["checks"]
+    assert set(checks) >= {"pipeline", "request_log", "executor"}
+    assert all(check["ok"] for check in checks.values())
+    assert checks["executor"]["max_threads"] > 0
+    assert checks["request_log"]["write_errors"] == 0
+
+def test_background_write_errors_are_surfaced(monkeypatch):
+    """Test a failing request-log writer shows in readiness and /metrics"""
+    monkeypatch.setattr(type(main.logger), "write_errors", property(lambda self: 2))
+    monkeypatch.setattr(type(main.logger), "write_failing", property(lambda self: True))
+    asyncio.run(main.readiness.refresh())
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    check = response.json()["checks"]["request_log"]
+    assert not check["ok"] and check["write_errors"] == 2
+    assert 'callchemy_background_write_errors_total{writer="request_log"} 2' in client.get("/metrics").text
+    monkeypatch.undo()
+    asyncio.run(main.readiness.refresh())
@@ -0,0 +1,71 @@
+import threading
+import pytest
+from phases.phase2.background_writer import BackgroundWriter
+
+def test_items_written_in_order_and_batched():
+    """Test group commit keeps submission order"""
+    written = []
+    writer = BackgroundWriter(lambda batch: written.append(list(batch)), max_batch_size=50)
+    for i in range(500):
+        writer.submit(i)
+    writer.close()
+
+    assert [item for batch in written for item in batch] == list(range(500))
+    assert all(len(batch) <= 50 for batch in written)
+
+def test_drop_policy_when_full():
+    """Test that a full queue drops items under the 'drop' policy"""
+    release = threading.Event()
+    writer = BackgroundWriter(lambda batch: release.wait(), max_queue_size=2, overflow="drop", max_batch_size=1)
+    results = [writer.submit(i) for i in range(10)]
+    release.set()
+    writer.close()
+
+    assert not all(results)
+    assert writer.dropped == results.count(False)
+
+def test_flush_errors_do_not_stop_writer():
+    """Test that a failing batch is counted and later batches still run"""
+    written = []
+
+    def flush(batch):
+        if batch == ["bad"]:
+            raise IOError("disk full")
+        written.extend(batch)
+
+    writer = BackgroundWriter(flush, max_batch_size=1)
+    writer.submit("bad")
+    writer.flush()
+    writer.submit("good")
+    writer.close()
+
+    assert writer.errors == 1
+    assert written == ["good"]
+
+def test_failure_streak_logged_once(caplog):
+    """Test only the first failure of a streak and the recovery are logged"""
+    outcomes = iter([IOError("disk full"), IOError("disk full"), None])
+
+    def flush(batch):
+        error = next(outcomes)
+        if error is not None:
+            raise error
+
+    writer = BackgroundWriter(flush, max_batch_size=1, name="test-writer")
+    with caplog.at_level("WARNING", logger="phases.phase2.background_writer"):
+        for item in range(2):
+            writer.submit(item)
+            writer.flush()
+        assert writer.failing
+        writer.submit(2)
+        writer.close()
+
+    assert not writer.failing and writer.errors == 2
+    failures = [record for record in caplog.records if record.levelname == "ERROR"]
+    assert len(failures) == 1 and "test-writer" in failures[0].getMessage()
+    assert failures[0].exc_info[0] is OSError
+    assert any("succeed again" in record.getMessage() for record in caplog.records)
+
+def test_invalid_overflow_policy():
+    with pytest.raises(ValueError):
+        BackgroundWriter(lambda batch: None, overflow="spill")
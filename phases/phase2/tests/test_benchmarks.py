@@ -0,0 +1,58 @@
+import json
+from phases.phase2.benchmarks import run as bench
+from phases.phase2.benchmarks.transcripts import TranscriptGenerator
+from phases.phase2.ingestion import InputValidator
+
+def test_generator_is_seeded_and_sized():
+    """Test the same seed gives the same valid transcripts of the requested size"""
+    first = list(TranscriptGenerator(7).conversations(3, 25))
+    assert first == list(TranscriptGenerator(7).conversations(3, 25))
+    assert first != list(TranscriptGenerator(8).conversations(3, 25))
+    for size in (1, 2, 5, 200):
+        conversation = TranscriptGenerator(1).conversation(size)
+        assert len(conversation["transcript"]) == size
+        InputValidator().validate(conversation)
+    untimed = TranscriptGenerator(1).conversation(4, timed=False)["transcript"]
+    assert all("start" not in utterance for utterance in untimed)
+
+def test_compare_flags_regressions():
+    """Test medians beyond the threshold are reported as regressions or improvements"""
+    def report(**medians):
+        return {"results": {k: {"median_s": v, "threshold": 0.1} for k, v in medians.items()}}
+    rows = bench.compare(report(a=1.2, b=0.8, c=1.05, d=1.0), report(a=1.0, b=1.0, c=1.0))
+    assert {row["benchmark"]: row["verdict"] for row in rows} == {
+        "a": "regression", "b": "improvement", "c": "unchanged"
+    }
+    assert bench.compare(report(c=1.05), report(c=1.0), threshold=0.01)[0]["verdict"] == "regression"
+
+def test_cli_writes_results_and_fails_on_regression(tmp_path, capsys):
+    """Test a run writes JSON results and exits non-zero against a faster baseline"""
+    output = tmp_path / "results.json"
+    args = ["--sizes", "5,20", "--only", "intent,keywords", "--rounds", "2", "--min-time", "0.001"]
+    assert bench.main(args + ["--output", str(output)]) == 0
+    results = json.loads(output.read_text())
+    assert set(results["results"]) == {"intent[5]", "intent[20]", "keywords[5]", "keywords[20]"}
+    assert results["results"]["intent[20]"]["utterances_per_s"] > 0
+
+    for stats in results["results"].values():
+        stats["median_s"] /= 10
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(results))
+    assert bench.main(args + ["--baseline", str(baseline)]) == 1
+    assert "REGRESSION intent[5]" in capsys.readouterr().err
+
+def test_analyze_endpoint_runs_against_fresh_stores(monkeypatch):
+    """Test the end-to-end benchmark leaves the app's own stores untouched and restores them"""
+    from phases.phase2.api import main
+    from phases.phase2.vector_index import IVFIndex
+
+    monkeypatch.setattr("phases.phase2.api.main.vector_index", IVFIndex(main.embedder.dim))
+
+    originals = {name: getattr(main, name) for name in ("logger", "rollup_store", "search_index", "vector_index")}
+    indexed = len(main.search_index)
+    report = bench.run([5], ["analyze_endpoint"], rounds=1, min_time=0.001)
+
+    assert report["results"]["analyze_endpoint[5]"]["median_s"] > 0
+    assert {name: getattr(main, name) for name in originals} == originals
+    assert len(main.search_index) == indexed
+    assert "bench-5" not in main.vector_index
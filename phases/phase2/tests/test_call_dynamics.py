@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from phases.phase2.call_dynamics import CallDynamicsAnalyzer
+from phases.phase2.columnar import ColumnarTranscript
+
+@pytest.fixture
+def analyzer():
+    return CallDynamicsAnalyzer(dead_air_threshold=3.0)
+
+@pytest.fixture
+def utterances():
+    return [
+        {"speaker": "Customer", "text": "My card is blocked", "start": 0.0, "end": 4.0},
+        {"speaker": "Customer", "text": "I tried twice", "start": 4.5, "end": 8.0},
+        {"speaker": "Agent", "text": "Let me check", "start": 7.0, "end": 10.0},
+        {"speaker": "Customer", "text": "Thanks", "start": 15.0, "end": 16.0},
+        {"speaker": "Agent", "text": "It is unblocked now", "start": 16.5, "end": 19.5}
+    ]
+
+def test_metrics(analyzer, utterances):
+    """Test talk time, turns, monologue, interruptions and dead air"""
+    result = analyzer.analyze_transcript(utterances)
+
+    assert result["call_duration"] == 19.5
+    assert result["customer_talk_time"] == 8.5
+    assert result["agent_talk_time"] == 6.0
+    assert result["talk_time_ratio"] == round(8.5 / 14.5, 3)
+    assert result["turn_count"] == 4
+    assert result["longest_customer_monologue"] == 8.0
+    assert result["interruptions"] == {"total": 1, "by_customer": 0, "by_agent": 1}
+    assert result["dead_air"] == {"count": 1, "total_seconds": 5.0, "longest_seconds": 5.0}
+
+def test_unordered_input(analyzer, utterances):
+    """Test that utterances are ordered by start time before measuring"""
+    assert analyzer.analyze_transcript(utterances[::-1]) == analyzer.analyze_transcript(utterances)
+
+def test_missing_timestamps(analyzer, utterances):
+    """Test that dynamics are skipped unless every utterance is timestamped"""
+    utterances[2] = {"speaker": "Agent", "text": "Let me check"}
+    assert analyzer.analyze_transcript(utterances) is None
+
+def test_columns_match_dicts(analyzer, utterances):
+    """Test the columnar path against the dict path"""
+    columns = ColumnarTranscript.from_conversations([
+        ("conv-1", utterances),
+        ("conv-2", [{"speaker": "Customer", "text": "Hello"}])
+    ])
+
+    assert analyzer.analyze_columns(columns, 0) == analyzer.analyze_transcript(utterances)
+    assert analyzer.analyze_columns(columns, 1) is None
+
+def test_large_call(analyzer):
+    """Test a 10,000-turn call"""
+    rng = np.random.default_rng(7)
+    starts = np.cumsum(rng.uniform(0.5, 5.0, 10000))
+    ends = starts + rng.uniform(0.5, 4.0, 10000)
+    is_customer = np.arange(10000) % 2 == 0
+
+    result = analyzer.compute(is_customer, starts, ends)
+    assert result["turn_count"] == 10000
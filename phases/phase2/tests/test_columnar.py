@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from phases.phase2.aggregates import ConversationAggregate
+from phases.phase2.columnar import ColumnarTranscript
+from phases.phase2.intent_classifier import IntentClassifier
+from phases.phase2.keyword_extractor import KeywordExtractor
+from phases.phase2.response_formatter import ResponseFormatter
+from phases.phase2.sentiment_analyzer import SentimentAnalyzer
+
+@pytest.fixture
+def conversations():
+    return [
+        ("conv-1", [
+            {"speaker": "Customer", "text": "My debit card was blocked yesterday"},
+            {"speaker": "Agent", "text": "I can see the card is blocked"},
+            {"speaker": "Customer", "text": "Please unblock my debit card, this is terrible"}
+        ]),
+        ("conv-2", [
+            {"speaker": "Customer", "text": "What is the interest on a home loan?"},
+            {"speaker": "Agent", "text": "The home loan rate is 8.5%"}
+        ])
+    ]
+
+def _analyze_dicts(utterances):
+    with_intents = IntentClassifier().analyze_transcript(utterances)
+    with_sentiment = SentimentAnalyzer().analyze_transcript(with_intents)
+    return KeywordExtractor().analyze_transcript(with_sentiment)
+
+def _analyze_columns(conversations):
+    columns = ColumnarTranscript.from_conversations(conversations)
+    IntentClassifier().analyze_columns(columns)
+    SentimentAnalyzer().analyze_columns(columns)
+    KeywordExtractor().analyze_columns(columns)
+    return columns
+
+def test_layout(conversations):
+    """Test column and offset layout"""
+    columns = ColumnarTranscript.from_conversations(conversations)
+
+    assert len(columns) == 5
+    assert columns.num_conversations == 2
+    assert columns.conversation_offsets.tolist() == [0, 3, 5]
+    assert columns.speaker_codes.dtype == np.int8
+    assert columns.speaker_codes.tolist() == [0, 1, 0, 0, 1]
+
+def test_round_trip_without_analysis(conversations):
+    """Test conversion back to dicts before any stage has run"""
+    columns = ColumnarTranscript.from_conversations(conversations)
+
+    assert list(columns.iter_conversations()) == conversations
+
+def test_stages_match_dict_pipeline(conversations):
+    """Test that columnar stages produce the same records as the dict pipeline"""
+    columns = _analyze_columns(conversations)
+
+    for index, (conversation_id, utterances) in enumerate(conversations):
+        assert columns.to_records(index) == _analyze_dicts(utterances)
+
+def test_keyword_vocabulary_is_shared(conversations):
+    """Test that repeated keyword terms are stored once"""
+    columns = _analyze_columns(conversations)
+
+    assert len(columns.keyword_vocab) == len(set(columns.keyword_vocab))
+    assert columns.keyword_terms.size > len(columns.keyword_vocab)
+
+def test_aggregate_from_columns(conversations):
+    """Test vectorized aggregates against the dict-based aggregate"""
+    columns = _analyze_columns(conversations)
+
+    for index, (_, utterances) in enumerate(conversations):
+        expected = ConversationAggregate.from_utterances(_analyze_dicts(utterances))
+        actual = ConversationAggregate.from_columns(columns, index)
+        assert actual.to_dict() == expected.to_dict()
+        assert actual.key_findings() == expected.key_findings()
+
+def test_format_columns(conversations):
+    """Test conversion to API responses at the edge"""
+    responses = ResponseFormatter().format_columns(_analyze_columns(conversations))
+
+    assert [r["conversation_id"] for r in responses] == ["conv-1", "conv-2"]
+    assert responses[0]["analysis"]["primary_intent"] == "card_problem"
+    assert responses[1]["analysis"]["primary_intent"] == "loan_request"
@@ -0,0 +1,35 @@
+import numpy as np
+from phases.phase2.embeddings import HashedNgramEmbedder
+
+def _response(texts, intent="card_problem", products=()):
+    return {
+        "analysis": {
+            "utterances": [
+                {"speaker": "Customer", "text": text, "intent": intent, "keywords": {"products": list(products)}}
+                for text in texts
+            ]
+        }
+    }
+
+def test_vectors_are_normalized_and_deterministic():
+    """Test unit length and repeatability"""
+    embedder = HashedNgramEmbedder(dim=64)
+    first = embedder.embed_response(_response(["My debit card was blocked"]))
+    second = embedder.embed_response(_response(["My debit card was blocked"]))
+
+    assert first.shape == (64,)
+    assert np.isclose(np.linalg.norm(first), 1.0)
+    assert np.array_equal(first, second)
+
+def test_similar_calls_score_higher():
+    """Test that related conversations are closer than unrelated ones"""
+    embedder = HashedNgramEmbedder()
+    blocked = embedder.embed_response(_response(["My debit card is blocked"], products=["debit card"]))
+    similar = embedder.embed_response(_response(["The debit card got blocked today"], products=["debit card"]))
+    unrelated = embedder.embed_response(_response(["What is my savings balance"], "balance_inquiry", ["savings"]))
+
+    assert blocked @ similar > blocked @ unrelated
+
+def test_empty_conversation():
+    """Test that an empty transcript embeds to the zero vector"""
+    assert not HashedNgramEmbedder().embed_response({"analysis": {"utterances": []}}).any()
@@ -0,0 +1,33 @@
+import gzip
+import pytest
+from phases.phase2.api import encoding
+from phases.phase2.api.encoding import (
+    select_encoding, select_media_type, serialize, compress,
+    JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
+)
+
+def test_select_encoding_prefers_zstd_when_available():
+    expected = "zstd" if encoding.zstandard is not None else "gzip"
+    assert select_encoding("gzip, deflate, zstd") == expected
+
+def test_select_encoding_respects_quality():
+    assert select_encoding("gzip;q=1.0, zstd;q=0") == "gzip"
+    assert select_encoding("identity") is None
+    assert select_encoding("*;q=0") is None
+    assert select_encoding(None) is None
+
+def test_select_media_type():
+    assert select_media_type(None) == JSON_MEDIA_TYPE
+    assert select_media_type("application/json") == JSON_MEDIA_TYPE
+    if encoding.msgpack is not None:
+        assert select_media_type("application/msgpack") == MSGPACK_MEDIA_TYPE
+        assert select_media_type("application/json, application/msgpack;q=0.5") == JSON_MEDIA_TYPE
+
+def test_gzip_round_trip():
+    body = serialize({"text": "₹5000 declined"}, JSON_MEDIA_TYPE)
+    assert gzip.decompress(compress(body, "gzip")) == body
+
+def test_msgpack_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    payload = {"conversation_id": "conv-1", "analysis": {"utterances": []}}
+    assert msgpack.unpackb(serialize(payload, MSGPACK_MEDIA_TYPE)) == payload
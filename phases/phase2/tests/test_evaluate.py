@@ -0,0 +1,82 @@
+import json
+import pytest
+from phases.phase2.benchmarks import evaluate
+
+CORPUS = [
+    {"conversation_id": "eval-1", "transcript": [
+        {"speaker": "Customer", "text": "My card was blocked at the ATM, this is terrible.",
+         "intent": "card_problem", "sentiment": "negative",
+         "keywords": {"actions": ["blocked"], "products": ["card"]}},
+        {"speaker": "Agent", "text": "I can see the card was blocked after three wrong PIN attempts.",
+         "intent": "card_problem"},
+    ]},
+    {"conversation_id": "eval-2", "transcript": [
+        {"speaker": "Customer", "text": "What is the interest rate on a home loan?",
+         "intent": "loan_request", "sentiment": "neutral", "keywords": {"products": ["home loan"]}},
+        {"speaker": "Agent", "text": "The rate starts at 8.5% per annum.",
+         "intent": "loan_request", "keywords": {"financial_terms": ["8.5%"]}},
+        {"speaker": "Customer", "text": "Great, thank you so much!", "intent": "no_intent_detected",
+         "sentiment": "positive"},
+    ]},
+]
+
+def test_classification_report():
+    """Test per-label precision, recall and support, accuracy and macro F1"""
+    report = evaluate.classification_report(["a", "a", "b", "c"], ["a", "b", "b", "b"])
+    assert report["labels"]["a"] == {"precision": 1.0, "recall": 0.5, "f1": pytest.approx(2 / 3), "support": 2}
+    assert report["labels"]["b"]["precision"] == pytest.approx(1 / 3)
+    assert report["labels"]["b"]["recall"] == 1.0
+    assert report["labels"]["c"] == {"precision": 0.0, "recall": 0.0, "f1": 0.0, "support": 1}
+    assert report["accuracy"] == 0.5
+    assert report["macro_f1"] == pytest.approx((2 / 3 + 0.5 + 0.0) / 3)
+
+def test_keyword_report_scores_labelled_categories_only():
+    """Test keyword terms are compared per category, ignoring case and unlabelled categories"""
+    report = evaluate.keyword_report(
+        [{"products": ["Home Loan", "emi"]}],
+        [{"products": ["home loan", "loan"], "actions": ["approved"]}]
+    )
+    assert set(report["labels"]) == {"products"}
+    assert report["labels"]["products"] == {"precision": 0.5, "recall": 0.5, "f1": 0.5, "support": 2}
+    assert report["micro_f1"] == 0.5
+
+def test_run_reports_accuracy_and_performance():
+    """Test every configuration of a task is scored on the labelled utterances and timed"""
+    results = evaluate.run(CORPUS)
+    assert set(results) == {"intent", "sentiment", "keywords"}
+    assert set(results["sentiment"]) == set(evaluate.ENGINES["sentiment"])
+
+    intent = results["intent"]["regex"]
+    assert intent["accuracy"]["examples"] == 5
+    assert intent["accuracy"]["labels"]["card_problem"]["recall"] == 1.0
+    performance = intent["performance"]
+    assert performance["conversations"] == 2 and performance["utterances"] == 5
+    assert performance["utterances_per_s"] > 0
+    assert 0 <= performance["latency_ms"]["p50"] <= performance["latency_ms"]["p99"]
+    assert performance["peak_memory_bytes"] > 0
+
+    assert results["sentiment"]["textblob"]["accuracy"]["examples"] == 3
+    assert results["keywords"]["rules"]["accuracy"]["labels"]["financial_terms"]["recall"] == 1.0
+
+def test_cli_with_extra_engine(tmp_path, capsys):
+    """Test the command evaluates a plugged-in engine next to the built-in ones and writes JSON"""
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text("\n".join(json.dumps(conversation) for conversation in CORPUS) + "\n")
+    output = tmp_path / "evaluation.json"
+    assert evaluate.main([
+        str(corpus), "--tasks", "intent",
+        "--engine", "intent:constant=phases.phase2.tests.test_evaluate:ConstantIntent",
+        "--output", str(output)
+    ]) == 0
+
+    results = json.loads(output.read_text())["results"]
+    assert set(results) == {"intent"}
+    assert results["intent"]["constant"]["accuracy"]["accuracy"] == pytest.approx(4 / 5)
+    assert "constant" in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        evaluate.main([str(corpus), "--engine", "nonsense"])
+
+class ConstantIntent:
+    def analyze_transcript(self, utterances):
+        return [{**utterance, "intent": "card_problem" if "card" in utterance["text"] else "loan_request"}
+                for utterance in utterances]
@@ -0,0 +1,59 @@
+import asyncio
+import time
+import pytest
+from phases.phase2.health import ReadinessMonitor
+
+@pytest.mark.asyncio
+async def test_snapshot_combines_check_results():
+    """Test readiness requires every critical check, and reports the others"""
+    monitor = ReadinessMonitor(interval=60)
+    monitor.register("sync_ok", lambda: (True, {"backlog": 0}))
+
+    async def optional_down():
+        raise ConnectionError("refused")
+
+    monitor.register("optional", optional_down, critical=False)
+    assert monitor.status()["ready"] is False
+
+    await monitor.refresh()
+    status = monitor.status()
+    assert status["ready"] is True
+    assert status["checks"]["sync_ok"]["backlog"] == 0
+    assert status["checks"]["optional"] == {
+        "ok": False, "critical": False, "duration_ms": status["checks"]["optional"]["duration_ms"],
+        "error": "ConnectionError: refused"
+    }
+
+    monitor.register("critical_down", lambda: (False, {}))
+    await monitor.refresh()
+    assert monitor.status()["ready"] is False
+
+@pytest.mark.asyncio
+async def test_slow_check_times_out():
+    """Test a hung check fails within the timeout instead of blocking the refresh"""
+    monitor = ReadinessMonitor(timeout=0.05)
+
+    async def hung():
+        await asyncio.sleep(10)
+
+    monitor.register("hung", hung)
+    started = time.monotonic()
+    snapshot = await monitor.refresh()
+    assert time.monotonic() - started < 1
+    assert snapshot["checks"]["hung"]["error"].startswith("Timed out")
+
+@pytest.mark.asyncio
+async def test_background_refresh_and_staleness():
+    """Test the task keeps the snapshot fresh and a stopped refresher goes stale"""
+    monitor = ReadinessMonitor(interval=0.01, max_age=0.1)
+    calls = []
+    monitor.register("counted", lambda: (calls.append(1) or True, {}))
+    monitor.start()
+    await asyncio.sleep(0.1)
+    await monitor.stop()
+    assert len(calls) >= 2
+    assert monitor.status()["ready"] is True
+
+    await asyncio.sleep(0.15)
+    status = monitor.status()
+    assert status["ready"] is False and status["reason"] == "Readiness snapshot is stale"
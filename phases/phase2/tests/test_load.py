@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from phases.phase2.benchmarks import load
+
+def test_mix_and_pool():
+    """Test the transcript mix is parsed and followed by the pool"""
+    mix = load.parse_mix("10:3, 100:1,1000")
+    assert mix == [(10, 3.0), (100, 1.0), (1000, 1.0)]
+    pool = load.build_pool([(5, 3), (50, 1)], count=400, seed=1)
+    sizes = [len(c["transcript"]) for c in pool]
+    assert set(sizes) == {5, 50}
+    assert 0.65 < sizes.count(5) / len(sizes) < 0.85
+    assert pool == load.build_pool([(5, 3), (50, 1)], count=400, seed=1)
+
+@pytest.mark.asyncio
+async def test_closed_loop_counts_and_percentiles():
+    """Test a closed-loop run sends exactly the requested count and reports errors"""
+    seen = []
+
+    async def target(conversation):
+        seen.append(conversation["conversation_id"])
+        await asyncio.sleep(0.001)
+        return 500 if conversation["conversation_id"].endswith("0") else 200
+
+    report = await load.run_load(target, load.build_pool([(5, 1)], count=3), concurrency=4, requests=50)
+    assert report["requests"] == 50 and len(set(seen)) == 50
+    assert report["errors"] == 5 and report["error_rate"] == pytest.approx(0.1)
+    assert set(report["latency_ms"]) == {"p50", "p95", "p99", "p99.9", "max"}
+    assert report["latency_ms"]["p50"] >= 1.0
+
+@pytest.mark.asyncio
+async def test_open_loop_counts_queueing_delay():
+    """Test open-loop latency includes time spent waiting for a free slot"""
+    async def target(conversation):
+        await asyncio.sleep(0.02)
+        return 200
+
+    report = await load.run_load(
+        target, load.build_pool([(5, 1)], count=3), concurrency=1, requests=10, rate=1000
+    )
+    assert report["requests"] == 10
+    # Ten near-simultaneous arrivals through one slot: the last waits for the nine before it
+    assert report["latency_ms"]["max"] >= 150
+
+def test_find_saturation():
+    """Test the saturation point is where throughput stops growing"""
+    levels = [
+        {"concurrency": c, "throughput_rps": t, "latency_ms": {"p99": c * 10.0}}
+        for c, t in ((1, 100), (2, 190), (4, 260), (8, 265), (16, 240))
+    ]
+    saturation = load.find_saturation(levels, cores=2)
+    assert saturation["concurrency"] == 4
+    assert saturation["throughput_rps_per_core"] == 130
+    assert saturation["p99_ms"] == 40.0
+
+@pytest.mark.asyncio
+async def test_in_process_asgi_target():
+    """Test the ASGI target drives the real app"""
+    async with load.asgi_target() as target:
+        report = await load.run_load(target, load.build_pool([(4, 1)], count=2), concurrency=2, requests=4)
+    assert report["statuses"] == {"200": 4}
@@ -0,0 +1,106 @@
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from phases.phase2.blob_store import BlobStore
+from phases.phase2.log_index import RequestLogIndex, main
+from phases.phase2.log_segments import SegmentedLog
+
+BASE = datetime(2025, 7, 13, 10, 0, tzinfo=timezone.utc)
+
+def _write(segments, index, entries, now):
+    lines = [(json.dumps(entry) + "\n").encode() for entry in entries]
+    index.add(entries, segments.append(lines, now=now))
+
+def _entry(conversation_id, moment, status="success"):
+    return {"timestamp": moment.isoformat(), "conversation_id": conversation_id, "status": status}
+
+@pytest.fixture
+def indexed(tmp_path):
+    segments = SegmentedLog(tmp_path / "requests", prefix="requests", period="hourly")
+    index = RequestLogIndex(segments.directory / "requests.index.sqlite", segments)
+    segments.on_compressed = index.add_blocks
+    yield segments, index
+    segments.close()
+    index.close()
+
+def test_lookup_conversation_in_active_segment(indexed):
+    """Test lookup of entries still in the uncompressed active segment"""
+    segments, index = indexed
+    _write(segments, index, [_entry("conv-1", BASE), _entry("conv-2", BASE)], BASE)
+    _write(segments, index, [_entry("conv-1", BASE + timedelta(minutes=5), "error")], BASE)
+
+    entries = index.lookup_conversation("conv-1")
+    assert [e["status"] for e in entries] == ["success", "error"]
+    assert index.lookup_conversation("missing") == []
+
+def test_lookup_in_compressed_segment(indexed):
+    """Test that entries are read through the gzip member map after compression"""
+    segments, index = indexed
+    segments.BLOCK_SIZE = 64
+    _write(segments, index, [_entry(f"conv-{i}", BASE + timedelta(seconds=i)) for i in range(20)], BASE)
+    segments.close()
+
+    assert all(s.compressed for s in segments.segments())
+    assert index.lookup_conversation("conv-17")[0]["conversation_id"] == "conv-17"
+
+def test_lookup_range(indexed):
+    """Test time-window queries across segments"""
+    segments, index = indexed
+    for hour in range(3):
+        moment = BASE + timedelta(hours=hour)
+        _write(segments, index, [_entry(f"conv-{hour}", moment)], moment)
+
+    window = index.lookup_range(BASE + timedelta(hours=1), BASE + timedelta(hours=3))
+    assert [e["conversation_id"] for e in window] == ["conv-1", "conv-2"]
+    assert len(index.lookup_range(limit=2)) == 2
+    assert index.lookup_range(conversation_id="conv-0")[0]["conversation_id"] == "conv-0"
+
+def test_remove_segments(indexed):
+    """Test that retention removes index rows with their segments"""
+    segments, index = indexed
+    _write(segments, index, [_entry("old", BASE)], BASE)
+    later = BASE + timedelta(days=2)
+    _write(segments, index, [_entry("new", later)], later)
+
+    removed = segments.delete_expired(BASE + timedelta(days=1))
+    index.remove_segments(s.name for s in removed)
+    assert index.lookup_conversation("old") == []
+    assert len(index.lookup_conversation("new")) == 1
+
+def test_rebuild(indexed):
+    """Test rebuilding the index from compressed and uncompressed segments"""
+    segments, index = indexed
+    segments.BLOCK_SIZE = 64
+    _write(segments, index, [_entry(f"conv-{i}", BASE) for i in range(5)], BASE)
+    later = BASE + timedelta(hours=1)
+    _write(segments, index, [_entry("conv-late", later)], later)
+    segments.close()
+    _write(segments, index, [_entry("conv-active", later + timedelta(hours=1))], later + timedelta(hours=1))
+
+    assert index.rebuild() == 7
+    assert index.lookup_conversation("conv-3")[0]["conversation_id"] == "conv-3"
+    assert index.lookup_conversation("conv-active")[0]["conversation_id"] == "conv-active"
+
+def test_cli(indexed, tmp_path, capsys):
+    """Test the command line lookups"""
+    segments, index = indexed
+    _write(segments, index, [_entry("conv-1", BASE), _entry("conv-2", BASE)], BASE)
+    args = ["--log-dir", str(tmp_path), "--data-file", "requests.jsonl"]
+
+    assert main(args + ["conversation", "conv-2"]) == 0
+    assert json.loads(capsys.readouterr().out)["conversation_id"] == "conv-2"
+    assert main(args + ["conversation", "missing"]) == 1
+    assert main(args + ["range", "--start", BASE.isoformat(), "--limit", "1"]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == 1
+
+def test_cli_expands_deduplicated_payloads(indexed, tmp_path, capsys):
+    """Test that the command line restores transcripts stored in the blob store"""
+    segments, index = indexed
+    transcript = [{"speaker": "Customer", "text": "My card payment failed."}]
+    digest = BlobStore(tmp_path / "blobs").put(transcript)
+    entry = _entry("conv-1", BASE)
+    entry["request"] = {"conversation_id": "conv-1", "transcript": {"$blob": digest}}
+    _write(segments, index, [entry], BASE)
+
+    assert main(["--log-dir", str(tmp_path), "conversation", "conv-1"]) == 0
+    assert json.loads(capsys.readouterr().out)["request"]["transcript"] == transcript
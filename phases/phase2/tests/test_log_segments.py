@@ -0,0 +1,136 @@
+import gzip
+import io
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from phases.phase2.log_segments import SegmentedLog
+
+def _line(conversation_id, timestamp):
+    return (json.dumps({"timestamp": timestamp.isoformat(), "conversation_id": conversation_id}) + "\n").encode()
+
+@pytest.fixture
+def segments(tmp_path):
+    log = SegmentedLog(tmp_path / "requests", prefix="requests", period="hourly")
+    yield log
+    log.close()
+
+def test_rolls_on_period_and_compresses(segments):
+    """Test that a new period closes and compresses the previous segment"""
+    first = datetime(2025, 7, 13, 10, 15, tzinfo=timezone.utc)
+    second = first + timedelta(hours=1)
+    segments.append([_line("a", first)], now=first)
+    segments.append([_line("b", second)], now=second)
+    segments.close()
+
+    names = [s.path.name for s in segments.segments()]
+    assert len(names) == 2
+    assert all(name.endswith(".jsonl.gz") for name in names)
+    assert "-20250713T100000Z-" in names[0]
+
+def test_rolls_on_size(tmp_path):
+    """Test size-capped segments"""
+    log = SegmentedLog(tmp_path / "requests", period="daily", max_bytes=100)
+    now = datetime(2025, 7, 13, tzinfo=timezone.utc)
+    for i in range(5):
+        log.append([_line(f"conv-{i}", now)], now=now)
+    log.close()
+
+    assert len(log.segments()) > 1
+    assert [e["conversation_id"] for e in log.iter_entries()] == [f"conv-{i}" for i in range(5)]
+
+def test_lines_go_to_the_period_of_their_timestamp(segments):
+    """Test that a batch written after a period boundary keeps each line in its own period"""
+    before = datetime(2025, 7, 13, 10, 59, 59, tzinfo=timezone.utc)
+    after = before + timedelta(seconds=2)
+    lines = [_line("late", before), _line("current", after), _line("late-2", before)]
+
+    locations = segments.append(lines, timestamps=[before, after, before])
+    segments.close()
+
+    assert [segment.period_start.hour for segment, _, _ in locations] == [10, 11, 10]
+    assert locations[0][0] == locations[2][0]
+    window = segments.iter_entries(start=before.replace(minute=0, second=0), end=after.replace(second=0))
+    assert [e["conversation_id"] for e in window] == ["late", "late-2"]
+
+def test_late_lines_do_not_roll_the_current_segment(segments):
+    """Test that lines alternating across a boundary keep one segment per period"""
+    before = datetime(2025, 7, 13, 10, 59, 59, tzinfo=timezone.utc)
+    after = before + timedelta(seconds=2)
+    written = []
+    for i in range(4):
+        written += segments.append([_line(f"current-{i}", after)], now=after)
+        written += segments.append([_line(f"late-{i}", before)], now=before)
+
+    assert len({segment.path for segment, _, _ in written}) == 2
+    assert segments.active_segment.period_start.hour == 11
+    segments.close()
+    assert len(segments.segments()) == 2
+
+def test_reader_falls_back_to_compressed_copy(segments):
+    """Test that a segment compressed after it was listed is still read"""
+    now = datetime(2025, 7, 13, 10, 15, tzinfo=timezone.utc)
+    segments.append([_line("a", now)], now=now)
+    listed = segments.segments()
+    segments.close()
+
+    assert not listed[0].compressed and not listed[0].path.exists()
+    assert [json.loads(line)["conversation_id"] for line in segments._read_lines(listed[0])] == ["a"]
+
+def test_roll_expired(segments):
+    """Test that an idle segment is closed once its period has ended"""
+    now = datetime(2025, 7, 13, 10, 15, tzinfo=timezone.utc)
+    segments.append([_line("a", now)], now=now)
+
+    assert not segments.roll_expired(now + timedelta(minutes=30))
+    assert segments.roll_expired(now + timedelta(hours=1))
+    assert segments.active_segment is None
+    segments.close()
+    assert all(s.compressed for s in segments.segments())
+    assert [e["conversation_id"] for e in segments.iter_entries()] == ["a"]
+
+def test_compressing_a_missing_segment(segments, tmp_path):
+    """Test that compressing a segment another process already compressed is a no-op"""
+    assert segments.compress_segment(tmp_path / "requests" / "requests-20250713T100000Z-1-0001.jsonl") == []
+
+def test_reader_spans_compressed_and_active(segments):
+    """Test transparent iteration and time-range filtering"""
+    base = datetime(2025, 7, 13, 10, 0, tzinfo=timezone.utc)
+    for hour in range(3):
+        moment = base + timedelta(hours=hour)
+        segments.append([_line(f"conv-{hour}", moment)], now=moment)
+
+    ids = [e["conversation_id"] for e in segments.iter_entries()]
+    assert ids == ["conv-0", "conv-1", "conv-2"]
+
+    window = segments.iter_entries(start=base + timedelta(hours=1), end=base + timedelta(hours=2))
+    assert [e["conversation_id"] for e in window] == ["conv-1"]
+
+def test_compressed_members_are_seekable(segments, tmp_path):
+    """Test that each recorded gzip member decompresses on its own"""
+    now = datetime(2025, 7, 13, 10, 0, tzinfo=timezone.utc)
+    segments.BLOCK_SIZE = 64
+    lines = [_line(f"conv-{i}", now) for i in range(10)]
+    segments.append(lines, now=now)
+    path = segments.active_segment.path
+    segments.close()
+    # Close compressed it already; compress the raw content again to inspect the block map
+    path.write_bytes(b"".join(lines))
+    blocks = segments.compress_segment(path)
+
+    data = path.with_name(path.name + ".gz").read_bytes()
+    assert len(blocks) > 1
+    raw_offset, compressed_offset = blocks[1]
+    member = gzip.GzipFile(fileobj=io.BytesIO(data[compressed_offset:])).readline()
+    assert member == b"".join(lines)[raw_offset:].split(b"\n")[0] + b"\n"
+
+def test_delete_expired_segments(segments):
+    """Test that retention removes whole expired segments only"""
+    old = datetime.now(timezone.utc) - timedelta(days=40)
+    new = datetime.now(timezone.utc)
+    segments.append([_line("old", old)], now=old)
+    segments.append([_line("new", new)], now=new)
+
+    removed = segments.delete_expired(datetime.now(timezone.utc) - timedelta(days=30))
+
+    assert len(removed) == 1
+    assert [e["conversation_id"] for e in segments.iter_entries()] == ["new"]
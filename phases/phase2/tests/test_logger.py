@@ -2,7 +2,7 @@ import pytest
 from pathlib import Path
 import json
 from datetime import datetime, timedelta, timezone
-from phases.phase1.logger import CallChemyLogger
+from phases.phase2.logger import CallChemyLogger
 
 @pytest.fixture
 def temp_log_dir(tmp_path):
@@ -83,4 +83,216 @@ def test_empty_log_cleanup(logger, temp_log_dir):
     logger.cleanup_old_logs()
     
     assert data_file.exists()
-    assert data_file.stat().st_size == 0
\ No newline at end of file
+    assert data_file.stat().st_size == 0
+
+@pytest.fixture
+def background_logger(temp_log_dir):
+    """Create a logger that writes from a background thread"""
+    logger = CallChemyLogger(
+        log_dir=str(temp_log_dir),
+        log_file="test.log",
+        data_file="test_requests.jsonl",
+        background=True,
+        fsync="batch"
+    )
+    yield logger
+    logger.close()
+
+def test_background_writes_flushed_on_close(background_logger, temp_log_dir):
+    """Test that queued entries are all written when the logger closes"""
+    for i in range(200):
+        background_logger.log_request(f"conv-{i}", {"text": "Test request"}, {"result": i})
+    background_logger.close()
+
+    with open(temp_log_dir / "test_requests.jsonl") as f:
+        entries = [json.loads(line) for line in f]
+    assert [e["conversation_id"] for e in entries] == [f"conv-{i}" for i in range(200)]
+    assert background_logger.backlog == 0
+
+def test_background_flush(background_logger, temp_log_dir):
+    """Test waiting for queued entries without closing"""
+    background_logger.log_request("conv-flush", {"text": "Test request"})
+    assert background_logger.flush(timeout=5)
+
+    with open(temp_log_dir / "test_requests.jsonl") as f:
+        assert json.loads(f.readline())["conversation_id"] == "conv-flush"
+
+def test_writes_after_close_are_synchronous(background_logger, temp_log_dir):
+    """Test that a closed logger keeps logging synchronously"""
+    background_logger.close()
+    background_logger.log_request("late", {"text": "Test request"})
+
+    with open(temp_log_dir / "test_requests.jsonl") as f:
+        assert json.loads(f.readline())["conversation_id"] == "late"
+
+def test_invalid_fsync_policy(temp_log_dir):
+    """Test that unknown fsync policies are rejected"""
+    with pytest.raises(ValueError):
+        CallChemyLogger(log_dir=str(temp_log_dir), fsync="sometimes")
+
+def test_segmented_logging(temp_log_dir):
+    """Test writing, reading and closing a segmented request log"""
+    logger = CallChemyLogger(
+        log_dir=str(temp_log_dir),
+        log_file="test.log",
+        data_file="test_requests.jsonl",
+        background=True,
+        segment_period="hourly"
+    )
+    for i in range(5):
+        logger.log_request(f"conv-{i}", {"text": "Test request"}, {"result": i})
+    logger.close()
+
+    assert not (temp_log_dir / "test_requests.jsonl").exists()
+    segment_files = list((temp_log_dir / "test_requests").glob("test_requests-*.jsonl.gz"))
+    assert len(segment_files) == 1
+    assert [e["conversation_id"] for e in logger.iter_entries()] == [f"conv-{i}" for i in range(5)]
+
+def test_segmented_cleanup(temp_log_dir):
+    """Test that retention drops expired segments without touching current ones"""
+    logger = CallChemyLogger(
+        log_dir=str(temp_log_dir),
+        log_file="test.log",
+        data_file="test_requests.jsonl",
+        retention_days=7,
+        segment_period="daily"
+    )
+    old = datetime.now(timezone.utc) - timedelta(days=10)
+    logger.segments.append([b'{"timestamp": "%s", "conversation_id": "old"}\n' % old.isoformat().encode()], now=old)
+    logger.log_request("new", {"text": "Test request"})
+
+    logger.cleanup_old_logs()
+
+    assert [e["conversation_id"] for e in logger.iter_entries()] == ["new"]
+    logger.close()
+
+def test_entries_are_segmented_by_their_timestamp(temp_log_dir):
+    """Test that the writer files an entry under the period it was logged in"""
+    logger = CallChemyLogger(
+        log_dir=str(temp_log_dir),
+        log_file="test.log",
+        data_file="test_requests.jsonl",
+        segment_period="hourly"
+    )
+    logged = datetime.now(timezone.utc) - timedelta(hours=3)
+    logger._write_batch([{"timestamp": logged.isoformat(), "conversation_id": "late"}])
+    logger.close()
+
+    segment, = logger.segments.segments()
+    assert segment.period_start == logged.replace(minute=0, second=0, microsecond=0)
+
+def test_run_maintenance(temp_log_dir):
+    """Test that maintenance applies retention and takes turns with other workers"""
+    import fcntl
+
+    logger = CallChemyLogger(
+        log_dir=str(temp_log_dir),
+        log_file="test.log",
+        data_file="test_requests.jsonl",
+        retention_days=7,
+        segment_period="daily"
+    )
+    old = datetime.now(timezone.utc) - timedelta(days=10)
+    logger.segments.append([b'{"timestamp": "%s", "conversation_id": "old"}\n' % old.isoformat().encode()], now=old)
+    logger.log_request("new", {"text": "Test request"})
+
+    with open(temp_log_dir / ".maintenance.lock", "a") as other_worker:
+        fcntl.flock(other_worker, fcntl.LOCK_EX)
+        assert logger.run_maintenance() is False
+    assert [e["conversation_id"] for e in logger.iter_entries()] == ["old", "new"]
+
+    assert logger.run_maintenance() is True
+    assert [e["conversation_id"] for e in logger.iter_entries()] == ["new"]
+    logger.close()
+
+def test_indexed_lookup(temp_log_dir):
+    """Test conversation and time-window lookups through the sidecar index"""
+    logger = CallChemyLogger(
+        log_dir=str(temp_log_dir),
+        log_file="test.log",
+        data_file="test_requests.jsonl",
+        segment_period="hourly"
+    )
+    logger.log_request("conv-1", {"text": "Test request"}, {"result": 1})
+    logger.log_request("conv-2", {"text": "Test request"}, error=ValueError("bad input"))
+
+    assert (temp_log_dir / "test_requests" / "test_requests.index.sqlite").exists()
+    entries = logger.lookup_conversation("conv-2")
+    assert entries[0]["error"]["message"] == "bad input"
+    window = logger.lookup_range(start=datetime.now(timezone.utc) - timedelta(minutes=1))
+    assert [e["conversation_id"] for e in window] == ["conv-1", "conv-2"]
+    logger.close()
+
+def _conversation_payloads():
+    transcript = [
+        {"speaker": "Customer", "text": "My card payment failed."},
+        {"speaker": "Agent", "text": "Let me check that for you."}
+    ]
+    request = {"conversation_id": "conv-1", "transcript": transcript}
+    response = {
+        "conversation_id": "conv-1",
+        "analysis": {"utterances": [dict(u, intent="payment_issue") for u in transcript]}
+    }
+    return request, response
+
+def test_dedup_payloads(temp_log_dir):
+    """Test that transcripts are stored once and referenced by hash"""
+    logger = CallChemyLogger(
+        log_dir=str(temp_log_dir),
+        log_file="test.log",
+        data_file="test_requests.jsonl",
+        payload_mode="dedup"
+    )
+    request, response = _conversation_payloads()
+    logger.log_request("conv-1", request, response)
+    logger.log_request("conv-1", request, response)
+
+    with open(temp_log_dir / "test_requests.jsonl") as f:
+        entries = [json.loads(line) for line in f]
+    digest = entries[0]["request"]["transcript"]["$blob"]
+    assert entries[1]["request"]["transcript"]["$blob"] == digest
+    assert "text" not in entries[0]["response"]["analysis"]["utterances"][0]
+    assert len(list((temp_log_dir / "blobs").glob("*/*.json.gz"))) == 1
+    assert request["transcript"][0]["text"] == "My card payment failed."
+
+    restored = logger.expand_entry(entries[0])
+    assert restored["request"] == request
+    assert restored["response"] == response
+
+def test_sample_rates(temp_log_dir):
+    """Test per-status sampling"""
+    logger = CallChemyLogger(
+        log_dir=str(temp_log_dir),
+        log_file="test.log",
+        data_file="test_requests.jsonl",
+        sample_rates={"success": 0.0}
+    )
+    logger.log_request("dropped", {"text": "Test request"}, {"result": 1})
+    logger.log_request("kept", {"text": "Test request"}, error=ValueError("bad input"))
+
+    with open(temp_log_dir / "test_requests.jsonl") as f:
+        assert [json.loads(line)["conversation_id"] for line in f] == ["kept"]
+    assert logger.sampled_out == 1
+
+    with pytest.raises(ValueError):
+        CallChemyLogger(log_dir=str(temp_log_dir), sample_rates={"success": 2.0})
+
+def test_max_payload_bytes(logger, temp_log_dir):
+    """Test that oversized payloads are replaced by a truncation marker"""
+    logger.max_payload_bytes = 100
+    logger.log_request("big", {"text": "x" * 500}, {"result": "ok"})
+
+    with open(temp_log_dir / "test_requests.jsonl") as f:
+        entry = json.loads(f.readline())
+    assert entry["request"] == {"$truncated": True, "bytes": 512}
+    assert entry["response"] == {"result": "ok"}
+
+def test_log_event(logger, temp_log_dir):
+    """Test that system events go to their own file"""
+    logger.log_event("startup", {"status": "API initialized"})
+
+    assert not (temp_log_dir / "test_requests.jsonl").exists()
+    with open(temp_log_dir / "events.jsonl") as f:
+        entry = json.loads(f.readline())
+    assert entry["event"] == "startup"
+    assert entry["details"]["status"] == "API initialized"
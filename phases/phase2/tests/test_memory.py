@@ -0,0 +1,13 @@
+import pytest
+from phases.phase2.benchmarks import load
+from phases.phase2.benchmarks.memory import profile_mix
+
+@pytest.mark.asyncio
+async def test_memory_profile_of_a_mix():
+    """Test the memory benchmark reports every pipeline stage of the profiled requests"""
+    report = await profile_mix(load.build_pool([(6, 1), (20, 1)], count=4), requests=4, warmup=1, top_n=3)
+    assert report["requests"] == 4 and report["errors"] == 0
+    for stage in ("validation", "intent", "sentiment", "keywords", "formatting", "logging"):
+        assert report["stages"][stage]["calls"] == 4
+        assert report["stages"][stage]["peak_bytes_max"] >= 0
+    assert len(report["top_sites"]) <= 3
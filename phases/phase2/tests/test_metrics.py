@@ -0,0 +1,140 @@
+import os
+import subprocess
+import sys
+import threading
+import pytest
+from phases.phase2.metrics import MetricsRegistry, RequestTrace, Stage, current_trace
+
+def _samples(text):
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines() if line and not line.startswith("#")
+    }
+
+def test_counter_and_histogram_exposition():
+    """Test counters and cumulative histogram buckets in the text format"""
+    registry = MetricsRegistry()
+    requests = registry.counter("app_requests_total", "Requests", ("outcome",))
+    latency = registry.histogram("app_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    requests.inc("success")
+    requests.inc("success", amount=2)
+    requests.inc("error")
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+
+    text = registry.render()
+    samples = _samples(text)
+    assert "# TYPE app_requests_total counter" in text
+    assert "# TYPE app_latency_seconds histogram" in text
+    assert samples['app_requests_total{outcome="success"}'] == 3
+    assert samples['app_requests_total{outcome="error"}'] == 1
+    assert samples['app_latency_seconds_bucket{le="0.1"}'] == 1
+    assert samples['app_latency_seconds_bucket{le="1"}'] == 2
+    assert samples['app_latency_seconds_bucket{le="+Inf"}'] == 3
+    assert samples["app_latency_seconds_count"] == 3
+    assert samples["app_latency_seconds_sum"] == pytest.approx(5.55)
+
+def test_label_validation_and_escaping():
+    """Test label counts are checked and label values escaped"""
+    registry = MetricsRegistry()
+    errors = registry.counter("app_errors_total", "Errors", ("error_type",))
+    with pytest.raises(ValueError):
+        errors.inc()
+    errors.inc('bad "quote"\nline')
+    assert 'app_errors_total{error_type="bad \\"quote\\"\\nline"} 1' in registry.render()
+
+def test_concurrent_updates_are_not_lost():
+    """Test per-thread shards sum to the exact total"""
+    registry = MetricsRegistry()
+    counter = registry.counter("app_events_total", "Events")
+    timer = registry.histogram("app_stage_seconds", "Stage", ("stage",))
+
+    def work():
+        for _ in range(10000):
+            counter.inc()
+            with timer.time("intent"):
+                pass
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    samples = _samples(registry.render())
+    assert samples["app_events_total"] == 80000
+    assert samples['app_stage_seconds_count{stage="intent"}'] == 80000
+
+def test_shards_of_exited_threads_are_retired():
+    """Test short-lived threads' totals are kept while their shards are dropped"""
+    registry = MetricsRegistry()
+    counter = registry.counter("app_events_total", "Events")
+    for _ in range(50):
+        thread = threading.Thread(target=counter.inc)
+        thread.start()
+        thread.join()
+    counter.inc()
+
+    assert registry.collect()[("app_events_total", ())] == [51]
+    assert len(registry._shards) == 1
+
+def test_worker_processes_aggregate_through_directory(tmp_path):
+    """Test a scrape sums the snapshots written by every worker"""
+    registries = []
+    for worker in range(2):
+        registry = MetricsRegistry(tmp_path, flush_interval=60)
+        registry.counter("app_requests_total", "Requests").inc(amount=worker + 1)
+        registry._snapshot_path = lambda worker=worker: tmp_path / f"metrics-{worker}.json"
+        registry.write_snapshot()
+        registries.append(registry)
+
+    assert _samples(registries[0].render())["app_requests_total"] == 3
+    for registry in registries:
+        registry.close()
+
+def test_snapshots_of_exited_workers_are_removed(tmp_path):
+    """Test that closing removes a worker's snapshot and a scrape drops those of dead workers"""
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    (tmp_path / f"metrics-{exited.pid}.json").write_text('[["app_requests_total", [], [5]]]')
+    registry = MetricsRegistry(tmp_path, flush_interval=60)
+    registry.counter("app_requests_total", "Requests").inc()
+
+    assert _samples(registry.render())["app_requests_total"] == 1
+    assert [path.name for path in tmp_path.glob("metrics-*.json")] == [f"metrics-{os.getpid()}.json"]
+    registry.close()
+    assert list(tmp_path.glob("metrics-*.json")) == []
+
+def test_function_counter_reads_totals_at_collection(tmp_path):
+    """Test a function-backed counter reports its source's current totals, summed across workers"""
+    errors = {"request_log": 0}
+    registry = MetricsRegistry(tmp_path, flush_interval=60)
+    registry.counter_function(
+        "app_write_errors_total", "Write errors", ("writer",),
+        lambda: {(writer,): count for writer, count in errors.items()}
+    )
+    errors["request_log"] = 3
+    assert _samples(registry.render())['app_write_errors_total{writer="request_log"}'] == 3
+    errors["request_log"] = 4
+    assert _samples(registry.render())['app_write_errors_total{writer="request_log"}'] == 4
+    registry.close()
+
+def test_stage_records_into_current_trace():
+    """Test Stage feeds the histogram and, only while set, the request trace"""
+    registry = MetricsRegistry()
+    stages = registry.histogram("app_stage_seconds", "Stage", ("stage",))
+    trace = RequestTrace()
+    token = current_trace.set(trace)
+    try:
+        with Stage(stages, "intent"):
+            pass
+        with Stage(stages, "intent"):
+            pass
+    finally:
+        current_trace.reset(token)
+    with Stage(stages, "sentiment"):
+        pass
+
+    assert set(trace.stages) == {"intent"}
+    assert _samples(registry.render())['app_stage_seconds_count{stage="intent"}'] == 2
+    header = trace.server_timing()
+    assert header.startswith("intent;dur=") and header.split(", ")[-1].startswith("total;dur=")
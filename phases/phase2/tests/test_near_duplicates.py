@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from phases.phase2.near_duplicates import NearDuplicateDetector
+
+def _transcript(seed, length=60):
+    rng = np.random.default_rng(seed)
+    vocabulary = [f"word{i}" for i in range(500)]
+    return [
+        {"speaker": "Customer" if i % 2 else "Agent", "text": " ".join(rng.choice(vocabulary, 8))}
+        for i in range(length)
+    ]
+
+def test_band_layout_catches_pairs_at_threshold():
+    """Test the chosen bands and rows make a pair at the threshold a candidate"""
+    for threshold in (0.5, 0.8, 0.9, 0.95):
+        detector = NearDuplicateDetector(threshold=threshold)
+        assert detector.bands * detector.rows == detector.num_perm
+        assert 1 - (1 - threshold ** detector.rows) ** detector.bands >= 0.99
+
+def test_signature_estimates_jaccard_similarity():
+    """Test signature agreement tracks the true shingle Jaccard similarity"""
+    detector = NearDuplicateDetector(num_perm=256)
+    original = _transcript(0)
+    edited = [dict(u) for u in original]
+    for utterance in edited[:6]:
+        utterance["text"] = "completely different words here now"
+    a, b = set(detector.shingles(original)), set(detector.shingles(edited))
+    jaccard = len(a & b) / len(a | b)
+    estimate = np.mean(detector.signature(original) == detector.signature(edited))
+    assert estimate == pytest.approx(jaccard, abs=0.08)
+    assert detector.signature(original).dtype == np.uint32
+
+def test_wordless_transcripts_have_no_signature():
+    """Test transcripts without words get no signature rather than one that matches every other such transcript"""
+    detector = NearDuplicateDetector()
+    assert detector.signature([{"speaker": "Agent", "text": "..."}]) is None
+    assert detector.signature([{"speaker": "Customer", "text": "!!! ??"}]) is None
+
+def test_query_finds_near_duplicate_only():
+    """Test a lightly edited transcript matches and unrelated ones do not"""
+    detector = NearDuplicateDetector(threshold=0.8)
+    for i in range(200):
+        detector.add(f"conv-{i}", detector.signature(_transcript(i)))
+    edited = _transcript(42)
+    edited[3] = {"speaker": "Agent", "text": "let me check that for you"}
+
+    match = detector.query(detector.signature(edited))
+    assert match is not None and match[0] == "conv-42" and match[1] >= 0.8
+    assert detector.query(detector.signature(_transcript(1000))) is None
+    assert detector.query(detector.signature(_transcript(42)), exclude="conv-42") is None
+
+def test_payloads_and_eviction():
+    """Test payloads are kept and the oldest transcripts are forgotten beyond max_entries"""
+    detector = NearDuplicateDetector(max_entries=3)
+    for i in range(5):
+        detector.add(f"conv-{i}", detector.signature(_transcript(i)), payload={"n": i})
+    assert len(detector) == 3
+    assert detector.payload("conv-4") == {"n": 4}
+    assert detector.payload("conv-0") is None
+    assert detector.query(detector.signature(_transcript(0))) is None
+    assert detector.query(detector.signature(_transcript(3)))[0] == "conv-3"
+
+def test_readding_replaces_signature():
+    """Test re-adding a conversation replaces its earlier signature"""
+    detector = NearDuplicateDetector()
+    detector.add("conv-1", detector.signature(_transcript(1)))
+    detector.add("conv-1", detector.signature(_transcript(2)))
+    assert len(detector) == 1
+    assert detector.query(detector.signature(_transcript(1))) is None
+    assert detector.query(detector.signature(_transcript(2)))[0] == "conv-1"
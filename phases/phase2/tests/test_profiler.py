@@ -0,0 +1,63 @@
+import threading
+import time
+import pytest
+from phases.phase2.profiler import SamplingProfiler
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+def _parse(stacks):
+    return [line.rsplit(" ", 1) for line in stacks.splitlines()]
+
+def test_profile_returns_collapsed_stacks():
+    """Test samples of a busy thread appear as root-to-leaf collapsed stacks"""
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+    worker.start()
+    try:
+        stacks = SamplingProfiler().profile(0.3, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    lines = _parse(stacks)
+    busy = [(stack, int(count)) for stack, count in lines if stack.startswith("thread:busy;")]
+    assert busy and any("_busy_loop (tests/test_profiler.py:" in stack for stack, _ in busy)
+    assert all(count > 0 for _, count in busy)
+    assert not any("phase2/profiler.py" in stack for stack, _ in lines)
+
+def test_filtered_profile_samples_only_tracked_threads():
+    """Test a request filter limits sampling to matching tracked work"""
+    profiler = SamplingProfiler()
+    stop = threading.Event()
+
+    def handle(size):
+        while not stop.is_set():
+            with profiler.tracking(size):
+                sum(range(1000))
+
+    workers = [threading.Thread(target=handle, args=(size,), name=f"size-{size}") for size in (10, 1000)]
+    for worker in workers:
+        worker.start()
+    try:
+        stacks = profiler.profile(0.3, interval=0.005, request_filter=lambda size: size >= 100)
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+    threads = {stack.split(";")[0] for stack, _ in _parse(stacks)}
+    assert threads == {"thread:size-1000"}
+    assert profiler.tracking(1000).ident is None
+
+def test_one_profile_at_a_time():
+    """Test a second concurrent profile is refused"""
+    profiler = SamplingProfiler()
+    first = threading.Thread(target=profiler.profile, args=(0.3,))
+    first.start()
+    time.sleep(0.05)
+    with pytest.raises(RuntimeError):
+        profiler.profile(0.1)
+    first.join()
+    assert not profiler.running
@@ -0,0 +1,119 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from phases.phase2.logger import CallChemyLogger
+from phases.phase2.replay import diff, load_requests, main, replay
+
+BASE = datetime(2025, 7, 13, 10, 0, tzinfo=timezone.utc)
+
+def _request(conversation_id):
+    return {
+        "conversation_id": conversation_id,
+        "transcript": [{"speaker": "Customer", "text": "My card payment failed."}]
+    }
+
+def _entry(conversation_id, seconds, response=None, status="success"):
+    return {
+        "timestamp": (BASE + timedelta(seconds=seconds)).isoformat(),
+        "conversation_id": conversation_id,
+        "request": _request(conversation_id),
+        "response": response,
+        "status": status
+    }
+
+@pytest.fixture
+def log_dir(tmp_path):
+    """Request log with two conversations and a system entry"""
+    with open(tmp_path / "requests.jsonl", "w") as f:
+        for entry in (
+            _entry("conv-2", 2),
+            _entry("conv-1", 1),
+            {"timestamp": BASE.isoformat(), "conversation_id": "system", "request": {"event": "startup"}}
+        ):
+            f.write(json.dumps(entry) + "\n")
+    return tmp_path
+
+def test_load_requests(log_dir):
+    """Test that conversation requests are loaded in arrival order"""
+    entries = load_requests(str(log_dir))
+    assert [e["conversation_id"] for e in entries] == ["conv-1", "conv-2"]
+
+def test_load_requests_does_not_open_the_log(tmp_path):
+    """Test that reading a missing log creates no files or directories"""
+    assert load_requests(str(tmp_path / "logs")) == []
+    assert not (tmp_path / "logs").exists()
+
+def test_load_requests_restores_dedup_payloads(tmp_path):
+    """Test that deduplicated transcripts are restored from the blob store"""
+    logger = CallChemyLogger(log_dir=str(tmp_path), payload_mode="dedup")
+    logger.log_request("conv-1", _request("conv-1"))
+
+    entries = load_requests(str(tmp_path))
+    assert entries[0]["request"] == _request("conv-1")
+
+def test_diff():
+    """Test response diff paths"""
+    logged = {"timestamp": "a", "analysis": {"utterances": [{"intent": "x"}], "primary_intent": "x"}}
+    replayed = {"timestamp": "b", "analysis": {"utterances": [{"intent": "y"}], "primary_intent": "x"}}
+    assert diff(logged, replayed) == ["analysis.utterances[0].intent"]
+    assert diff({"a": [1, 2]}, {"a": [1]}) == ["a[len]"]
+    assert diff({"a": 1}, {"b": 1}) == ["a", "b"]
+    assert diff({"analysis": {"near_duplicate_of": {"conversation_id": "c"}}}, {"analysis": {}}) == []
+
+@pytest.mark.asyncio
+async def test_replay_reports_latency_and_diffs():
+    """Test the replay report with a stub target"""
+    entries = [
+        _entry("conv-1", 0, {"timestamp": "t", "primary_intent": "payment_issue"}),
+        _entry("conv-2", 0, {"timestamp": "t", "primary_intent": "payment_issue"}),
+        _entry("conv-3", 0, status="error")
+    ]
+
+    async def target(request):
+        if request["conversation_id"] == "conv-2":
+            return "success", {"timestamp": "later", "primary_intent": "card_issue"}
+        return "success", {"timestamp": "later", "primary_intent": "payment_issue"}
+
+    report = await replay(entries, target, speed=0)
+    assert report["requests"] == 3
+    assert report["outcomes"] == {"success": 3}
+    assert report["status_changes"] == {"error->success": 1}
+    assert report["responses_compared"] == 2
+    assert report["responses_with_diffs"] == 1
+    assert report["diff_paths"] == {"primary_intent": 1}
+    assert set(report["latency_ms"]) == {"p50", "p90", "p99", "max"}
+
+@pytest.mark.asyncio
+async def test_replay_keeps_arrival_rate():
+    """Test that logged inter-arrival times are scaled by speed"""
+    entries = [_entry("conv-1", 0), _entry("conv-2", 10)]
+
+    async def target(request):
+        return "success", None
+
+    report = await replay(entries, target, speed=100)
+    assert report["elapsed_seconds"] >= 0.1
+
+@pytest.mark.asyncio
+async def test_replay_times_requests_from_their_scheduled_arrival():
+    """Test that time spent waiting for a slot counts towards latency"""
+    def entries():
+        for i in range(4):
+            yield _entry(f"conv-{i}", 0)
+
+    async def target(request):
+        await asyncio.sleep(0.05)
+        return "success", None
+
+    report = await replay(entries(), target, speed=1, concurrency=1)
+    assert report["requests"] == 4
+    # The last request waited for three others before it was sent
+    assert report["latency_ms"]["max"] >= 190
+
+def test_cli_in_process(log_dir, capsys):
+    """Test an in-process replay of the logged requests"""
+    main(["--log-dir", str(log_dir), "--speed", "0"])
+    report = json.loads(capsys.readouterr().out)
+    assert report["requests"] == 2
+    assert report["outcomes"] == {"success": 2}
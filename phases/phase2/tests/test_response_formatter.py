@@ -42,6 +42,7 @@ def test_full_response(formatter):
     assert result["overall_sentiment"] == "negative"
     assert result["primary_intent"] == "card_problem"
     assert "card" in str(result["utterances"][0]["keywords"]["products"])
+    assert result["key_findings"] == {"products": ["card"], "actions": ["blocked", "unblock"]}
 
 def test_missing_fields(formatter):
     """Test handling of missing optional fields"""
@@ -58,4 +59,69 @@ def test_missing_fields(formatter):
     assert result["conversation_id"] == conversation_id
     assert result["utterances"][0]["intent"] == "no_intent_detected"
     assert result["utterances"][0]["sentiment"] == "not_analyzed"
-    assert result["summary"] is None
\ No newline at end of file
+    assert result["summary"] is None
+
+@pytest.fixture
+def api_response():
+    return {
+        "conversation_id": "test-789",
+        "timestamp": "2025-07-13T14:30:00+00:00",
+        "analysis": {
+            "utterances": [
+                {
+                    "speaker": "Customer",
+                    "text": "My card is blocked",
+                    "intent": "card_problem",
+                    "sentiment": "negative",
+                    "keywords": {"financial_terms": [], "products": ["card"], "actions": ["blocked"], "dates": []}
+                },
+                {
+                    "speaker": "Agent",
+                    "text": "Let me check",
+                    "intent": "no_intent_detected",
+                    "sentiment": "not_analyzed",
+                    "keywords": {"financial_terms": [], "products": [], "actions": [], "dates": []}
+                },
+                {
+                    "speaker": "Customer",
+                    "text": "The card was declined",
+                    "intent": "card_problem",
+                    "sentiment": "negative",
+                    "keywords": {"financial_terms": [], "products": ["card"], "actions": ["declined"], "dates": []}
+                }
+            ],
+            "overall_sentiment": "negative",
+            "primary_intent": "card_problem"
+        }
+    }
+
+def test_compact_aggregates_only(formatter, api_response):
+    """Test selecting only aggregate fields"""
+    result = formatter.compact_response(api_response, fields=["overall_sentiment", "primary_intent"])
+
+    assert result["conversation_id"] == "test-789"
+    assert result["analysis"] == {"overall_sentiment": "negative", "primary_intent": "card_problem"}
+
+def test_compact_utterance_fields_and_omit_empty(formatter, api_response):
+    """Test dropping echoed text and empty keyword categories"""
+    result = formatter.compact_response(
+        api_response,
+        utterance_fields=["intent", "keywords"],
+        omit_empty=True
+    )
+
+    utterances = result["analysis"]["utterances"]
+    assert utterances[0] == {"intent": "card_problem", "keywords": {"products": ["card"], "actions": ["blocked"]}}
+    assert utterances[1] == {"intent": "no_intent_detected"}
+    # Input response is left untouched
+    assert "text" in api_response["analysis"]["utterances"][0]
+
+def test_compact_encode_labels(formatter, api_response):
+    """Test dictionary encoding of intent and sentiment labels"""
+    result = formatter.compact_response(api_response, encode_labels=True)
+
+    analysis = result["analysis"]
+    assert analysis["labels"]["intent"] == ["card_problem", "no_intent_detected"]
+    assert analysis["labels"]["sentiment"] == ["negative", "not_analyzed"]
+    assert [u["intent"] for u in analysis["utterances"]] == [0, 1, 0]
+    assert [u["sentiment"] for u in analysis["utterances"]] == [0, 1, 0]
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from phases.phase2.results_store import ResultsStore
+
+BASE = datetime(2025, 7, 13, 10, 0, tzinfo=timezone.utc)
+
+def _response(conversation_id, minutes=0, intent="payment_issue", sentiment="negative"):
+    return {
+        "conversation_id": conversation_id,
+        "timestamp": (BASE + timedelta(minutes=minutes)).isoformat(),
+        "analysis": {"primary_intent": intent, "overall_sentiment": sentiment, "utterances": []}
+    }
+
+@pytest.fixture
+def store(tmp_path):
+    results = ResultsStore(str(tmp_path / "results.sqlite"))
+    yield results
+    results.close()
+
+def test_save_and_get(store):
+    """Test storing and fetching a result through the background writer"""
+    store.save(_response("conv-1"))
+    store.flush()
+
+    assert store.get("conv-1") == _response("conv-1")
+    assert store.get("missing") is None
+
+def test_reanalysis_replaces_result(store):
+    """Test that a newer result replaces the stored one"""
+    store.save(_response("conv-1", intent="payment_issue"))
+    store.save(_response("conv-1", minutes=5, intent="card_problem"))
+    store.flush()
+
+    assert store.get("conv-1")["analysis"]["primary_intent"] == "card_problem"
+
+def test_query_filters(store):
+    """Test indexed queries by intent, sentiment and time window"""
+    store.save(_response("conv-1", 0, "payment_issue", "negative"))
+    store.save(_response("conv-2", 10, "payment_issue", "positive"))
+    store.save(_response("conv-3", 20, "card_problem", "negative"))
+    store.flush()
+
+    assert [r["conversation_id"] for r in store.query(primary_intent="payment_issue")] == ["conv-2", "conv-1"]
+    assert [r["conversation_id"] for r in store.query(overall_sentiment="negative", limit=1)] == ["conv-3"]
+    window = store.query(start=BASE + timedelta(minutes=5), end=BASE + timedelta(minutes=15))
+    assert [r["conversation_id"] for r in window] == ["conv-2"]
+
+def test_synchronous_mode_and_reopen(tmp_path):
+    """Test synchronous writes and that results persist across instances"""
+    path = str(tmp_path / "results.sqlite")
+    store = ResultsStore(path, background=False)
+    store.save(_response("conv-1"))
+    store.close()
+
+    reopened = ResultsStore(path)
+    assert reopened.get("conv-1")["conversation_id"] == "conv-1"
+    reopened.close()
+
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow"])
+def test_export(store, tmp_path, suffix):
+    """Test columnar export of stored results"""
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+    store.save(_response("conv-1", 0), tenant="bank-a")
+    store.save(_response("conv-2", 10, intent="card_problem"))
+    store.flush()
+
+    path = str(tmp_path / f"results{suffix}")
+    assert store.export(path, start=BASE + timedelta(minutes=5)) == 1
+    if suffix == ".parquet":
+        table = pa.parquet.read_table(path)
+    else:
+        table = pa.ipc.open_file(path).read_all()
+    assert table.column("conversation_id").to_pylist() == ["conv-2"]
+    assert table.column("primary_intent").to_pylist() == ["card_problem"]
+
+    with pytest.raises(ValueError):
+        store.export(str(tmp_path / "results.csv"))
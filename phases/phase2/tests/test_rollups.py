@@ -0,0 +1,128 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from phases.phase2.rollups import Rollup, RollupStore
+
+BASE = datetime(2025, 7, 13, 10, 0, tzinfo=timezone.utc)
+
+def _response(minutes, intent="card_problem", sentiment="negative", products=("card",)):
+    return {
+        "conversation_id": f"conv-{minutes}",
+        "timestamp": (BASE + timedelta(minutes=minutes)).isoformat(),
+        "analysis": {
+            "primary_intent": intent,
+            "overall_sentiment": sentiment,
+            "utterances": [
+                {"speaker": "Customer", "intent": intent, "sentiment": sentiment,
+                 "keywords": {"products": list(products), "actions": ["blocked"]}}
+            ]
+        }
+    }
+
+def test_rollup_merge_and_serialize():
+    """Test that rollups merge and survive a dict round trip"""
+    first, second = Rollup(), Rollup()
+    first.add(_response(0))
+    second.add(_response(1, "balance_inquiry", "positive", ("savings",)))
+    merged = Rollup.from_dict((first + second).to_dict())
+
+    summary = merged.summary()
+    assert summary["conversations"] == 2
+    assert summary["primary_intents"] == {"card_problem": 1, "balance_inquiry": 1}
+    assert summary["top_keywords"]["actions"] == {"blocked": 2}
+    assert first.conversations == 1
+
+def test_query_by_granularity_and_tenant():
+    """Test hourly, daily and total queries with tenant filtering"""
+    store = RollupStore()
+    store.record(_response(0), "bank-a")
+    store.record(_response(30, "balance_inquiry", "positive"), "bank-a")
+    store.record(_response(90), "bank-b")
+    store.record(_response(24 * 60))
+
+    assert store.tenants() == ["bank-a", "bank-b", "default"]
+    total = store.query(BASE, BASE + timedelta(hours=2))
+    assert total[0]["conversations"] == 3
+    assert total[0]["primary_intents"] == {"card_problem": 2, "balance_inquiry": 1}
+
+    hours = store.query(BASE, BASE + timedelta(hours=2), granularity="hour")
+    assert [h["conversations"] for h in hours] == [2, 1]
+    assert hours[0]["start"] == BASE.isoformat()
+
+    days = store.query(granularity="day")
+    assert [d["conversations"] for d in days] == [3, 1]
+    assert store.query(tenant="bank-a")[0]["overall_sentiments"] == {"negative": 1, "positive": 1}
+
+    with pytest.raises(ValueError):
+        store.query(granularity="week")
+
+def test_persistence(tmp_path):
+    """Test that rollups are persisted and reloaded"""
+    path = str(tmp_path / "rollups.sqlite")
+    store = RollupStore(path)
+    store.record(_response(0), "bank-a")
+    store.record(_response(5), "bank-a")
+    store.close()
+
+    reloaded = RollupStore(path)
+    assert reloaded.query(tenant="bank-a")[0]["conversations"] == 2
+    reloaded.record(_response(10), "bank-a")
+    reloaded.close()
+    assert RollupStore(path).query()[0]["conversations"] == 3
+
+def test_workers_share_the_database(tmp_path):
+    """Test that stores sharing a database merge concurrent writes and query each other's data"""
+    path = str(tmp_path / "rollups.sqlite")
+    workers = [RollupStore(path), RollupStore(path)]
+
+    def record(store):
+        for minutes in range(50):
+            store.record(_response(minutes), "bank-a")
+            store.flush()
+
+    threads = [threading.Thread(target=record, args=(store,)) for store in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [store.query()[0]["conversations"] for store in workers] == [100, 100]
+    assert workers[0].tenants() == ["bank-a"]
+    for store in workers:
+        store.close()
+
+def test_closed_hours_are_cached(tmp_path):
+    """Test that stored buckets before the previous hour are cached and recent ones are not"""
+    store = RollupStore(str(tmp_path / "rollups.sqlite"))
+    now = datetime.now(timezone.utc)
+    for moment in (now - timedelta(hours=5), now):
+        store.record({**_response(0), "timestamp": moment.isoformat()})
+    store.flush()
+
+    assert store.query()[0]["conversations"] == 2
+    assert [bucket for _, bucket in store._buckets] == [store.bucket_for(now - timedelta(hours=5))]
+    store.close()
+
+def test_memory_buckets_expire():
+    """Test that in-memory buckets older than the window behind the newest one are dropped"""
+    store = RollupStore(memory_days=1)
+    store.record(_response(0))
+    store.record(_response(60 * 30))
+
+    assert store.query()[0]["conversations"] == 1
+    assert len(store._buckets) == 1
+
+@pytest.mark.performance
+def test_month_query_performance():
+    """Test that a month of hourly buckets is queried in milliseconds"""
+    store = RollupStore()
+    for hour in range(30 * 24):
+        response = _response(hour * 60, products=(f"product-{hour % 50}",))
+        store.record(response, "bank-a")
+
+    started = time.perf_counter()
+    result = store.query(BASE, BASE + timedelta(days=30))
+    elapsed = time.perf_counter() - started
+    assert result[0]["conversations"] == 720
+    assert elapsed < 0.25
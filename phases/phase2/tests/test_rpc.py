@@ -0,0 +1,122 @@
+import pytest
+import pytest_asyncio
+
+pytest.importorskip("msgpack")
+
+from phases.phase2.api.main import API_KEY, create_rpc_server
+from phases.phase2.api.rpc import RPCClient, RPCError
+
+CONVERSATION = {
+    "conversation_id": "rpc-001",
+    "transcript": [
+        {"speaker": "Customer", "text": "My debit card is blocked"},
+        {"speaker": "Agent", "text": "Let me check that for you"}
+    ]
+}
+
+@pytest_asyncio.fixture
+async def server():
+    rpc_server = create_rpc_server()
+    await rpc_server.start(host="127.0.0.1", port=0)
+    yield rpc_server
+    await rpc_server.close()
+
+def _port(server):
+    return server.sockets[0].getsockname()[1]
+
+@pytest.mark.asyncio
+async def test_analyze(server):
+    client = await RPCClient.connect(API_KEY, port=_port(server))
+    reply = await client.call("analyze", CONVERSATION)
+    await client.close()
+
+    assert reply["id"] == 2
+    assert reply["result"]["conversation_id"] == "rpc-001"
+    assert reply["result"]["analysis"]["primary_intent"] == "card_problem"
+
+@pytest.mark.asyncio
+async def test_pipelined_requests_keep_order(server):
+    client = await RPCClient.connect(API_KEY, port=_port(server))
+    calls = [
+        ("analyze", {**CONVERSATION, "conversation_id": f"rpc-{i}"}) for i in range(20)
+    ] + [("analyze_batch", {"conversations": [CONVERSATION]})]
+    replies = await client.pipeline(calls)
+    await client.close()
+
+    assert [r["result"]["conversation_id"] for r in replies[:20]] == [f"rpc-{i}" for i in range(20)]
+    assert replies[20]["result"]["results"][0]["conversation_id"] == "rpc-001"
+
+@pytest.mark.asyncio
+async def test_errors(server):
+    client = await RPCClient.connect(API_KEY, port=_port(server))
+    invalid, unknown = await client.pipeline([
+        ("analyze", {"conversation_id": "rpc-002", "transcript": [{"speaker": "Invalid", "text": "Hi"}]}),
+        ("missing", {})
+    ])
+    await client.close()
+
+    assert invalid["error"]["status"] == 422
+    assert unknown["error"]["status"] == 404
+
+@pytest.mark.asyncio
+async def test_authentication_required(server):
+    with pytest.raises(RPCError) as exc_info:
+        await RPCClient.connect("wrong-key", port=_port(server))
+    assert exc_info.value.status == 401
+
+@pytest.mark.asyncio
+async def test_bad_frames_get_error_frames(server):
+    """Test oversized and malformed frames are answered with errors and the connection stays usable"""
+    from phases.phase2.api.rpc import HEADER, _read_frame
+
+    server.max_frame_size = 1024
+    client = await RPCClient.connect(API_KEY, port=_port(server))
+    client.writer.write(HEADER.pack(2048) + b"x" * 2048)
+    client.writer.write(HEADER.pack(3) + b"\xc1\xc1\xc1")
+    await client.writer.drain()
+    oversized = await _read_frame(client.reader, 1 << 20)
+    malformed = await _read_frame(client.reader, 1 << 20)
+    reply = await client.call("analyze", CONVERSATION)
+    await client.close()
+
+    assert oversized["error"]["status"] == 413
+    assert malformed["error"]["status"] == 400
+    assert reply["result"]["conversation_id"] == "rpc-001"
+
+@pytest.mark.asyncio
+async def test_handlers_do_not_block_the_event_loop():
+    """Test a slow handler runs in the thread pool while the event loop keeps serving"""
+    import asyncio
+    import threading
+    from phases.phase2.api.rpc import RPCServer
+
+    release = threading.Event()
+    rpc_server = RPCServer({"slow": lambda params: release.wait(5), "fast": lambda params: "ok"}, api_key=API_KEY)
+    await rpc_server.start(host="127.0.0.1", port=0)
+    try:
+        slow_client = await RPCClient.connect(API_KEY, port=_port(rpc_server))
+        fast_client = await RPCClient.connect(API_KEY, port=_port(rpc_server))
+        slow = asyncio.create_task(slow_client.call("slow", {}))
+        fast = await asyncio.wait_for(fast_client.call("fast", {}), 2)
+        release.set()
+        assert fast["result"] == "ok"
+        assert (await slow)["result"] is True
+        await slow_client.close()
+        await fast_client.close()
+    finally:
+        await rpc_server.close()
+
+@pytest.mark.asyncio
+async def test_unix_socket_is_not_taken_over(tmp_path):
+    """Test a second server refuses a socket path that a live server is listening on"""
+    path = str(tmp_path / "rpc.sock")
+    first, second = create_rpc_server(), create_rpc_server()
+    await first.start(path=path)
+    try:
+        with pytest.raises(RuntimeError):
+            await second.start(path=path)
+        client = await RPCClient.connect(API_KEY, path=path)
+        assert (await client.call("analyze", CONVERSATION))["result"]["conversation_id"] == "rpc-001"
+        await client.close()
+    finally:
+        await first.close()
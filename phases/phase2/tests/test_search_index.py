@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from phases.phase2.results_store import ResultsStore
+from phases.phase2.search_index import KeywordSearchIndex, QuerySyntaxError
+
+BASE = datetime(2025, 7, 13, 10, 0, tzinfo=timezone.utc)
+
+def _response(conversation_id, minutes, intent, products=(), actions=()):
+    return {
+        "conversation_id": conversation_id,
+        "timestamp": (BASE + timedelta(minutes=minutes)).isoformat(),
+        "analysis": {
+            "primary_intent": intent,
+            "utterances": [
+                {"speaker": "Customer", "intent": intent,
+                 "keywords": {"products": list(products), "actions": list(actions)}},
+                {"speaker": "Agent", "intent": "no_intent_detected", "keywords": {}}
+            ]
+        }
+    }
+
+@pytest.fixture
+def index():
+    search = KeywordSearchIndex()
+    search.add_many([
+        _response("conv-1", 0, "card_problem", ["Debit Card"], ["blocked"]),
+        _response("conv-2", 10, "card_problem", ["credit card"], ["blocked"]),
+        _response("conv-3", 20, "balance_inquiry", ["savings"]),
+        _response("conv-4", 30, "transaction_issue", ["debit card"], ["declined"])
+    ])
+    return search
+
+def _ids(result):
+    return [r["conversation_id"] for r in result["results"]]
+
+def test_terms_for():
+    """Test that keywords are lowercased and intents prefixed"""
+    terms = KeywordSearchIndex.terms_for(_response("conv-1", 0, "card_problem", ["Debit Card"], ["blocked"]))
+    assert terms == ["blocked", "debit card", "intent:card_problem", "primary_intent:card_problem"]
+
+def test_boolean_queries(index):
+    """Test AND, OR, NOT, implicit AND and parentheses"""
+    assert _ids(index.search('"debit card" AND blocked')) == ["conv-1"]
+    assert _ids(index.search('"debit card" blocked')) == ["conv-1"]
+    assert _ids(index.search('savings OR declined')) == ["conv-4", "conv-3"]
+    assert _ids(index.search('blocked NOT "credit card"')) == ["conv-1"]
+    assert _ids(index.search('intent:card_problem AND ("debit card" OR savings)')) == ["conv-1"]
+    assert index.search("unknown")["total"] == 0
+
+def test_long_not_chains_and_deep_nesting(index):
+    """Test NOT chains of any length evaluate and over-deep parentheses are a syntax error, not a crash"""
+    assert _ids(index.search("NOT " * 2000 + "savings")) == _ids(index.search("savings"))
+    assert _ids(index.search("NOT " * 2001 + "savings")) == _ids(index.search("NOT savings"))
+    assert _ids(index.search("(" * 32 + "savings" + ")" * 32)) == _ids(index.search("savings"))
+    with pytest.raises(QuerySyntaxError):
+        index.search("(" * 2000 + "savings" + ")" * 2000)
+
+def test_time_range_and_limit(index):
+    """Test time filtering and newest-first limits"""
+    result = index.search("blocked OR declined", start=BASE + timedelta(minutes=5), end=BASE + timedelta(minutes=30))
+    assert _ids(result) == ["conv-2"]
+    limited = index.search("primary_intent:card_problem OR savings", limit=2)
+    assert limited["total"] == 3
+    assert _ids(limited) == ["conv-3", "conv-2"]
+
+def test_reanalysis_replaces_document(index):
+    """Test that a reanalyzed conversation is only found by its new terms"""
+    index.add(_response("conv-1", 40, "balance_inquiry", ["savings"]))
+
+    assert len(index) == 4
+    assert _ids(index.search("blocked")) == ["conv-2"]
+    assert _ids(index.search("savings")) == ["conv-1", "conv-3"]
+    assert "conv-1" not in _ids(index.search("NOT savings"))
+
+def test_compaction(index):
+    """Test that compacting drops superseded documents without changing results"""
+    index.add(_response("conv-1", 40, "balance_inquiry", ["savings"]))
+    index.compact()
+
+    assert len(index._conversation_ids) == 4
+    assert list(index._postings["blocked"]) == [index._doc_for["conv-2"]]
+    assert _ids(index.search("savings")) == ["conv-1", "conv-3"]
+    assert _ids(index.search("NOT savings")) == ["conv-4", "conv-2"]
+
+def test_repeated_reanalysis_compacts_automatically():
+    """Test that superseded documents do not accumulate"""
+    search = KeywordSearchIndex()
+    search.COMPACT_MIN_DELETED = 4
+    for minutes in range(20):
+        search.add(_response("conv-1", minutes, "card_problem", ["debit card"]))
+
+    assert len(search._conversation_ids) < 10
+    assert _ids(search.search('"debit card"')) == ["conv-1"]
+
+def test_sync_from_results_store(tmp_path):
+    """Test that the index is rebuilt from a results store and picks up later writes once"""
+    store = ResultsStore(str(tmp_path / "results.sqlite"), background=False)
+    store.save(_response("conv-1", 0, "card_problem", ["debit card"]))
+    store.save(_response("conv-2", 10, "card_problem", ["debit card"]))
+    search = KeywordSearchIndex()
+
+    assert search.sync_from(store) == 2
+    search.add(_response("conv-3", 20, "card_problem", ["debit card"]))
+    store.save(_response("conv-3", 20, "card_problem", ["debit card"]))
+    store.save(_response("conv-1", 30, "balance_inquiry", ["savings"]))
+    assert search.sync_from(store) == 2
+    assert search.sync_from(store) == 0
+
+    assert len(search._conversation_ids) == 4
+    assert _ids(search.search('"debit card"')) == ["conv-3", "conv-2"]
+    store.close()
+
+@pytest.mark.parametrize("query", ["", "AND blocked", "(blocked", "blocked)", 'blocked "open'])
+def test_syntax_errors(index, query):
+    """Test that malformed queries are rejected"""
+    with pytest.raises(QuerySyntaxError):
+        index.search(query)
@@ -0,0 +1,143 @@
+import json
+import httpx
+import pytest
+from phases.phase2.tracing import (
+    KIND_SERVER, STATUS_ERROR, FileSpanExporter, OtlpHttpExporter, SpanContext, Tracer, current_span,
+    parse_traceparent
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+class MemoryExporter:
+    def __init__(self):
+        self.requests = []
+
+    def export(self, request):
+        self.requests.append(request)
+
+    def close(self):
+        pass
+
+    @property
+    def spans(self):
+        return [
+            span
+            for request in self.requests
+            for resource in request["resourceSpans"]
+            for scope in resource["scopeSpans"]
+            for span in scope["spans"]
+        ]
+
+def _attributes(span):
+    return {attribute["key"]: list(attribute["value"].values())[0] for attribute in span["attributes"]}
+
+def test_parse_traceparent():
+    """Test valid traceparent headers parse and malformed ones are ignored"""
+    context = parse_traceparent(f"00-{TRACE_ID}-00f067aa0ba902b7-01")
+    assert context == SpanContext(TRACE_ID, "00f067aa0ba902b7", True)
+    assert context.traceparent() == f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+    assert not parse_traceparent(f"00-{TRACE_ID}-00f067aa0ba902b7-00").sampled
+    for value in (None, "", "garbage", f"ff-{TRACE_ID}-00f067aa0ba902b7-01", f"00-{'0' * 32}-00f067aa0ba902b7-01"):
+        assert parse_traceparent(value) is None
+
+def test_spans_nest_and_inherit_ids():
+    """Test children share the trace, point at their parent and carry inherited attributes"""
+    exporter = MemoryExporter()
+    tracer = Tracer()
+    tracer.configure(exporter, sample_rate=1.0)
+    try:
+        with tracer.start_span("request", kind=KIND_SERVER, inherited={"request.id": "req-1"}) as root:
+            with tracer.start_span("analyze", inherited={"conversation.id": "conv-1"}):
+                with tracer.span("intent", attributes={"stage.size": 3}):
+                    pass
+                with pytest.raises(ValueError):
+                    with tracer.span("sentiment"):
+                        raise ValueError("bad transcript")
+        assert current_span.get() is None
+        tracer.flush()
+    finally:
+        tracer.close()
+
+    spans = {span["name"]: span for span in exporter.spans}
+    assert set(spans) == {"request", "analyze", "intent", "sentiment"}
+    assert {span["traceId"] for span in spans.values()} == {root.context.trace_id}
+    assert "parentSpanId" not in spans["request"] and spans["request"]["kind"] == KIND_SERVER
+    assert spans["intent"]["parentSpanId"] == spans["analyze"]["spanId"]
+    assert _attributes(spans["intent"]) == {"request.id": "req-1", "conversation.id": "conv-1", "stage.size": "3"}
+    assert spans["sentiment"]["status"] == {"code": STATUS_ERROR, "message": "ValueError: bad transcript"}
+    assert int(spans["intent"]["endTimeUnixNano"]) >= int(spans["intent"]["startTimeUnixNano"])
+
+def test_span_finishing_after_its_writer_closed_is_dropped():
+    """Test a span ending while shutdown closes the export writer is counted as dropped, not raised"""
+    tracer = Tracer()
+    tracer.configure(MemoryExporter(), sample_rate=1.0)
+    try:
+        with tracer.start_span("request"):
+            # As close() would, between _finish reading the writer and submitting to it
+            tracer._writer.close()
+        assert tracer.dropped == 1
+    finally:
+        tracer.close()
+
+def test_sampling():
+    """Test the sample rate applies to new traces and incoming traces keep the caller's decision"""
+    exporter = MemoryExporter()
+    tracer = Tracer()
+    tracer.configure(exporter, sample_rate=0.25)
+    try:
+        sampled = 0
+        for _ in range(2000):
+            with tracer.start_span("request") as span:
+                sampled += span.context.sampled
+                with tracer.span("stage"):
+                    pass
+        unsampled_parent = SpanContext(TRACE_ID, "00f067aa0ba902b7", False)
+        with tracer.start_span("continued", remote_parent=unsampled_parent) as span:
+            assert span.context.trace_id == TRACE_ID and not span.context.sampled
+        with tracer.start_span("continued", remote_parent=unsampled_parent._replace(sampled=True)) as span:
+            assert span.parent_id == "00f067aa0ba902b7"
+        tracer.flush()
+    finally:
+        tracer.close()
+    assert 400 < sampled < 600
+    assert len(exporter.spans) == 2 * sampled + 1
+
+def test_disabled_tracer_only_runs_inner():
+    """Test an unconfigured tracer records nothing but still enters the wrapped context manager"""
+    tracer = Tracer()
+    entered = []
+
+    class Inner:
+        def __enter__(self):
+            entered.append("enter")
+
+        def __exit__(self, *exc_info):
+            entered.append("exit")
+
+    with tracer.start_span("request"):
+        assert current_span.get() is None
+        with tracer.span("stage", Inner()):
+            pass
+    assert entered == ["enter", "exit"]
+
+def test_file_and_otlp_exporters(tmp_path):
+    """Test both exporters write OTLP/JSON export requests"""
+    path = tmp_path / "traces" / "spans.jsonl"
+    tracer = Tracer(service_name="callchemy-test")
+    tracer.configure(FileSpanExporter(str(path)))
+    with tracer.start_span("request"):
+        pass
+    tracer.close()
+    request = json.loads(path.read_text().splitlines()[0])
+    resource = request["resourceSpans"][0]
+    assert _attributes(resource["resource"]) == {"service.name": "callchemy-test"}
+    assert resource["scopeSpans"][0]["spans"][0]["name"] == "request"
+
+    posted = []
+    exporter = OtlpHttpExporter("http://collector:4318")
+    exporter._client = httpx.Client(
+        transport=httpx.MockTransport(lambda request: posted.append(request) or httpx.Response(200))
+    )
+    exporter.export(request)
+    assert str(posted[0].url) == "http://collector:4318/v1/traces"
+    assert json.loads(posted[0].content) == request
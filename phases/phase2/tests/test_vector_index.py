@@ -0,0 +1,150 @@
+import time
+import numpy as np
+import pytest
+from phases.phase2.vector_index import IVFIndex
+
+def _clustered(n, dim=32, clusters=50, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, n)] + 0.3 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def _exact(vectors, query, k):
+    return {f"conv-{i}" for i in np.argsort(-(vectors @ query))[:k]}
+
+def test_exact_search_before_training():
+    """Test brute-force search while the index is small"""
+    vectors = _clustered(200)
+    index = IVFIndex(32, n_lists=8)
+    for i, vector in enumerate(vectors):
+        index.add(f"conv-{i}", vector)
+
+    assert not index.trained
+    results = index.search(vectors[0], k=5)
+    assert results[0][0] == "conv-0"
+    assert {key for key, _ in results} == _exact(vectors, vectors[0], 5)
+
+def test_trained_search_recall():
+    """Test approximate search after automatic training"""
+    vectors = _clustered(3000)
+    index = IVFIndex(32, n_lists=16, n_probe=4, train_size=1000)
+    for i, vector in enumerate(vectors):
+        index.add(f"conv-{i}", vector)
+
+    assert index.wait_for_training(timeout=30)
+    assert index.trained
+    recall = np.mean([
+        len({key for key, _ in index.search(vectors[i], k=10)} & _exact(vectors, vectors[i], 10)) / 10
+        for i in range(0, 3000, 100)
+    ])
+    assert recall > 0.9
+
+def test_replace_and_similar_to():
+    """Test replacing a vector and excluding the query conversation"""
+    vectors = _clustered(100)
+    index = IVFIndex(32, n_lists=4)
+    for i, vector in enumerate(vectors):
+        index.add(f"conv-{i}", vector)
+    index.add("conv-0", vectors[1])
+
+    assert len(index) == 100
+    neighbours = index.similar_to("conv-0", k=3)
+    assert "conv-0" not in [key for key, _ in neighbours]
+    assert neighbours[0] == ("conv-1", pytest.approx(1.0, abs=1e-3))
+    with pytest.raises(KeyError):
+        index.similar_to("missing")
+
+def test_replaced_rows_are_compacted():
+    """Test re-adding keys keeps the arrays bounded and the index searchable, trained or not"""
+    vectors = _clustered(50)
+    index = IVFIndex(32, n_lists=4)
+    index.COMPACT_MIN_DELETED = 10
+    for _ in range(5):
+        for i, vector in enumerate(vectors):
+            index.add(f"conv-{i}", vector)
+        if not index.trained:
+            index.train()
+
+    assert len(index) == 50
+    assert index._count < 100
+    assert sum(len(cell) for cell in index._lists) == index._count
+    assert index.search(vectors[3], k=1)[0][0] == "conv-3"
+    assert index.similar_to("conv-3", k=1)[0][0] != "conv-3"
+
+def test_save_and_load(tmp_path):
+    """Test persistence of a trained index"""
+    vectors = _clustered(500)
+    index = IVFIndex(32, n_lists=8, train_size=300)
+    for i, vector in enumerate(vectors):
+        index.add(f"conv-{i}", vector)
+    index.wait_for_training()
+    path = str(tmp_path / "vectors.npz")
+    index.save(path)
+
+    loaded = IVFIndex.load(path)
+    assert loaded.trained and len(loaded) == 500
+    assert loaded.search(vectors[7], k=3) == index.search(vectors[7], k=3)
+    loaded.add("conv-new", vectors[7])
+    assert "conv-new" in [key for key, _ in loaded.similar_to("conv-7", k=1)]
+
+def test_training_does_not_block_adds():
+    """Test that reaching the training threshold trains in the background while searches stay exact"""
+    vectors = _clustered(400)
+    index = IVFIndex(32, n_lists=8, train_size=300)
+    index._train_lock.acquire()
+    for i, vector in enumerate(vectors):
+        index.add(f"conv-{i}", vector)
+
+    assert not index.trained
+    assert not index.wait_for_training(timeout=0.05)
+    assert {key for key, _ in index.search(vectors[0], k=5)} == _exact(vectors, vectors[0], 5)
+    index._train_lock.release()
+    assert index.wait_for_training(timeout=30)
+    assert index.trained
+    assert index.search(vectors[0], k=1)[0][0] == "conv-0"
+
+def test_explicit_train():
+    """Test training on demand below the automatic threshold"""
+    vectors = _clustered(200)
+    index = IVFIndex(32, n_lists=8)
+    for i, vector in enumerate(vectors):
+        index.add(f"conv-{i}", vector)
+    index.train()
+
+    assert index.trained
+    assert sum(len(cell) for cell in index._lists) == 200
+
+def test_worker_files_are_merged(tmp_path):
+    """Test that per-worker saves are combined on load, the newest vector winning"""
+    vectors = _clustered(300)
+    path = str(tmp_path / "vectors.npz")
+    first, second = IVFIndex(32, n_lists=8), IVFIndex(32, n_lists=8)
+    for i in range(200):
+        first.add(f"conv-{i}", vectors[i])
+    for i in range(150, 300):
+        second.add(f"conv-{i}", vectors[i])
+    second.add("conv-0", vectors[1])
+    first.save(str(IVFIndex.worker_path(path, 101)))
+    second.save(str(IVFIndex.worker_path(path, 102)))
+
+    merged, files = IVFIndex.load_merged(path, 32)
+    assert len(merged) == 300
+    assert [f.name for f in files] == ["vectors.101.npz", "vectors.102.npz"]
+    assert merged.similar_to("conv-0", k=1)[0] == ("conv-1", pytest.approx(1.0, abs=1e-3))
+
+    empty, files = IVFIndex.load_merged(str(tmp_path / "missing.npz"), 32, n_lists=4)
+    assert len(empty) == 0 and empty.n_lists == 4 and files == []
+
+@pytest.mark.performance
+def test_query_latency():
+    """Test that queries over a large trained index stay well under 100 ms"""
+    vectors = _clustered(100000, dim=128, clusters=500)
+    index = IVFIndex(128, n_lists=256, train_size=20000)
+    for i, vector in enumerate(vectors):
+        index.add(f"conv-{i}", vector)
+    index.wait_for_training()
+
+    started = time.perf_counter()
+    for i in range(20):
+        index.search(vectors[i], k=10)
+    assert (time.perf_counter() - started) / 20 < 0.1
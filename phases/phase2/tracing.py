@@ -0,0 +1,321 @@
+import json
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import httpx
+
+from phases.phase2.background_writer import BackgroundWriter
+
+# OTLP span kinds and status codes
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 1, 2
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+class SpanContext(NamedTuple):
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+    def traceparent(self) -> str:
+        """The context as a W3C ``traceparent`` header value"""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """Parse a W3C ``traceparent`` header; invalid or missing headers give None"""
+    match = _TRACEPARENT.match(value.strip().lower()) if value else None
+    if match is None:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1))
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+class Span:
+    """
+    One timed operation of a trace. Entering the span makes it the current
+    span, so spans started inside it become its children; exiting ends it,
+    marks it as an error if an exception escaped, and hands it to the
+    tracer for export. ``inherited`` attributes are copied to every
+    descendant, so each step of a request carries its request and
+    conversation IDs.
+    """
+    __slots__ = (
+        "tracer", "name", "context", "parent_id", "kind", "attributes", "inherited", "inner",
+        "start_ns", "end_ns", "status", "status_message", "_token"
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        context: SpanContext,
+        parent_id: Optional[str],
+        kind: int,
+        attributes: Dict[str, Any],
+        inherited: Dict[str, Any],
+        inner: Any = None
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.inherited = inherited
+        self.inner = inner
+        self.start_ns = 0
+        self.end_ns = 0
+        self.status = STATUS_OK
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        if self.inner is not None:
+            self.inner.__enter__()
+        self._token = current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end_ns = time.time_ns()
+        current_span.reset(self._token)
+        if exc is not None:
+            self.status = STATUS_ERROR
+            self.status_message = f"{exc_type.__name__}: {exc}"
+        if self.context.sampled:
+            self.tracer._finish(self)
+        if self.inner is not None:
+            self.inner.__exit__(exc_type, exc, tb)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+current_span: ContextVar[Optional[Span]] = ContextVar("callchemy_current_span", default=None)
+
+class _NoopSpan:
+    """Stands in for spans that are not recorded; only enters the wrapped context manager"""
+    __slots__ = ("inner",)
+
+    def __init__(self, inner: Any = None):
+        self.inner = inner
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        if self.inner is not None:
+            self.inner.__enter__()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.inner is not None:
+            self.inner.__exit__(*exc_info)
+
+_NOOP = _NoopSpan()
+
+class FileSpanExporter:
+    """Appends each batch as one OTLP/JSON ``ExportTraceServiceRequest`` line, as the collector's file exporter does"""
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, request: Dict[str, Any]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(request, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        pass
+
+class OtlpHttpExporter:
+    """Posts batches to an OTLP/HTTP collector (``<endpoint>/v1/traces``) as JSON"""
+    def __init__(self, endpoint: str, headers: Optional[Dict[str, str]] = None, timeout: float = 5.0):
+        endpoint = endpoint.rstrip("/")
+        self.url = endpoint if endpoint.endswith("/v1/traces") else endpoint + "/v1/traces"
+        self._client = httpx.Client(headers=headers, timeout=timeout)
+
+    def export(self, request: Dict[str, Any]) -> None:
+        self._client.post(self.url, json=request).raise_for_status()
+
+    def close(self) -> None:
+        self._client.close()
+
+class Tracer:
+    """
+    Minimal W3C-compatible tracer exporting OTLP/JSON.
+
+    A new trace is sampled when the low 64 bits of its random trace ID fall
+    under ``sample_rate``, so every service using the same rule makes the
+    same decision for a trace; a trace continued from an incoming
+    ``traceparent`` follows the caller's sampled flag. Unsampled traces
+    still carry their context (so it can be propagated) but record nothing,
+    and child spans of an unsampled or missing trace cost one context
+    variable lookup. Finished spans are exported in batches from a
+    background thread; when the export queue is full, or the exporter was
+    closed while a span was open, spans are dropped rather than slowing
+    down or failing requests.
+    """
+    def __init__(self, service_name: str = "callchemy"):
+        self.service_name = service_name
+        self.sample_rate = 0.0
+        self._exporter = None
+        self._writer: Optional[BackgroundWriter] = None
+        self._lock = threading.Lock()
+        # Spans that finished after their writer was closed
+        self._dropped_closed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._writer is not None
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped_closed + (self._writer.dropped if self._writer is not None else 0)
+
+    @property
+    def write_errors(self) -> int:
+        """Batches of spans the exporter failed to send"""
+        return self._writer.errors if self._writer is not None else 0
+
+    def configure(self, exporter: Any, sample_rate: float = 1.0, max_queue_size: int = 2048) -> None:
+        """Start exporting sampled spans to ``exporter``, replacing any previous exporter"""
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.close()
+        with self._lock:
+            self.sample_rate = sample_rate
+            self._exporter = exporter
+            # The writer keeps its own exporter, so spans queued before close() still reach it
+            self._writer = BackgroundWriter(
+                lambda spans: self._export(exporter, spans),
+                max_queue_size=max_queue_size,
+                overflow="drop",
+                name="callchemy-span-exporter"
+            )
+
+    def _sampled(self, trace_id: str) -> bool:
+        return int(trace_id[16:], 16) < self.sample_rate * 2 ** 64
+
+    def start_span(
+        self,
+        name: str,
+        kind: int = KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        inherited: Optional[Dict[str, Any]] = None,
+        remote_parent: Optional[SpanContext] = None
+    ):
+        """
+        A span that is a child of the current span, or the root of a new trace
+        (continuing ``remote_parent`` when given) if there is no current span.
+        """
+        if self._writer is None:
+            return _NOOP
+        parent = current_span.get()
+        if parent is not None:
+            return self._child(parent, name, kind, attributes, inherited)
+        if remote_parent is not None:
+            trace_id, parent_id, sampled = remote_parent
+        else:
+            trace_id, parent_id = os.urandom(16).hex(), None
+            sampled = self._sampled(trace_id)
+        context = SpanContext(trace_id, os.urandom(8).hex(), sampled)
+        inherited = dict(inherited or {})
+        return Span(self, name, context, parent_id, kind, {**inherited, **(attributes or {})}, inherited)
+
+    def span(
+        self,
+        name: str,
+        inner: Any = None,
+        kind: int = KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        """
+        A child of the current span that also enters ``inner`` (another context
+        manager) around its block; without a sampled current span this is
+        just ``inner``.
+        """
+        parent = current_span.get()
+        if parent is None or not parent.context.sampled:
+            return inner if inner is not None else _NOOP
+        return self._child(parent, name, kind, attributes, None, inner)
+
+    def _child(self, parent: Span, name, kind, attributes, inherited, inner=None):
+        if inherited:
+            inherited = {**parent.inherited, **inherited}
+        else:
+            inherited = parent.inherited
+        context = SpanContext(parent.context.trace_id, os.urandom(8).hex(), parent.context.sampled)
+        return Span(
+            self, name, context, parent.context.span_id, kind, {**inherited, **(attributes or {})}, inherited, inner
+        )
+
+    def _finish(self, span: Span) -> None:
+        writer = self._writer
+        if writer is None:
+            return
+        try:
+            writer.submit(span)
+        except RuntimeError:
+            # close() or configure() closed this writer while the span was open (e.g. at shutdown)
+            self._dropped_closed += 1
+
+    def _export(self, exporter: Any, spans: List[Span]) -> None:
+        exporter.export({
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "phases.phase2.tracing"},
+                    "spans": [span.to_otlp() for span in spans]
+                }]
+            }]
+        })
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every span finished so far has been exported"""
+        return self._writer.flush(timeout) if self._writer is not None else True
+
+    def close(self) -> None:
+        """Export what is queued and stop exporting"""
+        with self._lock:
+            writer, exporter = self._writer, self._exporter
+            self._writer = self._exporter = None
+        if writer is not None:
+            writer.close()
+            exporter.close()
+
+# Shared by the API pipeline and the summarizer so their spans join one trace
+tracer = Tracer()
@@ -0,0 +1,316 @@
+import os
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+class IVFIndex:
+    """
+    Approximate nearest-neighbour index over unit vectors (inverted file).
+
+    Vectors are stored as float16 rows in one growable array. Until
+    ``train_size`` vectors have been added, searches are exact; then a
+    background thread trains ``n_lists`` centroids with spherical k-means
+    (``train`` does the same in the caller's thread) and files each vector
+    under its nearest centroid. Searches stay exact until the centroids are
+    installed. A query then scores only the vectors in the ``n_probe`` lists
+    closest to it, so its cost grows with ``n_probe / n_lists`` of the
+    collection rather than all of it.
+
+    Inserts are incremental (new vectors join the nearest existing list);
+    re-adding a key appends its new vector and marks the old row dead. Once
+    dead rows outnumber live ones, the arrays are compacted (rows renumbered,
+    dead ones dropped). ``save``/``load`` persist the index
+    to a single .npz file; with several workers, each saves to its own
+    ``worker_path`` and ``load_merged`` combines them.
+    """
+    # Dead rows tolerated before compaction is considered
+    COMPACT_MIN_DELETED = 1024
+
+    def __init__(
+        self,
+        dim: int,
+        n_lists: int = 1024,
+        n_probe: int = 16,
+        train_size: Optional[int] = None,
+        seed: int = 0
+    ):
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_size = train_size if train_size is not None else n_lists * 40
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._train_lock = threading.Lock()
+        self._trainer: Optional[threading.Thread] = None
+        self._vectors = np.empty((1024, dim), dtype=np.float16)
+        self._live = np.zeros(1024, dtype=bool)
+        self._assignments = np.full(1024, -1, dtype=np.int32)
+        self._count = 0
+        self._deleted = 0
+        # Bumped by every compaction, which renumbers rows
+        self._generation = 0
+        self.keys: List[str] = []
+        self._row_for: Dict[str, int] = {}
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[array] = []
+
+    def __len__(self) -> int:
+        return len(self._row_for)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._row_for
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def _grow(self) -> None:
+        capacity = len(self._vectors) * 2
+        for name, fill in (("_vectors", 0), ("_live", False), ("_assignments", -1)):
+            old = getattr(self, name)
+            new = np.full((capacity,) + old.shape[1:], fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, key: str, vector: np.ndarray) -> None:
+        """Insert or replace the vector for ``key``"""
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            previous = self._row_for.get(key)
+            if previous is not None:
+                self._live[previous] = False
+                self._deleted += 1
+            if self._count == len(self._vectors):
+                self._grow()
+            row = self._count
+            self._vectors[row] = vector
+            self._live[row] = True
+            self._count += 1
+            self.keys.append(key)
+            self._row_for[key] = row
+            if self.trained:
+                cell = int(np.argmax(self.centroids @ vector))
+                self._assignments[row] = cell
+                self._lists[cell].append(row)
+            elif self._trainer is None and len(self._row_for) >= self.train_size:
+                # Train off the request path; searches stay exact until it finishes
+                self._trainer = threading.Thread(target=self.train, name="callchemy-ivf-trainer", daemon=True)
+                self._trainer.start()
+            if self._deleted >= self.COMPACT_MIN_DELETED and self._deleted * 2 > self._count:
+                self._compact()
+
+    def compact(self) -> None:
+        """Renumber live rows and drop the vectors of replaced ones"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        rows = np.flatnonzero(self._live[:self._count])
+        count = len(rows)
+        capacity = max(1024, 1 << max(count - 1, 0).bit_length())
+        # New arrays rather than in-place moves: a training thread may still be reading the old ones
+        vectors = np.zeros((capacity, self.dim), dtype=np.float16)
+        vectors[:count] = self._vectors[rows]
+        assignments = np.full(capacity, -1, dtype=np.int32)
+        assignments[:count] = self._assignments[rows]
+        self._vectors, self._assignments = vectors, assignments
+        self._live = np.zeros(capacity, dtype=bool)
+        self._live[:count] = True
+        self.keys = [self.keys[row] for row in rows]
+        self._row_for = {key: row for row, key in enumerate(self.keys)}
+        self._count = count
+        self._deleted = 0
+        self._generation += 1
+        if self.trained:
+            self._build_lists()
+
+    def wait_for_training(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for background training started by ``add`` to finish.
+        Returns: False if it is still running when the timeout expires
+        """
+        trainer = self._trainer
+        if trainer is None:
+            return True
+        trainer.join(timeout)
+        return not trainer.is_alive()
+
+    def train(self, iterations: int = 10) -> None:
+        """
+        (Re)train centroids on the current vectors and refile every vector.
+
+        The index stays usable meanwhile: k-means and filing run without
+        holding the index lock, which is only taken to take a sample and to
+        install the result (filing vectors added in between).
+        """
+        with self._train_lock:
+            with self._lock:
+                rows = np.flatnonzero(self._live[:self._count])
+                if len(rows) > self.train_size:
+                    rows = self._rng.choice(rows, self.train_size, replace=False)
+                data = self._vectors[rows].astype(np.float32)
+                vectors, count, generation = self._vectors, self._count, self._generation
+            centroids = self._kmeans(data, iterations)
+            if centroids is None:
+                return
+            # Rows below ``count`` never change (replacing a key appends a new row) unless compacted
+            assignments = self._assign(vectors, 0, count, centroids)
+            with self._lock:
+                if generation != self._generation:
+                    # Compacted meanwhile, so the rows were renumbered: file them all again
+                    count, assignments = 0, assignments[:0]
+                self.centroids = centroids
+                self._assignments[:count] = assignments
+                self._assignments[count:self._count] = self._assign(self._vectors, count, self._count, centroids)
+                self._build_lists()
+
+    def _kmeans(self, data: np.ndarray, iterations: int) -> Optional[np.ndarray]:
+        n_lists = min(self.n_lists, len(data))
+        if n_lists == 0:
+            return None
+        centroids = data[self._rng.choice(len(data), n_lists, replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, data)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            # Re-seed empty lists with random vectors so every list stays in use
+            sums[empty] = data[self._rng.choice(len(data), int(empty.sum()))]
+            norms[empty] = np.linalg.norm(sums[empty], axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+        return centroids
+
+    @staticmethod
+    def _assign(
+        vectors: np.ndarray,
+        start: int,
+        stop: int,
+        centroids: np.ndarray,
+        chunk_size: int = 65536
+    ) -> np.ndarray:
+        """Nearest centroid of each row in [start, stop)"""
+        assignments = np.empty(stop - start, dtype=np.int32)
+        for offset in range(start, stop, chunk_size):
+            end = min(offset + chunk_size, stop)
+            scores = vectors[offset:end].astype(np.float32) @ centroids.T
+            assignments[offset - start:end - start] = np.argmax(scores, axis=1)
+        return assignments
+
+    def _build_lists(self) -> None:
+        """Group live rows by their assigned centroid"""
+        live = np.flatnonzero(self._live[:self._count])
+        order = live[np.argsort(self._assignments[live], kind="stable")]
+        bounds = np.searchsorted(self._assignments[order], np.arange(len(self.centroids) + 1))
+        self._lists = [array("I", order[bounds[i]:bounds[i + 1]].tolist()) for i in range(len(self.centroids))]
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray:
+        if not self.trained:
+            return np.arange(self._count)
+        n_probe = min(self.n_probe, len(self.centroids))
+        cells = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+        lists = [np.array(self._lists[cell], dtype=np.int64) for cell in cells]
+        return np.concatenate(lists) if lists else np.empty(0, dtype=np.int64)
+
+    def search(self, query: np.ndarray, k: int = 10, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Approximate top-k (key, cosine similarity) pairs, most similar first"""
+        query = np.asarray(query, dtype=np.float32)
+        with self._lock:
+            rows = self._candidates(query)
+            rows = rows[self._live[rows]]
+            if exclude is not None and exclude in self._row_for:
+                rows = rows[rows != self._row_for[exclude]]
+            if len(rows) == 0:
+                return []
+            scores = self._vectors[rows].astype(np.float32) @ query
+            top = min(k, len(rows))
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best], kind="stable")]
+            return [(self.keys[rows[i]], float(scores[i])) for i in best]
+
+    def similar_to(self, key: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Nearest neighbours of an indexed key, excluding itself; raises KeyError if unknown"""
+        with self._lock:
+            vector = self._vectors[self._row_for[key]].astype(np.float32)
+        return self.search(vector, k, exclude=key)
+
+    def save(self, path: str) -> None:
+        """Write live vectors, keys and centroids to a .npz file, atomically"""
+        with self._lock:
+            rows = np.flatnonzero(self._live[:self._count])
+            arrays = {
+                "vectors": self._vectors[rows],
+                "keys": np.array([self.keys[row] for row in rows], dtype=str),
+                "params": np.array([self.dim, self.n_lists, self.n_probe, self.train_size])
+            }
+            if self.trained:
+                arrays["centroids"] = self.centroids
+                arrays["assignments"] = self._assignments[rows]
+        path = Path(path)
+        temp = path.with_name(path.name + ".tmp")
+        with open(temp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temp, path)
+
+    @staticmethod
+    def worker_path(path: str, pid: Optional[int] = None) -> Path:
+        """This worker's file for an index shared through ``path``: vectors.npz -> vectors.<pid>.npz"""
+        path = Path(path)
+        return path.with_name(f"{path.stem}.{pid or os.getpid()}{path.suffix}")
+
+    @classmethod
+    def load_merged(cls, path: str, dim: int, **kwargs) -> Tuple["IVFIndex", List[Path]]:
+        """
+        Load ``path`` and every worker file saved for it, oldest first, so a
+        key re-added by a later worker keeps its latest vector. Without any
+        file, a new index is created with ``dim`` and ``kwargs``.
+
+        Returns:
+            (index, files merged); once the index is saved again they are
+            redundant and can be deleted
+        """
+        path = Path(path)
+        files = [path] + list(path.parent.glob(f"{path.stem}.*{path.suffix}")) if path.parent.is_dir() else []
+        files = sorted((f for f in files if f.is_file()), key=lambda f: (f.stat().st_mtime_ns, f.name))
+        if not files:
+            return cls(dim, **kwargs), []
+        index = cls.load(str(files[0]))
+        for other in files[1:]:
+            index.merge(cls.load(str(other)))
+        return index, files
+
+    def merge(self, other: "IVFIndex") -> None:
+        """Add every vector of ``other``, replacing same keys; an untrained index adopts its centroids"""
+        if not self.trained and other.trained:
+            with self._lock:
+                self.centroids = other.centroids
+                self._assignments[:self._count] = self._assign(self._vectors, 0, self._count, self.centroids)
+                self._build_lists()
+        for row in np.flatnonzero(other._live[:other._count]):
+            self.add(other.keys[row], other._vectors[row])
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        """Restore an index written by ``save``"""
+        with np.load(path, allow_pickle=False) as data:
+            dim, n_lists, n_probe, train_size = (int(v) for v in data["params"])
+            index = cls(dim, n_lists=n_lists, n_probe=n_probe, train_size=train_size)
+            vectors = data["vectors"]
+            count = len(vectors)
+            capacity = max(1024, 1 << max(count - 1, 0).bit_length())
+            index._vectors = np.zeros((capacity, dim), dtype=np.float16)
+            index._vectors[:count] = vectors
+            index._live = np.zeros(capacity, dtype=bool)
+            index._live[:count] = True
+            index._assignments = np.full(capacity, -1, dtype=np.int32)
+            index._count = count
+            index.keys = data["keys"].tolist()
+            index._row_for = {key: row for row, key in enumerate(index.keys)}
+            if "centroids" in data:
+                index.centroids = data["centroids"]
+                index._assignments[:count] = data["assignments"]
+                index._build_lists()
+        return index